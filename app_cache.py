@@ -0,0 +1,45 @@
+# app_cache.py
+
+import os
+import json
+import tempfile
+from datetime import datetime
+
+# All on-disk caches live in one per-user directory. Override with DADDYLIVE_CACHE_DIR.
+APP_CACHE_DIR = os.environ.get("DADDYLIVE_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".daddylive_player"
+)
+
+def cache_path(filename):
+    """Returns the absolute path of a file inside the cache directory, creating the directory."""
+    os.makedirs(APP_CACHE_DIR, exist_ok=True)
+    return os.path.join(APP_CACHE_DIR, filename)
+
+def load_json(filename, default=None):
+    """Loads a JSON cache file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(cache_path(filename), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _json_default(value):
+    # Datetimes are stored as ISO 8601 strings; readers convert them back.
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def save_json(filename, data):
+    """Atomically writes a JSON cache file so concurrent readers never see a partial file."""
+    path = cache_path(filename)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=APP_CACHE_DIR)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=_json_default)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
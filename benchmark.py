@@ -0,0 +1,260 @@
+# benchmark.py
+#
+# Micro-benchmarks for the data pipeline.
+#
+#   python benchmark.py schedule [recorded.html]   parser backends
+#   python benchmark.py model [recorded.html]      Schedule model vs list of row dicts
+#   python benchmark.py search [recorded.html]     ranked search engine latency
+#   python benchmark.py ui [recorded.html]         Qt frame latency while parsing in-thread vs parse pool
+#
+# Without a file, the schedule page cached by the app (if any) is used, and a
+# synthetic page otherwise. "model" uses a large synthetic page by default.
+
+import sys
+import html
+import time
+import random
+import threading
+import tracemalloc
+
+from http_cache import HttpCache
+import schedule_parser
+import search_engine
+from search_index import TrigramIndex
+
+SYNTHETIC_CATEGORIES = ("Soccer", "Basketball", "Tennis", "Motorsport", "Cricket",
+                        "Ice Hockey", "Rugby Union", "Darts", "TV Shows", "Boxing & MMA")
+SYNTHETIC_TEAMS = ("Arsenal", "Chelsea", "Liverpool", "Manchester United", "Manchester City",
+                   "Tottenham Hotspur", "Real Madrid", "Barcelona", "Bayern Munich", "Juventus",
+                   "LA Lakers", "Boston Celtics", "Golden State Warriors", "Toronto Maple Leafs",
+                   "Mumbai Indians", "Leinster", "Saracens", "New Zealand", "South Africa", "Ferrari")
+SYNTHETIC_CHANNELS = ("Sky Sports Main Event", "Sky Sports Premier League", "TNT Sports 1", "ESPN",
+                      "ESPN 2", "beIN Sports 1", "DAZN 1", "Eurosport 1", "BBC One", "Fox Sports 1",
+                      "NBC Sports", "Canal+ Sport", "Willow Cricket", "Premier Sports 1")
+
+def synthetic_schedule_html(categories=SYNTHETIC_CATEGORIES, events_per_category=120, seed=1):
+    """Builds a schedule page shaped like the real one: categories > events > channel links."""
+    rng = random.Random(seed)
+    parts = ['<html><head><title>Schedule</title></head><body><div class="schedule">',
+             '<div class="schedule__day"><div class="schedule__dayTitle">Saturday 18th Oct 2025 - Schedule Time UK GMT</div>']
+    for category in categories:
+        parts.append('<div class="schedule__category is-open">'
+                     '<div class="schedule__catHeader"><div class="card__meta">%s</div></div>'
+                     '<div class="schedule__events">' % category.replace("&", "&amp;"))
+        for n in range(events_per_category):
+            hour, minute = rng.randrange(24), rng.randrange(0, 60, 5)
+            home, away = rng.sample(SYNTHETIC_TEAMS, 2)
+            parts.append('<div class="schedule__event"><div class="schedule__eventHeader">'
+                         '<span class="schedule__time" data-time="%02d:%02d">%02d:%02d</span>'
+                         '<span class="schedule__eventTitle">%s vs %s %d</span>'
+                         '</div><div class="schedule__channels">' % (hour, minute, hour, minute, home, away, n))
+            for _ in range(rng.randrange(0, 5)):
+                channel_id = rng.randrange(1, 900)
+                channel_name = SYNTHETIC_CHANNELS[channel_id % len(SYNTHETIC_CHANNELS)].replace("&", "&amp;")
+                parts.append('<a href="/watch.php?id=%d" target="_blank" title="Ch %d">%s</a>'
+                             % (channel_id, channel_id, channel_name))
+            if rng.random() < 0.1:
+                parts.append('<a href="/info.php">More info</a>')
+            parts.append('</div></div>\n')
+        parts.append('</div></div>')
+    parts.append('</div></div></body></html>')
+    return "".join(parts)
+
+def _best_of(func, arg, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def _load_page(path, use_cache=True, events_per_category=120):
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            page_html, source = f.read(), path
+    else:
+        page_html, source = (HttpCache().raw_body("schedule") if use_cache else None), "cached schedule page"
+        if not page_html:
+            page_html = synthetic_schedule_html(events_per_category=events_per_category)
+            source = "synthetic schedule page"
+    print(f"Source: {source} ({len(page_html) / 1024:.0f} KiB)")
+    return page_html
+
+def bench_schedule(path=None, repeat=5):
+    page_html = _load_page(path)
+
+    reference = None
+    baseline = None
+    for name in ["bs4"] + [b for b in schedule_parser.available_backends() if b != "bs4"]:
+        extract = schedule_parser.BACKENDS[name]
+        extract_time, extracted = _best_of(extract, page_html, repeat)
+        total_time, schedule = _best_of(lambda h: schedule_parser.parse_schedule(h, backend=name), page_html, repeat)
+        rows = schedule.to_rows()
+        if reference is None:
+            reference, baseline = rows, total_time
+        identical = "identical" if rows == reference else "DIFFERENT OUTPUT"
+        print(f"  {name:<7} extract {extract_time * 1000:8.1f} ms   total {total_time * 1000:8.1f} ms"
+              f"   x{baseline / total_time:4.1f}   {len(rows)} rows, {identical}")
+
+def legacy_event_rows(day_title, categories, converter):
+    """The pre-model representation: one 8-key dict per (event, channel), strings copied into each."""
+    schedule_date = schedule_parser.schedule_date_from_title(day_title)
+    date_only_str = schedule_date.strftime('%Y-%m-%d')
+    rows = []
+    for category_name, events in categories:
+        if category_name is None:
+            continue
+        category_name = html.unescape(category_name)
+        if "tv show" in category_name.lower():
+            continue
+        for time_utc_str, event_title, links in events:
+            if time_utc_str is None or event_title is None:
+                continue
+            converted = converter.convert(schedule_date, time_utc_str)
+            if converted is None:
+                continue
+            channels = [(html.unescape(text), schedule_parser.channel_id_from_href(href)) for text, href in links or ()]
+            channels = [c for c in channels if c[1] != 'N/A'] or [('NO CHANNEL LISTED', 'N/A')]
+            for channel_name, channel_id in channels:
+                rows.append({
+                    'Date': date_only_str, 'Time_UTC': time_utc_str, 'Time_Local': converted[1],
+                    'Category': category_name, 'Event': html.unescape(event_title),
+                    'Channel_Name': channel_name, 'Channel_ID': channel_id, 'Start_UTC': converted[0],
+                })
+    return rows
+
+def _measure(build, repeat):
+    """(best build seconds, bytes still allocated by one build's result)."""
+    best, _ = _best_of(lambda _: build(), None, repeat)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return best, size, result
+
+def bench_model(path=None, repeat=5):
+    page_html = _load_page(path, use_cache=False, events_per_category=1000)
+    extracted = schedule_parser.extract_stream(page_html)
+    converter = schedule_parser.EventTimeConverter()
+    # Warm the shared caches so both builds measure only their own work
+    schedule_parser.build_schedule(*extracted, converter)
+
+    rows_time, rows_size, rows = _measure(lambda: legacy_event_rows(*extracted, converter), repeat)
+    model_time, model_size, schedule = _measure(lambda: schedule_parser.build_schedule(*extracted, converter), repeat)
+    assert schedule.to_rows() == rows, "Schedule.to_rows() differs from the row dicts"
+
+    def format_rows():
+        playable = [e for e in rows if e['Channel_ID'] != 'N/A' and e['Channel_Name'] != 'NO CHANNEL LISTED']
+        playable.sort(key=lambda e: (e['Category'], e['Start_UTC']))
+        return [f"{e['Category']} | {e['Time_Local']} | {e['Event']} - {e['Channel_Name']} ({e['Channel_ID']})"
+                for e in playable]
+
+    def format_model():
+        schedule._playable = None
+        return [f"{event.category} | {event.time_local} | {event.title} - {channel.name} ({channel.id})"
+                for event, channel in schedule.playable()]
+
+    rows_format, items = _best_of(lambda _: format_rows(), None, repeat)
+    model_format, model_items = _best_of(lambda _: format_model(), None, repeat)
+    assert items == model_items, "Display strings differ"
+
+    print(f"  {len(rows)} rows / {len(schedule)} events / {len(schedule.channels)} channels")
+    print(f"  list of dicts   build {rows_time * 1000:7.1f} ms   memory {rows_size / 1024:8.0f} KiB"
+          f"   filter+sort+format {rows_format * 1000:6.1f} ms")
+    print(f"  Schedule model  build {model_time * 1000:7.1f} ms   memory {model_size / 1024:8.0f} KiB"
+          f"   filter+sort+format {model_format * 1000:6.1f} ms")
+
+SEARCH_QUERIES = ("arsenl sky", "liverpol", "man", "manchester city espn", "sky sports",
+                  "celtcs", "soccer chelsea", "real madird dazn", "b", "cricket willow")
+
+def bench_search(path=None, repeat=200):
+    page_html = _load_page(path, use_cache=False, events_per_category=200)
+    schedule = schedule_parser.parse_schedule(page_html)
+    pairs = schedule.playable()
+    texts = [f"{e.category} | {e.time_local} | {e.title} - {c.name} ({c.id})" for e, c in pairs]
+    print(f"  {len(pairs)} event listings")
+
+    engine = search_engine.SearchEngine()
+    start = time.perf_counter()
+    engine.sync(search_engine.event_documents(pairs))
+    print(f"  build        {(time.perf_counter() - start) * 1000:7.1f} ms")
+
+    # Refresh where ~5% of the listings changed
+    rng = random.Random(2)
+    refreshed = list(pairs)
+    for i in rng.sample(range(len(refreshed)), len(refreshed) // 20):
+        event, channel = refreshed[i]
+        refreshed[i] = (schedule_parser.Schedule().add_event(event.category, event.title + " (R)", event.date,
+                                                             event.time_utc, event.time_local, event.start_utc,
+                                                             [(channel.name, channel.id)]), channel)
+    start = time.perf_counter()
+    added, removed, changed = engine.sync(search_engine.event_documents(refreshed))
+    print(f"  incremental  {(time.perf_counter() - start) * 1000:7.1f} ms   (+{added} -{removed} ~{changed})")
+
+    trigram = TrigramIndex(texts)
+    lowered = [text.lower() for text in texts]
+    print(f"  {'query':<22} {'engine':>9} {'trigram':>9} {'scan':>9}   hits (top result)")
+    for query in SEARCH_QUERIES:
+        timings = []
+        for func in (lambda: engine.search(query),
+                     lambda: trigram.search(query),
+                     lambda: [i for i, text in enumerate(lowered) if query in text]):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                func()
+            timings.append((time.perf_counter() - start) / repeat)
+        hits = engine.search(query)
+        top = f"{hits[0][1][0].title} / {hits[0][1][1].name}" if hits else "-"
+        print(f"  {query!r:<22} {timings[0] * 1e6:7.0f}us {timings[1] * 1e6:7.0f}us {timings[2] * 1e6:7.0f}us"
+              f"   {len(hits):5d} ({top})")
+
+def bench_ui(path=None, rounds=3):
+    # Imported here so the other benchmarks don't need PyQt
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from parse_pool import ParsePool, parse_schedule_html
+    from ui_latency import FrameLatencyMonitor, format_latency
+
+    page_html = _load_page(path, use_cache=False, events_per_category=600)
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    for backend in ("thread", "process"):
+        pool = ParsePool(backend=backend)
+        pool.warm_up()
+        pool.run(parse_schedule_html, "<html></html>")  # wait until the worker is up
+        for round_number in range(rounds):
+            monitor = FrameLatencyMonitor()
+            elapsed = {}
+
+            def work():
+                # What DataWorker does on a refresh: parse, then build the Schedule
+                start = time.perf_counter()
+                schedule_parser.load_schedule(pool.run(parse_schedule_html, page_html))
+                elapsed["parse"] = time.perf_counter() - start
+                QTimer.singleShot(0, app.quit)
+
+            # Start the worker once the loop (and the heartbeat) is running
+            QTimer.singleShot(50, lambda: threading.Thread(target=work, daemon=True).start())
+            monitor.start()
+            app.exec()
+            stats = monitor.stop()
+            print(f"  {backend:<8} round {round_number + 1}: parse {elapsed['parse'] * 1000:6.0f} ms   {format_latency(stats)}")
+        pool.shutdown()
+
+BENCHMARKS = {
+    "schedule": bench_schedule,
+    "model": bench_model,
+    "search": bench_search,
+    "ui": bench_ui,
+}
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in BENCHMARKS:
+        print(f"Usage: python benchmark.py {{{'|'.join(BENCHMARKS)}}} [recorded.html]")
+        return 1
+    BENCHMARKS[argv[1]](argv[2] if len(argv) > 2 else None)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
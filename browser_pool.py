@@ -0,0 +1,227 @@
+# browser_pool.py
+
+import time
+import queue
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    import psutil
+except ImportError:  # Optional: without it, browsers are only recycled by use count
+    psutil = None
+
+# --- Configuration ---
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+POOL_SIZE = 1
+MAX_USES_PER_BROWSER = 25
+MAX_BROWSER_MEMORY_MB = 700
+COOKIE_WAIT_TIMEOUT = 10
+# Cookies are considered complete once the set stops changing for this long.
+COOKIE_SETTLE_TIME = 0.3
+# ---------------------
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def default_driver_factory(user_agent=DEFAULT_USER_AGENT):
+    """Starts a headless Chrome configured like the original one-shot session browser."""
+    global _driver_path
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument(f"user-agent={user_agent}")
+    # Return from driver.get() at DOMContentLoaded; we wait for cookies explicitly.
+    chrome_options.page_load_strategy = "eager"
+
+    # Resolving the driver binary hits the network, so only do it once per process.
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+    return webdriver.Chrome(service=Service(_driver_path), options=chrome_options)
+
+class _PooledBrowser:
+    """A warm Chrome instance plus the bookkeeping used to decide when to recycle it."""
+    def __init__(self, driver):
+        self.driver = driver
+        self.home_handle = driver.current_window_handle
+        self.uses = 0
+        self.created_at = time.monotonic()
+
+class BrowserPool:
+    """
+    Keeps warm headless Chrome instances and hands out tabs for page visits.
+    Instances are recycled after `max_uses` visits or once their process tree
+    grows past `max_memory_mb` (when psutil is installed).
+    """
+    def __init__(self, size=POOL_SIZE, max_uses=MAX_USES_PER_BROWSER,
+                 max_memory_mb=MAX_BROWSER_MEMORY_MB, driver_factory=None):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.driver_factory = driver_factory or default_driver_factory
+        self._idle = queue.Queue()
+        self._count = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def warm_up(self, background=True):
+        """Starts browsers up to the pool size so the first visit skips the cold start."""
+        def _fill():
+            while True:
+                with self._lock:
+                    if self._closed or self._count >= self.size:
+                        return
+                    self._count += 1
+                try:
+                    self._idle.put(self._new_browser())
+                except Exception as e:
+                    with self._lock:
+                        self._count -= 1
+                    print(f"Warning: Could not start pooled browser: {e}")
+                    return
+
+        if background:
+            threading.Thread(target=_fill, name="browser-pool-warmup", daemon=True).start()
+        else:
+            _fill()
+
+    def _new_browser(self):
+        return _PooledBrowser(self.driver_factory())
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Yields a warm browser, starting one if the pool has spare capacity."""
+        browser = None
+        try:
+            browser = self._idle.get_nowait()
+        except queue.Empty:
+            create = False
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Browser pool has been shut down")
+                if self._count < self.size:
+                    self._count += 1
+                    create = True
+            if create:
+                try:
+                    browser = self._new_browser()
+                except Exception:
+                    with self._lock:
+                        self._count -= 1
+                    raise
+            else:
+                try:
+                    browser = self._idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutException("Timed out waiting for a pooled browser")
+
+        broken = False
+        try:
+            yield browser
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(browser, broken)
+
+    def _release(self, browser, broken=False):
+        browser.uses += 1
+        reason = None
+        if broken:
+            reason = "driver error"
+        elif self._closed:
+            reason = "pool closed"
+        elif browser.uses >= self.max_uses:
+            reason = f"{browser.uses} uses"
+        else:
+            memory_mb = self._memory_mb(browser)
+            if memory_mb is not None and memory_mb > self.max_memory_mb:
+                reason = f"{memory_mb:.0f} MB in use"
+
+        if reason is None:
+            self._idle.put(browser)
+            return
+
+        print(f"Recycling pooled browser ({reason})")
+        self._quit(browser)
+        with self._lock:
+            self._count -= 1
+        if not self._closed:
+            self.warm_up(background=True)
+
+    @staticmethod
+    def _memory_mb(browser):
+        """Resident memory of chromedriver plus every Chrome process under it."""
+        if psutil is None:
+            return None
+        try:
+            root = psutil.Process(browser.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except Exception:
+            return None
+
+    @staticmethod
+    def _quit(browser):
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def fetch_cookies(self, url, timeout=COOKIE_WAIT_TIMEOUT, settle=COOKIE_SETTLE_TIME):
+        """
+        Opens `url` in a fresh tab of a warm browser and returns its cookies once
+        they have appeared and stopped changing (or `timeout` elapses).
+        """
+        with self.acquire() as browser:
+            driver = browser.driver
+            # Start every visit from a clean jar so we wait for *this* page's cookies.
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                driver.delete_all_cookies()
+
+            driver.switch_to.new_window("tab")
+            try:
+                driver.get(url)
+                state = {"cookies": None, "since": time.monotonic()}
+
+                def _cookies_settled(d):
+                    cookies = d.get_cookies()
+                    snapshot = sorted((c["name"], c["value"]) for c in cookies)
+                    now = time.monotonic()
+                    if snapshot != state["cookies"]:
+                        state["cookies"], state["since"] = snapshot, now
+                        return False
+                    return cookies if cookies and now - state["since"] >= settle else False
+
+                try:
+                    return WebDriverWait(driver, timeout, poll_frequency=0.1).until(_cookies_settled)
+                except TimeoutException:
+                    return driver.get_cookies()
+            finally:
+                driver.close()
+                driver.switch_to.window(browser.home_handle)
+
+    def shutdown(self):
+        """Quits every idle browser; browsers still in use are quit on release."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(browser)
+            with self._lock:
+                self._count -= 1
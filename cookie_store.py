@@ -0,0 +1,102 @@
+# cookie_store.py
+
+import time
+import threading
+from urllib.parse import urlparse
+
+import app_cache
+
+COOKIE_STORE_FILE = "session_cookies.json"
+# Lifetime given to session cookies that carry no expiry of their own.
+DEFAULT_COOKIE_TTL = 30 * 60
+# Entries this close to expiry are still served but refreshed in the background.
+REFRESH_MARGIN = 5 * 60
+
+def cookies_to_header(cookies):
+    """Formats a list of Selenium-style cookie dicts as a Cookie header value."""
+    if not cookies:
+        return None
+    return "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in cookies)
+
+def cookies_expiry(cookies, default_ttl=DEFAULT_COOKIE_TTL, now=None):
+    """Returns the epoch time at which the first of the cookies expires."""
+    now = time.time() if now is None else now
+    expiries = [c["expiry"] for c in cookies if isinstance(c.get("expiry"), (int, float))]
+    session_expiry = now + default_ttl
+    if not expiries:
+        return session_expiry
+    return min(min(expiries), session_expiry)
+
+class CookieStore:
+    """
+    On-disk session cookie cache keyed by base domain and channel ID.
+    """
+    def __init__(self, filename=COOKIE_STORE_FILE, default_ttl=DEFAULT_COOKIE_TTL,
+                 refresh_margin=REFRESH_MARGIN):
+        self.filename = filename
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(base_url, channel_id):
+        """Builds the store key, e.g. 'dlhd.dad|32'."""
+        netloc = urlparse(base_url).netloc or base_url
+        return f"{netloc.lower()}|{channel_id}"
+
+    def _load(self):
+        data = app_cache.load_json(self.filename, default={})
+        return data if isinstance(data, dict) else {}
+
+    def get(self, base_url, channel_id):
+        """Returns the cached entry if it has not expired, otherwise None."""
+        key = self.make_key(base_url, channel_id)
+        with self._lock:
+            entry = self._load().get(key)
+        if not entry or entry.get("expires_at", 0) <= time.time():
+            return None
+        return entry
+
+    def headers_by_channel(self, base_url):
+        """{channel_id: Cookie header} for every unexpired entry under base_url, read in one go."""
+        prefix = self.make_key(base_url, "")
+        now = time.time()
+        with self._lock:
+            data = self._load()
+        return {
+            key[len(prefix):]: cookies_to_header(entry.get("cookies"))
+            for key, entry in data.items()
+            if key.startswith(prefix) and entry.get("expires_at", 0) > now
+        }
+
+    def needs_refresh(self, entry):
+        """True when a valid entry is close enough to expiry to be refreshed."""
+        return entry["expires_at"] - time.time() <= self.refresh_margin
+
+    def put(self, base_url, channel_id, cookies):
+        """Stores cookies returned by Selenium and returns the new entry."""
+        now = time.time()
+        entry = {
+            "cookies": [
+                {k: c[k] for k in ("name", "value", "expiry") if k in c}
+                for c in cookies
+            ],
+            "stored_at": now,
+            "expires_at": cookies_expiry(cookies, self.default_ttl, now),
+        }
+        key = self.make_key(base_url, channel_id)
+        with self._lock:
+            data = self._load()
+            # Drop anything else that has expired while we're rewriting the file.
+            data = {k: v for k, v in data.items() if v.get("expires_at", 0) > now}
+            data[key] = entry
+            app_cache.save_json(self.filename, data)
+        return entry
+
+    def invalidate(self, base_url, channel_id):
+        """Removes an entry, e.g. after the server rejected its cookies."""
+        key = self.make_key(base_url, channel_id)
+        with self._lock:
+            data = self._load()
+            if data.pop(key, None) is not None:
+                app_cache.save_json(self.filename, data)
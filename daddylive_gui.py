@@ -1,45 +1,75 @@
 # daddylive_gui.py - THREAD-SAFE FIXED VERSION
 
 import sys
-import re
+import multiprocessing
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
-    QComboBox, QPushButton, QLabel, QMessageBox, QSizePolicy, QSpacerItem, QCompleter
+    QComboBox, QPushButton, QLabel, QMessageBox, QSizePolicy, QSpacerItem, QCompleter,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, pyqtSlot
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal, QSize, pyqtSlot, QModelIndex
 
 # Import the logic modules
-from data_retriever import DataRetriever
-from stream_player import StreamPlayer
+from data_retriever import DataRetriever, get_shared_retriever
+from prefetch import SpeculativeResolver
+from prewarm import PrewarmScheduler, WARM, FAILED, DROPPED
+from list_models import RecordListModel, SearchResultsModel
+from search_engine import channel_documents, event_documents, event_key
+from parse_pool import get_parse_pool
+from ui_latency import FrameLatencyMonitor, format_latency
+from refresh_policy import next_refresh_delay
+from mpv_controller import peek_mpv_controller
+from session_manager import (
+    SessionManager, PRIORITY_NAMES, MAX_SESSION_RESTARTS,
+    STARTING, PLAYING, RESTARTING, STOPPED, ENDED, format_session_stats
+)
+from liveness_scanner import LivenessScanner, AUTO_SCAN_CHANNELS, AUTO_SCAN_LIMIT, liveness_badge
+
+# Highlighting an item starts resolving it after this pause (ms).
+SPECULATION_DEBOUNCE_MS = 400
+
+# Human-readable names for StreamPlayer startup stages shown in the status bar.
+STAGE_LABELS = {
+    "url_selected": "URL selected",
+    "launching": "Streamlink launched",
+    "playing": "playing",
+}
+
+# Columns of the Sessions tab; the last one holds each session's Stop button.
+SESSION_COLUMNS = ("Stream", "Status", "Quality", "Priority", "Restarts", "Stats", "")
+SESSION_STATUS_LABELS = {
+    STARTING: "Starting",
+    PLAYING: "Playing",
+    RESTARTING: "Restarting",
+}
 
 class DataWorker(QThread):
     """Worker thread to fetch data without freezing the GUI."""
     channels_ready = pyqtSignal(list)
-    events_ready = pyqtSignal(list)
+    events_ready = pyqtSignal(object)
     error = pyqtSignal(str)
 
     def run(self):
         try:
-            retriever = DataRetriever()
-            
-            # Fetch Channels
-            channels = retriever.extract_all_streams()
-            self.channels_ready.emit(channels)
-
-            # Fetch Events
-            events = retriever.fetch_and_extract_events()
-            self.events_ready.emit(events)
+            # Channels and events are fetched in parallel and emitted as each arrives
+            get_shared_retriever().load_all(self.channels_ready.emit, self.events_ready.emit, self.report_error)
+        except Exception as e:
+            self.report_error(e)
 
-        except (ConnectionError, RuntimeError) as e:
+    def report_error(self, e):
+        if isinstance(e, (ConnectionError, RuntimeError)):
             self.error.emit(str(e))
-        except Exception as e:
+        else:
             self.error.emit(f"An unexpected error occurred: {e}")
 
 class MainWindow(QMainWindow):
     # Define signals for thread-safe GUI updates
-    playback_error_signal = pyqtSignal(str)
-    playback_stopped_signal = pyqtSignal()
+    playback_error_signal = pyqtSignal(object, str)
+    playback_changed_signal = pyqtSignal(object)
+    playback_stage_signal = pyqtSignal(object, str, float)
+    prewarm_state_signal = pyqtSignal(object, str)
+    liveness_result_signal = pyqtSignal(str, object)
     
     def __init__(self):
         super().__init__()
@@ -47,52 +77,206 @@ class MainWindow(QMainWindow):
         self.setGeometry(100, 100, 700, 450)
         
         # State variables
-        self.current_stream_player = None
         self.channel_data = []
         self.event_data = []
-        
-        # Flag to track if stop was user-initiated
-        self.user_stopped = False
+        self.data_error_fatal = False
+        # True while an automatic (not user-requested) refresh is running
+        self.background_refresh = False
+
+        # Speculative pre-resolution of whatever the user is hovering/selecting
+        self.speculative_resolver = SpeculativeResolver()
+        self.speculation_candidate = None
+        self.speculation_timer = QTimer(self)
+        self.speculation_timer.setSingleShot(True)
+        self.speculation_timer.setInterval(SPECULATION_DEBOUNCE_MS)
+        self.speculation_timer.timeout.connect(self.run_speculation)
+        # Watched events get their channel resolved shortly before kick-off
+        self.prewarm_scheduler = PrewarmScheduler(
+            self.speculative_resolver,
+            on_change=lambda key, state: self.prewarm_state_signal.emit(key, state)
+        )
+
+        # Every stream being played is a session; several can play at once
+        self.session_manager = SessionManager(
+            self.speculative_resolver,
+            on_change=lambda session: self.playback_changed_signal.emit(session),
+            on_stage=lambda session, stage, elapsed: self.playback_stage_signal.emit(session, stage, elapsed),
+            on_error=lambda session, msg: self.playback_error_signal.emit(session, msg)
+        )
+        self.session_rows = []
 
         # Connect signals to slots
         self.playback_error_signal.connect(self.show_playback_error)
-        self.playback_stopped_signal.connect(self.handle_playback_stopped)
+        self.playback_changed_signal.connect(self.handle_playback_change)
+        self.playback_stage_signal.connect(self.handle_playback_stage)
+        self.prewarm_state_signal.connect(self.handle_prewarm_state)
+        self.liveness_result_signal.connect(self.handle_liveness_result)
+
+        # Background liveness scan of every channel; results badge the lists
+        self.liveness_scanner = LivenessScanner(
+            on_result=lambda channel_id, entry: self.liveness_result_signal.emit(channel_id, entry)
+        )
+        # Badges are redrawn at most once a second while a scan is reporting,
+        # only for the channels reported since the last redraw
+        self.liveness_changed = set()
+        self.liveness_redraw_timer = QTimer(self)
+        self.liveness_redraw_timer.setSingleShot(True)
+        self.liveness_redraw_timer.setInterval(1000)
+        self.liveness_redraw_timer.timeout.connect(self.redraw_liveness_badges)
 
         self.tab_widget = QTabWidget()
         self.setCentralWidget(self.tab_widget)
+
+        # Streams playing and their share of the bandwidth/CPU budget
+        self.sessions_usage_lbl = QLabel("")
+        self.statusBar().addPermanentWidget(self.sessions_usage_lbl)
+        # Session stats are refreshed (and the budget enforced) every second
+        self.session_stats_timer = QTimer(self)
+        self.session_stats_timer.setInterval(1000)
+        self.session_stats_timer.timeout.connect(self.update_session_stats)
+        self.session_stats_timer.start()
         
         # Setup Tabs
         self.channels_tab = self.setup_channels_tab()
         self.events_tab = self.setup_events_tab()
+        self.sessions_tab = self.setup_sessions_tab()
         self.about_tab = self.setup_about_tab()
         
         self.tab_widget.addTab(self.channels_tab, "Live Channels")
         self.tab_widget.addTab(self.events_tab, "Events Schedule")
+        self.tab_widget.addTab(self.sessions_tab, "Sessions")
         self.tab_widget.addTab(self.about_tab, "About")
 
-        # Initial data load
+        # Page parsing runs in a worker process; start it before the first refresh needs it
+        get_parse_pool().warm_up()
+        # Measures event-loop stalls while a refresh is running
+        self.frame_monitor = FrameLatencyMonitor(parent=self)
+        # Periodic background refresh; the interval follows the schedule (see refresh_policy)
+        self.auto_refresh_timer = QTimer(self)
+        self.auto_refresh_timer.setSingleShot(True)
+        self.auto_refresh_timer.timeout.connect(self.auto_refresh)
+
+        self.prewarm_scheduler.start()
+
+        # Show the last known lists straight away, then revalidate them in the background
+        self.load_cached_data()
         self.load_data()
 
+    def load_cached_data(self):
+        """Populates the lists from the on-disk cache without touching the network."""
+        channels = DataRetriever.load_cached_channels()
+        if channels:
+            self.update_channels_list(channels)
+            self.channels_status_lbl.setText(f"Status: {len(channels)} channels loaded from cache.")
+        events = DataRetriever.load_cached_events()
+        if events:
+            self.update_events_list(events)
+            self.events_status_lbl.setText(f"Status: {events.row_count()} events loaded from cache.")
+
     def load_data(self):
         """Initial or refresh data load, running in a worker thread."""
         self.data_worker = DataWorker()
         self.data_worker.channels_ready.connect(self.update_channels_list)
         self.data_worker.events_ready.connect(self.update_events_list)
         self.data_worker.error.connect(self.handle_data_error)
+        self.data_worker.finished.connect(self.data_load_finished)
+        self.auto_refresh_timer.stop()
         
-        # Disable buttons while loading
+        # Disable buttons while loading; lists already shown from cache stay playable
         self.channels_refresh_btn.setEnabled(False)
         self.events_refresh_btn.setEnabled(False)
-        self.channels_play_btn.setEnabled(False)
-        self.events_play_btn.setEnabled(False)
-        
-        self.channels_status_lbl.setText("Status: Downloading channel list...")
-        self.events_status_lbl.setText("Status: Downloading events list...")
+        if not self.channel_data:
+            self.channels_play_btn.setEnabled(False)
+            self.channels_status_lbl.setText("Status: Downloading channel list...")
+        else:
+            self.channels_status_lbl.setText("Status: Checking channel list for updates...")
+        if not self.event_data:
+            self.events_play_btn.setEnabled(False)
+            self.events_status_lbl.setText("Status: Downloading events list...")
+        else:
+            self.events_status_lbl.setText("Status: Checking events list for updates...")
         
+        self.frame_monitor.start()
         self.data_worker.start()
 
+    def refresh_now(self):
+        """User-requested refresh (Refresh buttons)."""
+        self.background_refresh = False
+        self.load_data()
+
+    def auto_refresh(self):
+        """Timer-driven refresh; errors are reported in the status line only."""
+        if self.data_error_fatal:
+            return
+        self.background_refresh = True
+        self.load_data()
+
+    def data_load_finished(self):
+        """Logs how smoothly the UI kept running and schedules the next background refresh."""
+        if self.frame_monitor.is_active():
+            print(f"UI frame latency during refresh: {format_latency(self.frame_monitor.stop())}")
+        self.background_refresh = False
+        if self.data_error_fatal:
+            return
+        self.scan_channel_liveness()
+        delay, reason = next_refresh_delay(self.event_data)
+        self.auto_refresh_timer.start(int(delay * 1000))
+        print(f"Next background refresh in {delay / 60:.0f} min ({reason})")
+
+    def badge(self, channel_id):
+        """Liveness badge shown in front of a channel's list entries."""
+        return liveness_badge(self.liveness_scanner.get(channel_id))
+
+    def scan_channel_liveness(self):
+        """Rescans up to AUTO_SCAN_LIMIT due channels (event channels first, then 24/7 channels)."""
+        if not AUTO_SCAN_CHANNELS:
+            return
+        channel_ids = []
+        if self.event_data:
+            channel_ids.extend(channel.id for channel in self.event_data.channels)
+        channel_ids.extend(c['DLChNo'] for c in self.channel_data or [])
+        if channel_ids:
+            self.liveness_scanner.scan_in_background(channel_ids, limit=AUTO_SCAN_LIMIT)
+
+    def handle_liveness_result(self, channel_id, entry):
+        self.liveness_changed.add(str(channel_id))
+        if not self.liveness_redraw_timer.isActive():
+            self.liveness_redraw_timer.start()
+
+    def redraw_liveness_badges(self):
+        changed, self.liveness_changed = self.liveness_changed, set()
+        self.channels_model.refresh_display(lambda c: str(c['DLChNo']) in changed)
+        self.events_model.refresh_display(lambda pair: str(pair[1].id) in changed)
+        if self.channel_data:
+            results = [self.liveness_scanner.get(c['DLChNo']) for c in self.channel_data]
+            checked = [entry for entry in results if entry and not entry.get("gated")]
+            live = sum(1 for entry in checked if entry["live"])
+            self.channels_liveness_lbl.setText(
+                f"Liveness: {live} of {len(checked)} checked channels live "
+                f"({len(self.channel_data) - len(checked)} not checked yet or needing a session)."
+            )
+
     def handle_data_error(self, message):
-        """Displays error and closes the app if data retrieval fails."""
+        """Displays error and closes the app if data retrieval fails with nothing cached."""
+        if self.data_error_fatal:
+            # Channels and events can both fail; only report the first fatal error
+            return
+        if self.channel_data or self.event_data:
+            # Keep working from the cached lists
+            self.channels_refresh_btn.setEnabled(True)
+            self.events_refresh_btn.setEnabled(True)
+            self.channels_status_lbl.setText("Status: Update failed, showing cached channel list.")
+            self.events_status_lbl.setText("Status: Update failed, showing cached events list.")
+            if self.background_refresh:
+                # Don't interrupt the user for a refresh they didn't ask for
+                return
+            QMessageBox.warning(
+                self,
+                "Data Retrieval Error",
+                f"Unable to update lists, showing cached data. Please retry with a VPN.\n\nDetails: {message}"
+            )
+            return
+        self.data_error_fatal = True
         QMessageBox.critical(
             self, 
             "Data Retrieval Error",
@@ -102,43 +286,61 @@ class MainWindow(QMainWindow):
 
     def update_channels_list(self, channels):
         """Updates the channels ComboBox with retrieved data."""
+        if channels and channels == self.channel_data:
+            # Revalidation found nothing new; keep the list (and the selection) as is
+            self.channels_status_lbl.setText(f"Status: {len(channels)} channels loaded (up to date).")
+            self.channels_refresh_btn.setEnabled(True)
+            return
+        had_channels = bool(self.channel_data)
         self.channel_data = channels
-        self.channels_combo.clear()
         
         if channels:
-            items = [f"{c['DLChName']} ({c['DLChNo']})" for c in channels]
-            self.channels_combo.addItems(items)
+            status = f"Status: {len(channels)} channels loaded."
+            if had_channels:
+                # Only the differences reach the view, so the selection survives
+                status += " ({} added, {} removed, {} changed)".format(
+                    *self.channels_model.update_records(channels))
+            else:
+                self.channels_model.set_records(channels)
+            self.channels_combo.lineEdit().setPlaceholderText("Type to filter channels...")
             self.channels_play_btn.setEnabled(True)
-            self.channels_status_lbl.setText(f"Status: {len(channels)} channels loaded.")
+            self.channels_status_lbl.setText(status)
         else:
-            self.channels_combo.addItem("No channels found.")
+            self.channels_model.set_records([])
+            self.channels_combo.lineEdit().setPlaceholderText("No channels found.")
             self.channels_play_btn.setEnabled(False)
             self.channels_status_lbl.setText("Status: No channels found.")
             
         self.channels_refresh_btn.setEnabled(True)
 
     def update_events_list(self, events):
-        """Updates the events ComboBox with retrieved data."""
+        """Updates the events ComboBox with retrieved data (an event_model.Schedule)."""
+        if events and events == self.event_data:
+            # Revalidation found nothing new; keep the list (and the selection) as is
+            self.events_status_lbl.setText(f"Status: {events.row_count()} events loaded (up to date).")
+            self.events_refresh_btn.setEnabled(True)
+            return
+        had_events = bool(self.event_data)
         self.event_data = events
-        self.events_combo.clear()
         
         if events:
-            # Filter out entries with 'N/A' or 'NO CHANNEL LISTED' for playback
-            self.playable_events = [e for e in events if e.get('Channel_ID', 'N/A') != 'N/A' and e['Channel_Name'] != 'NO CHANNEL LISTED']
-            
-            # Sort by Category first, then by Time_UTC
-            self.playable_events.sort(key=lambda e: (e['Category'], e['Time_UTC']))
-            
-            # Display format: "Category | Time_Local | Event - Channel_Name (Channel_ID)"
-            items = [
-                f"{e['Category']} | {e['Time_Local']} | {e['Event']} - {e['Channel_Name']} ({e['Channel_ID']})"
-                for e in self.playable_events
-            ]
-            self.events_combo.addItems(items)
+            status = f"Status: {events.row_count()} events loaded (including non-playable entries)."
+            # (event, channel) pairs for events that list a channel, sorted by category then start time
+            if had_events:
+                # Diffed by (date, time, category, name, channel): only the differences reach the view
+                status += " ({} added, {} removed, {} changed)".format(
+                    *self.events_model.update_records(events.playable()))
+            else:
+                self.events_model.set_records(events.playable())
+            # Stop pre-warming events that are no longer on the schedule
+            self.prewarm_scheduler.sync(events.playable())
+            self.events_combo.lineEdit().setPlaceholderText("Type to filter events...")
             self.events_play_btn.setEnabled(True)
-            self.events_status_lbl.setText(f"Status: {len(events)} events loaded (including non-playable entries).")
+            self.events_status_lbl.setText(status)
         else:
-            self.events_combo.addItem("No events found.")
+            self.events_model.set_records([])
+            self.prewarm_scheduler.sync([])
+            self.events_combo.lineEdit().setPlaceholderText("No events found.")
             self.events_play_btn.setEnabled(False)
             self.events_status_lbl.setText("Status: No events found.")
             
@@ -151,16 +353,18 @@ class MainWindow(QMainWindow):
         self.channels_combo = QComboBox()
         self.channels_combo.setMinimumHeight(30)
         self.channels_combo.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.channels_combo.setEditable(True)
-        self.channels_combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-        self.channels_combo.completer().setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        self.channels_combo.completer().setFilterMode(Qt.MatchFlag.MatchContains)
+        # Channel dicts shown as "Name (ID)"
+        self.channels_model = RecordListModel(
+            lambda c: f"{self.badge(c['DLChNo'])}{c['DLChName']} ({c['DLChNo']})",
+            documents=channel_documents, parent=self
+        )
+        self.setup_search_combo(self.channels_combo, self.channels_model, self.channel_highlighted)
         layout.addWidget(QLabel("Select Live Channel (type to filter):"))
         layout.addWidget(self.channels_combo)
         
         button_layout = QHBoxLayout()
         self.channels_refresh_btn = QPushButton("Refresh list")
-        self.channels_refresh_btn.clicked.connect(self.load_data)
+        self.channels_refresh_btn.clicked.connect(self.refresh_now)
         
         self.channels_play_btn = QPushButton("▶️ Play Channel")
         self.channels_play_btn.setMinimumSize(QSize(100, 40))
@@ -172,6 +376,8 @@ class MainWindow(QMainWindow):
 
         self.channels_status_lbl = QLabel("Status: Awaiting list download...")
         layout.addWidget(self.channels_status_lbl)
+        self.channels_liveness_lbl = QLabel("")
+        layout.addWidget(self.channels_liveness_lbl)
         
         layout.addItem(QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
         
@@ -184,32 +390,102 @@ class MainWindow(QMainWindow):
         self.events_combo = QComboBox()
         self.events_combo.setMinimumHeight(30)
         self.events_combo.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.events_combo.setEditable(True)
-        self.events_combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
-        self.events_combo.completer().setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        self.events_combo.completer().setFilterMode(Qt.MatchFlag.MatchContains)
+        # (event, channel) pairs shown as "Category | Time_Local | Event - Channel_Name (Channel_ID)"
+        self.events_model = RecordListModel(
+            lambda pair: f"{self.badge(pair[1].id)}{pair[0].category} | {pair[0].time_local} | {pair[0].title} - {pair[1].name} ({pair[1].id})",
+            documents=event_documents, parent=self
+        )
+        self.setup_search_combo(self.events_combo, self.events_model, self.event_highlighted)
         layout.addWidget(QLabel("Select Scheduled Event (type to filter):"))
         layout.addWidget(self.events_combo)
         
         button_layout = QHBoxLayout()
         self.events_refresh_btn = QPushButton("Refresh list")
-        self.events_refresh_btn.clicked.connect(self.load_data)
+        self.events_refresh_btn.clicked.connect(self.refresh_now)
         
         self.events_play_btn = QPushButton("▶️ Play Event")
         self.events_play_btn.setMinimumSize(QSize(100, 40))
         self.events_play_btn.clicked.connect(self.play_events_stream)
+
+        # Pre-warm the selected event's stream a few minutes before it starts
+        self.events_watch_btn = QPushButton("👁 Watch")
+        self.events_watch_btn.setMinimumSize(QSize(100, 40))
+        self.events_watch_btn.setEnabled(False)
+        self.events_watch_btn.clicked.connect(self.toggle_event_watch)
+        self.events_combo.currentIndexChanged.connect(self.update_watch_button)
         
         button_layout.addWidget(self.events_refresh_btn)
+        button_layout.addWidget(self.events_watch_btn)
         button_layout.addWidget(self.events_play_btn)
         layout.addLayout(button_layout)
 
         self.events_status_lbl = QLabel("Status: Awaiting list download...")
         layout.addWidget(self.events_status_lbl)
+        self.events_watch_lbl = QLabel("")
+        layout.addWidget(self.events_watch_lbl)
         
         layout.addItem(QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
         
         return tab
 
+    def setup_sessions_tab(self):
+        tab = QWidget()
+        layout = QVBoxLayout(tab)
+
+        layout.addWidget(QLabel("Streams playing now (lower priorities lose quality first when over budget):"))
+        self.sessions_table = QTableWidget(0, len(SESSION_COLUMNS))
+        self.sessions_table.setHorizontalHeaderLabels(SESSION_COLUMNS)
+        self.sessions_table.verticalHeader().setVisible(False)
+        self.sessions_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.sessions_table.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        header = self.sessions_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.sessions_table)
+
+        button_layout = QHBoxLayout()
+        self.sessions_budget_lbl = QLabel("")
+        self.sessions_stop_all_btn = QPushButton("⏹ Stop all")
+        self.sessions_stop_all_btn.setMinimumSize(QSize(100, 40))
+        self.sessions_stop_all_btn.setEnabled(False)
+        self.sessions_stop_all_btn.clicked.connect(self.session_manager.stop_all)
+        button_layout.addWidget(self.sessions_budget_lbl)
+        button_layout.addWidget(self.sessions_stop_all_btn)
+        layout.addLayout(button_layout)
+
+        return tab
+
+    def setup_search_combo(self, combo, model, on_highlight):
+        """
+        Makes `combo` an editable view of `model` whose typed text filters a
+        completion popup through the model's search index.
+        """
+        combo.setEditable(True)
+        combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        combo.setModel(model)
+
+        results = SearchResultsModel(model, combo)
+        completer = QCompleter(results, combo)
+        # The results model is already filtered; the completer just shows it
+        completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        completer.setMaxVisibleItems(15)
+        combo.setCompleter(completer)
+        combo.lineEdit().textEdited.connect(lambda text: self.filter_search_combo(completer, results, text))
+
+        combo.highlighted.connect(on_highlight)
+        combo.activated.connect(on_highlight)
+        completer.highlighted[QModelIndex].connect(
+            lambda index: on_highlight(results.source_row(index.row()))
+        )
+
+    def filter_search_combo(self, completer, results, text):
+        """Refreshes a combo's completion popup for newly typed text."""
+        results.set_query(text)
+        if text and results.rowCount():
+            completer.complete()
+        else:
+            completer.popup().hide()
+
     def setup_about_tab(self):
         tab = QWidget()
         layout = QVBoxLayout(tab)
@@ -247,153 +523,240 @@ class MainWindow(QMainWindow):
         
         return tab
 
+    def channel_highlighted(self, index):
+        """Queues speculative resolution of a highlighted channel."""
+        channel = self.channels_model.record(index)
+        if channel is not None:
+            self.schedule_speculation(channel['DLChNo'])
+
+    def event_highlighted(self, index):
+        """Queues speculative resolution of a highlighted event's channel."""
+        pair = self.events_model.record(index)
+        if pair is not None:
+            self.schedule_speculation(pair[1].id)
+
+    def toggle_event_watch(self):
+        """Watches (or stops watching) the selected event for pre-warming."""
+        pair = self.events_model.record(self.events_combo.currentIndex())
+        if pair is None:
+            return
+        key = event_key(*pair)
+        if self.prewarm_scheduler.is_watched(key):
+            self.prewarm_scheduler.unwatch(key)
+        elif self.prewarm_scheduler.watch(*pair) is None:
+            QMessageBox.information(self, "Watch Event", "This event has already finished.")
+        self.update_watch_button()
+
+    def update_watch_button(self, *args):
+        """Shows whether the selected event is being watched."""
+        pair = self.events_model.record(self.events_combo.currentIndex())
+        self.events_watch_btn.setEnabled(pair is not None and pair[0].start_utc is not None)
+        watched = pair is not None and self.prewarm_scheduler.is_watched(event_key(*pair))
+        self.events_watch_btn.setText("👁 Unwatch" if watched else "👁 Watch")
+
+    def handle_prewarm_state(self, key, state):
+        """Reports watched events' pre-warm progress in the status bar."""
+        watched = self.prewarm_scheduler.watched()
+        warm = sum(1 for item in watched if item[4] == WARM)
+        if state in (WARM, FAILED):
+            title = next((item[1] for item in watched if item[0] == key), "")
+            self.statusBar().showMessage(
+                f"Pre-warm {'ready' if state == WARM else 'failed'}: {title}", 5000
+            )
+        self.events_watch_lbl.setText(
+            f"Watching {len(watched)} event(s), {warm} ready to play." if watched else ""
+        )
+        if state == DROPPED:
+            self.update_watch_button()
+
+    def schedule_speculation(self, channel_id):
+        """Debounces highlight changes so only the item the user settles on is resolved."""
+        self.speculation_candidate = channel_id
+        self.speculation_timer.start()
+
+    def run_speculation(self):
+        """Starts the debounced speculative resolve."""
+        if self.speculation_candidate is None or self.session_manager.starting():
+            return
+        self.speculative_resolver.speculate(self.speculation_candidate)
+
     def play_channels_stream(self):
         """Starts playback for the selected channel."""
-        selected_index = self.channels_combo.currentIndex()
-        if selected_index < 0 or not self.channel_data:
+        channel = self.channels_model.record(self.channels_combo.currentIndex())
+        if channel is None:
              QMessageBox.warning(self, "Playback Error", "Please select a channel first, or refresh the list.")
              return
              
         try:
-            channel_id = self.channel_data[selected_index]['DLChNo']
-            channel_name = self.channel_data[selected_index]['DLChName']
-            self.start_playback(channel_id, channel_name)
+            self.start_playback(channel['DLChNo'], channel['DLChName'])
         except Exception as e:
             QMessageBox.critical(self, "Playback Error", f"An error occurred during channel ID retrieval: {e}")
 
     def play_events_stream(self):
         """Starts playback for the selected event's channel."""
-        selected_text = self.events_combo.currentText()
-        if not selected_text or "No events found" in selected_text:
+        # The model row is the (event, channel) pair itself; nothing to parse out of the text
+        pair = self.events_model.record(self.events_combo.currentIndex())
+        if pair is None:
              QMessageBox.warning(self, "Playback Error", "Please select a valid event first.")
              return
-             
-        try:
-            # Extract Channel_ID which is inside the last parentheses
-            match = re.search(r'\((\d+)\)$', selected_text)
-            if not match:
-                QMessageBox.warning(self, "Playback Error", "Selected event has no discernible Channel ID. Select a different event.")
-                return
 
-            channel_id = int(match.group(1))
-            # Extract event name - it's after the second pipe and before the dash
-            parts = selected_text.split(' | ')
-            if len(parts) >= 3:
-                event_name = parts[2].split(' - ')[0].strip()
-            else:
-                event_name = "Selected Event"
-
-            self.start_playback(channel_id, f"Event: {event_name}")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Playback Error", f"Failed to extract Channel ID from event: {e}")
+        event, channel = pair
+        self.start_playback(channel.id, f"Event: {event.title}")
 
     def start_playback(self, channel_id, stream_name):
-        """Manages starting a new StreamPlayer thread."""
-        if self.current_stream_player and self.current_stream_player.is_alive():
+        """Starts the stream in a new session, alongside any already playing."""
+        existing = self.session_manager.find(channel_id)
+        if existing is not None:
+            self.statusBar().showMessage(f"Already playing: {existing.name}")
+            self.tab_widget.setCurrentWidget(self.sessions_tab)
+            return
+
+        if self.session_manager.count() >= self.session_manager.max_sessions:
+            replaced = self.session_manager.lowest_priority()
             reply = QMessageBox.question(
-                self, 
-                "Stream Already Playing", 
-                "A stream is currently playing. Do you want to stop the current stream and start the new one?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, 
+                self,
+                "Too Many Streams",
+                f"{self.session_manager.max_sessions} streams are already playing. "
+                f"Do you want to stop \"{replaced.name}\" and start the new one?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                 QMessageBox.StandardButton.No
             )
-            if reply == QMessageBox.StandardButton.Yes:
-                self.user_stopped = True
-                self.current_stream_player.stop()
-                self.current_stream_player.join(timeout=1)
-            else:
+            if reply != QMessageBox.StandardButton.Yes:
                 return
+            self.session_manager.stop(replaced.id)
+
+        # Playback takes priority over speculative work for other channels
+        self.speculation_timer.stop()
+        self.speculative_resolver.cancel_pending(keep=channel_id)
 
         try:
-            self.user_stopped = False
-            self.current_stream_player = StreamPlayer(
-                channel_id=channel_id,
-                start_callback=lambda: self.playback_started(stream_name),
-                stop_callback=lambda: self.playback_stopped_signal.emit(),
-                error_callback=lambda msg: self.playback_error_signal.emit(msg)
-            )
-            self.current_stream_player.start()
-            self.update_ui_for_playback_state(True, stream_name)
+            self.session_manager.start(channel_id, stream_name)
         except Exception as e:
             QMessageBox.critical(self, "Launch Error", f"Failed to launch playback thread: {e}")
 
-    def playback_started(self, stream_name):
-        """Callback when the StreamPlayer successfully launches."""
-        pass
+    @pyqtSlot(object)
+    def handle_playback_change(self, session):
+        """Slot for any session starting, playing, changing quality or ending."""
+        self.rebuild_sessions_table()
+        if session.state == STARTING:
+            self.statusBar().showMessage(f"Starting: {session.name} ({session.quality_name} quality)...")
+        elif session.state == PLAYING:
+            self.statusBar().showMessage(
+                f"Streaming: {session.name} | {self.format_stage_timings(session.stage_timings)} | "
+                f"Close its player window or stop it in the Sessions tab"
+            )
+        elif session.state == RESTARTING:
+            self.statusBar().showMessage(
+                f"Stream ended, restarting: {session.name} ({session.restarts}/{MAX_SESSION_RESTARTS})"
+            )
+        elif session.state == STOPPED:
+            self.statusBar().showMessage(f"Stopped: {session.name}")
+        elif session.state == ENDED:
+            self.statusBar().showMessage(
+                f"Stream ended: {session.name} (player closed, stream offline, or network issue - "
+                f"a VPN may help)"
+            )
 
-    @pyqtSlot()
-    def handle_playback_stopped(self):
-        """Slot to handle playback stopped in main thread."""
-        self.current_stream_player = None
-        self.update_ui_for_playback_state(False)
-        
-        # Only show message if user didn't manually stop it
-        if not self.user_stopped:
-            QMessageBox.information(
-                self,
-                "Stream Ended",
-                "Stream has been terminated.\n\n"
-                "Possible reasons:\n"
-                "• You closed the player window\n"
-                "• Stream went offline/unavailable\n"
-                "• You need to try using a VPN\n"
-                "• Network connection issue"
+    @pyqtSlot(object, str, float)
+    def handle_playback_stage(self, session, stage, elapsed):
+        """Slot that shows a session's startup progress in the status bar."""
+        if stage != "playing":
+            self.statusBar().showMessage(
+                f"Starting: {session.name} | {self.format_stage_timings(session.stage_timings)}"
             )
 
-    @pyqtSlot(str)
-    def show_playback_error(self, message):
+    def format_stage_timings(self, stage_timings):
+        """Formats stage timings as e.g. 'URL selected 1.2s, playing 3.4s'."""
+        return ", ".join(
+            f"{STAGE_LABELS.get(stage, stage)} {elapsed:.1f}s" for stage, elapsed in stage_timings
+        )
+
+    @pyqtSlot(object, str)
+    def show_playback_error(self, session, message):
         """Slot to show playback error in main thread."""
         QMessageBox.critical(
             self, 
             "Playback Failed", 
-            f"Failed to play stream. Ensure all required Python packages are installed.\n\n"
+            f"Failed to play {session.name}. Ensure all required Python packages are installed.\n\n"
             f"Details: {message}"
         )
-        self.current_stream_player = None
-        self.update_ui_for_playback_state(False)
-
-    def update_ui_for_playback_state(self, is_playing, stream_name=None):
-        """Updates UI elements based on the playback state."""
-        try: 
-            self.channels_play_btn.clicked.disconnect()
-        except TypeError: 
-            pass
-        try: 
-            self.events_play_btn.clicked.disconnect()
-        except TypeError: 
-            pass
-        
-        if is_playing:
-            self.channels_play_btn.setText("🔴 STOP Stream")
-            self.events_play_btn.setText("🔴 STOP Stream")
-            self.channels_play_btn.clicked.connect(self.stop_current_stream)
-            self.events_play_btn.clicked.connect(self.stop_current_stream)
-            self.statusBar().showMessage(f"Streaming: {stream_name} | Close player window or click STOP")
-        else:
-            self.channels_play_btn.setText("▶️ Play Channel")
-            self.events_play_btn.setText("▶️ Play Event")
-            self.channels_play_btn.clicked.connect(self.play_channels_stream)
-            self.events_play_btn.clicked.connect(self.play_events_stream)
-            self.statusBar().showMessage("Ready.")
-
-    def stop_current_stream(self):
-        """Handler for the STOP button."""
-        if self.current_stream_player and self.current_stream_player.is_alive():
-            self.user_stopped = True
-            self.current_stream_player.stop() 
-            self.current_stream_player.join(timeout=3)
-        self.handle_playback_stopped()
+
+    def rebuild_sessions_table(self):
+        """Lists the active sessions, each with its priority selector and Stop button."""
+        sessions = self.session_manager.sessions()
+        self.session_rows = [session.id for session in sessions]
+        self.sessions_table.setRowCount(len(sessions))
+        for row, session in enumerate(sessions):
+            self.sessions_table.setItem(row, 0, QTableWidgetItem(session.name))
+
+            priority_combo = QComboBox()
+            for priority, name in sorted(PRIORITY_NAMES.items(), reverse=True):
+                priority_combo.addItem(name, priority)
+            priority_combo.setCurrentIndex(priority_combo.findData(session.priority))
+            priority_combo.currentIndexChanged.connect(
+                lambda _, session_id=session.id, combo=priority_combo:
+                    self.session_manager.set_priority(session_id, combo.currentData())
+            )
+            self.sessions_table.setCellWidget(row, 3, priority_combo)
+
+            stop_btn = QPushButton("⏹ Stop")
+            stop_btn.clicked.connect(lambda _, session_id=session.id: self.session_manager.stop(session_id))
+            self.sessions_table.setCellWidget(row, len(SESSION_COLUMNS) - 1, stop_btn)
+        self.update_session_cells(sessions)
+
+        count = len(sessions)
+        self.tab_widget.setTabText(self.tab_widget.indexOf(self.sessions_tab),
+                                   f"Sessions ({count})" if count else "Sessions")
+        self.sessions_stop_all_btn.setEnabled(count > 0)
+
+    def update_session_cells(self, sessions):
+        """Refreshes the status, quality and stats columns in place."""
+        for row, session in enumerate(sessions):
+            if row >= len(self.session_rows) or self.session_rows[row] != session.id:
+                continue
+            for column, text in (
+                (1, SESSION_STATUS_LABELS.get(session.state, session.state)),
+                (2, session.quality_name),
+                (4, str(session.restarts)),
+                (5, format_session_stats(session)),
+            ):
+                self.sessions_table.setItem(row, column, QTableWidgetItem(text))
+
+        count, bandwidth, cpu = self.session_manager.usage()
+        usage = (
+            f"{count}/{self.session_manager.max_sessions} streams · "
+            f"{bandwidth / 1000:.1f}/{self.session_manager.bandwidth_budget / 1000:.0f} Mbps · "
+            f"CPU {cpu:.1f}/{self.session_manager.cpu_budget:.1f}"
+        )
+        if self.session_manager.over_budget():
+            usage += " · over budget"
+        self.sessions_budget_lbl.setText(usage)
+        self.sessions_usage_lbl.setText(usage if count else "")
+
+    @pyqtSlot()
+    def update_session_stats(self):
+        """Polls the players' stats, enforces the budget and refreshes the Sessions tab."""
+        # Quality changes made here are reported through handle_playback_change
+        self.session_manager.poll()
+        self.update_session_cells(self.session_manager.sessions())
 
     def closeEvent(self, event):
-        """Ensures the stream is stopped before closing the application."""
-        if self.current_stream_player and self.current_stream_player.is_alive():
-            self.user_stopped = True
-            self.current_stream_player.stop()
-            self.current_stream_player.join(timeout=5)
+        """Ensures the streams are stopped before closing the application."""
+        self.session_stats_timer.stop()
+        self.session_manager.shutdown()
+        self.auto_refresh_timer.stop()
+        self.prewarm_scheduler.shutdown()
+        self.liveness_scanner.stop()
+        self.speculative_resolver.shutdown()
+        get_parse_pool().shutdown()
+        controller = peek_mpv_controller()
+        if controller is not None:
+            controller.quit()
         event.accept()
 
 if __name__ == "__main__":
+    # Needed for the parse worker process in frozen (e.g. PyInstaller) Windows builds
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
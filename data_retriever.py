@@ -1,96 +1,293 @@
 # data_retriever.py
 
 import requests
+from requests.adapters import HTTPAdapter
 import re
 import html
-from urllib.parse import urlparse, parse_qs
-from datetime import datetime
-import json
-import pytz 
-from bs4 import BeautifulSoup 
-from dateutil import parser as dparser 
-from dateutil import tz as dateutil_tz 
+from urllib.parse import urlparse
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import app_cache
+from http_cache import HttpCache
+from schedule_parser import parse_schedule, load_schedule, EventTimeConverter
+from parse_pool import get_parse_pool, parse_channels_html, parse_schedule_html
 
 # --- Shared Configuration ---
 UA = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36'
 DEFAULT_BASE_URL = 'https://dlhd.dad/' 
 FALLBACK_SCHEDULE_URL = 'https://dlhd.dad/' 
+BASE_URL_CONFIG_URL = 'https://raw.githubusercontent.com/thecrewwh/dl_url/refs/heads/main/dl.xml'
+BASE_URL_CACHE_FILE = 'base_url.json'
+# A cached base URL older than this is still used, but re-checked in the background.
+BASE_URL_TTL = 6 * 3600
+
+# Names of the cached resources in the shared HTTP cache.
+CHANNELS_CACHE_NAME = 'channels'
+SCHEDULE_CACHE_NAME = 'schedule'
+
+def build_headers(baseurl, referer_override=None):
+    """Generate browser-like headers for requests against the given base URL."""
+    referer = referer_override if referer_override else f'{baseurl}/'
+    return {
+        'User-Agent': UA,
+        'Connection': 'Keep-Alive',
+        'Referer': referer,
+        'Origin': baseurl
+    }
+
+def lookup_base_url(session=None):
+    """Fetches the current base URL from the GitHub config. Returns None if unavailable."""
+    session = session or requests.Session()
+    try:
+        main_url_content = session.get(BASE_URL_CONFIG_URL, timeout=5).text
+        found_iframe_src = re.findall('src = "([^"]*)', main_url_content)
+        if found_iframe_src:
+            iframe_url = found_iframe_src[0]
+            parsed_iframe_url = urlparse(iframe_url)
+            base_url = f"{parsed_iframe_url.scheme}://{parsed_iframe_url.netloc}"
+            save_last_base_url(base_url)
+            return base_url
+    except Exception:
+        pass
+    return None
+
+def load_base_url_record():
+    """Returns {'base_url', 'checked_at'} from the last successful lookup, or None."""
+    data = app_cache.load_json(BASE_URL_CACHE_FILE, default={})
+    if isinstance(data, dict) and data.get('base_url'):
+        return data
+    return None
+
+def load_last_base_url():
+    """Returns the base URL from the last successful lookup, or None."""
+    record = load_base_url_record()
+    return record['base_url'] if record else None
+
+def save_last_base_url(base_url):
+    try:
+        app_cache.save_json(BASE_URL_CACHE_FILE, {'base_url': base_url, 'checked_at': time.time()})
+    except OSError:
+        pass
+
+_shared_retriever = None
+_shared_retriever_lock = threading.Lock()
+
+def get_shared_retriever():
+    """Returns the app-wide DataRetriever, creating it on first use."""
+    global _shared_retriever
+    with _shared_retriever_lock:
+        if _shared_retriever is None:
+            _shared_retriever = DataRetriever()
+        return _shared_retriever
 
 class DataRetriever:
     """
     Handles fetching and parsing of both Live Channels and Scheduled Events data.
+    Pass `baseurl` to skip the base-URL lookup. Meant to be long-lived (see
+    get_shared_retriever) so its pooled session keeps connections warm.
     """
-    def __init__(self):
+    def __init__(self, baseurl=None):
+        self.http_cache = HttpCache()
+        # Outcome of the last fetch per resource: "fresh", "unchanged" or "not_modified"
+        self.last_fetch_status = {}
+        # Time zones and per-(date, time) conversions are reused across refreshes
+        self.time_converter = EventTimeConverter()
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': UA, 'Connection': 'Keep-Alive'})
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._lock = threading.Lock()
+        self._revalidation = None
+        self.base_url_checked_at = None
         self.baseurl = DEFAULT_BASE_URL
-        self._initialize_base_url()
+        if baseurl:
+            self.baseurl = baseurl
+            self.base_url_checked_at = time.time()
+        else:
+            self._initialize_base_url()
         self.schedule_url = f'{self.baseurl}/' if urlparse(self.baseurl).netloc else FALLBACK_SCHEDULE_URL
 
     def _initialize_base_url(self):
-        """Fetches the current base URL from GitHub config or uses fallback."""
+        """
+        Uses the cached base URL if there is one (re-checking it in the background
+        once it is older than BASE_URL_TTL); otherwise fetches it from GitHub config.
+        If that lookup fails, the last good base URL is kept before DEFAULT_BASE_URL.
+        """
+        record = load_base_url_record()
+        if record:
+            self.baseurl = record['base_url']
+            self.base_url_checked_at = record.get('checked_at', 0)
+            if self.base_url_is_stale():
+                self.revalidate_base_url()
+            return
+
+        base_url = lookup_base_url(self.session)
+        if base_url:
+            self.baseurl = base_url
+            self.base_url_checked_at = time.time()
+
+    def _set_base_url(self, base_url):
+        self.baseurl = base_url
+        self.schedule_url = f'{self.baseurl}/' if urlparse(self.baseurl).netloc else FALLBACK_SCHEDULE_URL
+        self.base_url_checked_at = time.time()
+
+    def base_url_is_stale(self):
+        """True if the base URL has never been confirmed or is older than BASE_URL_TTL."""
+        return self.base_url_checked_at is None or time.time() - self.base_url_checked_at > BASE_URL_TTL
+
+    def revalidate_base_url(self):
+        """
+        Looks up the base URL on a background thread and returns a Future of the
+        lookup result (None on failure, in which case the current base URL is kept).
+        Concurrent calls share one lookup.
+        """
+        with self._lock:
+            if self._revalidation is not None and not self._revalidation.done():
+                return self._revalidation
+            future = Future()
+            self._revalidation = future
+
+        def _run():
+            base_url = lookup_base_url(self.session)
+            if base_url:
+                self._set_base_url(base_url)
+            future.set_result(base_url)
+
+        threading.Thread(target=_run, name="base-url-revalidate", daemon=True).start()
+        return future
+
+    def load_all(self, on_channels, on_events, on_error):
+        """
+        Fetches channels and events concurrently, calling on_channels(list) and
+        on_events(list) as soon as each is ready and on_error(exception) per failure.
+
+        If the base URL is due for re-checking, the lookup runs in parallel with
+        fetches against the current (last known) base URL, and their results
+        are delivered as soon as they arrive without waiting for it. Only if the
+        lookup finds a new base are both pages fetched (and delivered) again
+        from there; errors from the old base are held back until the lookup says
+        whether they still matter. Wall-clock time is roughly
+        max(channels, events) instead of lookup + channels + events.
+        """
+        with self._lock:
+            revalidation = self._revalidation if self._revalidation and not self._revalidation.done() else None
+        if revalidation is None and self.base_url_is_stale():
+            revalidation = self.revalidate_base_url()
+
+        speculative_base = self.baseurl
+        pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="data-load")
         try:
-            main_url_content = self.session.get(
-                'https://raw.githubusercontent.com/thecrewwh/dl_url/refs/heads/main/dl.xml',
-                timeout=5
-            ).text
-            found_iframe_src = re.findall('src = "([^"]*)', main_url_content)
-            if found_iframe_src:
-                iframe_url = found_iframe_src[0]
-                parsed_iframe_url = urlparse(iframe_url)
-                self.baseurl = f"{parsed_iframe_url.scheme}://{parsed_iframe_url.netloc}"
-            else:
-                 pass
-
-        except Exception:
-            pass 
+            callbacks = {
+                pool.submit(self.extract_all_streams): on_channels,
+                pool.submit(self.fetch_and_extract_events): on_events,
+            }
+            pending = set(callbacks)
+            speculative = set(callbacks)
+            moved = False
+            held_errors = []
+            if revalidation is not None:
+                pending.add(revalidation)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                # The lookup's verdict first, so errors in the same batch are judged by it
+                for future in sorted(done, key=lambda f: f is not revalidation):
+                    if future is revalidation:
+                        revalidation = None
+                        if self.baseurl != speculative_base:
+                            # The old base's results may be stale (or its errors moot): fetch again
+                            moved = True
+                            held_errors = []
+                            pending -= speculative
+                            for fetch, callback in ((self.extract_all_streams, on_channels),
+                                                    (self.fetch_and_extract_events, on_events)):
+                                refetch = pool.submit(fetch)
+                                callbacks[refetch] = callback
+                                pending.add(refetch)
+                        continue
+                    if moved and future in speculative:
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if revalidation is not None:
+                            held_errors.append(e)
+                        else:
+                            on_error(e)
+                        continue
+                    callbacks[future](result)
+            for e in held_errors:
+                on_error(e)
+        finally:
+            # Don't wait for discarded speculative fetches
+            pool.shutdown(wait=False)
 
 
     def get_headers(self, referer_override=None):
         """Generate headers for requests."""
-        referer = referer_override if referer_override else f'{self.baseurl}/'
-        return {
-            'User-Agent': UA,
-            'Connection': 'Keep-Alive',
-            'Referer': referer,
-            'Origin': self.baseurl
-        }
+        return build_headers(self.baseurl, referer_override)
+
+    # --- Cached Results (no network) ---
+    @staticmethod
+    def load_cached_channels():
+        """Returns the channel list from the last successful fetch, or None."""
+        entry = HttpCache().load(CHANNELS_CACHE_NAME)
+        return entry['parsed'] if entry else None
+
+    @staticmethod
+    def load_cached_events():
+        """Returns the Schedule from the last successful fetch, or None."""
+        entry = HttpCache().load(SCHEDULE_CACHE_NAME)
+        return load_schedule(entry['parsed']) if entry else None
 
     # --- Channels Extraction Logic (Updated for 247.txt structure) ---
+    @staticmethod
+    def parse_channels(resp):
+        """Parses stream IDs and names out of the 24-7-channels page HTML."""
+        # Regex updated to find channel ID from watch.php link and name from data-title
+        channel_items = re.findall(
+            r'href="/watch\.php\?id=(\d+)"[^>]*data-title="([^"]+)"',
+            resp,
+            re.IGNORECASE | re.DOTALL
+        )
+
+        results = []
+        seen_ids = set()
+        for channel_id_str, name in channel_items:
+            try:
+                channel_id = int(channel_id_str)
+                if channel_id in seen_ids:
+                    continue 
+
+                clean_name = re.sub(r'\s+', ' ', html.unescape(name.strip())).strip()
+
+                results.append({'DLChNo': channel_id, 'DLChName': clean_name})
+                seen_ids.add(channel_id)
+
+            except ValueError:
+                continue
+            except Exception:
+                 continue
+
+        results.sort(key=lambda x: x['DLChName'])
+        return results
+
     def extract_all_streams(self):
         """Extracts all streams' IDs and names from the 24-7-channels page."""
         url = f'{self.baseurl}/24-7-channels.php'
         headers = self.get_headers()
 
         try:
-            resp = self.session.get(url, headers=headers, timeout=10).text
-
-            # Regex updated to find channel ID from watch.php link and name from data-title
-            channel_items = re.findall(
-                r'href="/watch\.php\?id=(\d+)"[^>]*data-title="([^"]+)"',
-                resp,
-                re.IGNORECASE | re.DOTALL
+            # Parsing runs in the parse pool so it doesn't hold this process's GIL
+            results, status = self.http_cache.fetch(
+                self.session, CHANNELS_CACHE_NAME, url,
+                lambda page: get_parse_pool().run(parse_channels_html, page),
+                headers=headers, timeout=10, raise_for_status=False
             )
-
-            results = []
-            seen_ids = set()
-            for channel_id_str, name in channel_items:
-                try:
-                    channel_id = int(channel_id_str)
-                    if channel_id in seen_ids:
-                        continue 
-
-                    clean_name = re.sub(r'\s+', ' ', html.unescape(name.strip())).strip()
-
-                    results.append({'DLChNo': channel_id, 'DLChName': clean_name})
-                    seen_ids.add(channel_id)
-
-                except ValueError:
-                    continue
-                except Exception:
-                     continue
-
-            results.sort(key=lambda x: x['DLChName'])
+            self.last_fetch_status[CHANNELS_CACHE_NAME] = status
             return results
 
         except requests.exceptions.RequestException as e:
@@ -100,134 +297,24 @@ class DataRetriever:
 
     # --- Events Extraction Logic (Adapted from whatson.py/schedule HTML) ---
     
-    @staticmethod
-    def _get_local_time(aware_dt):
-        """Converts an aware datetime object (in Europe/London) to a local time string."""
-        if not isinstance(aware_dt, datetime) or aware_dt.tzinfo is None:
-             return "N/A Time"
-        try:
-            local_tz = dateutil_tz.tzlocal()
-            local_dt = aware_dt.astimezone(local_tz)
-            # Format as HH:MM AM/PM, removing leading zero from hour if present
-            return local_dt.strftime('%I:%M %p').lstrip('0')
-        except Exception:
-            return "N/A Time"
-
-    @staticmethod
-    def _get_schedule_date(soup):
-        """Parses the date from the <div class="schedule__dayTitle"> element."""
-        tz_london = pytz.timezone("Europe/London")
-        try:
-            title_element = soup.find('div', class_='schedule__dayTitle')
-            if not title_element:
-                raise ValueError("Could not find 'schedule__dayTitle' element")
-
-            date_part = title_element.get_text(strip=True).split(" - ")[0].strip()
-            # Use dateutil parser
-            parsed_date = dparser.parse(date_part, fuzzy=True).date()
-            return parsed_date
-        except Exception:
-            # Fallback to current date in London timezone
-            return datetime.now(tz=tz_london).date()
-
-
     def fetch_and_extract_events(self):
-        """Fetches the HTML schedule and processes it into event rows using BeautifulSoup."""
+        """Fetches the HTML schedule (conditionally) and returns it as an event_model.Schedule."""
         headers = self.get_headers(referer_override=self.schedule_url) 
 
         try:
-            response = self.session.get(self.schedule_url, headers=headers, timeout=15)
-            response.raise_for_status()
+            # The parse pool returns the compact Schedule.to_dict() form, which is
+            # also what gets cached; it is turned into a Schedule here either way
+            schedule_data, status = self.http_cache.fetch(
+                self.session, SCHEDULE_CACHE_NAME, self.schedule_url,
+                lambda page: get_parse_pool().run(parse_schedule_html, page),
+                headers=headers, timeout=15
+            )
         except requests.exceptions.RequestException as e:
             raise ConnectionError(f"Error fetching HTML event data from {self.schedule_url}: {e}")
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        schedule_date = self._get_schedule_date(soup) 
-        tz_london = pytz.timezone("Europe/London")
-
-        event_rows = []
-
-        category_blocks = soup.find_all('div', class_='schedule__category')
-
-        for category_block in category_blocks:
-            category_header = category_block.find('div', class_='schedule__catHeader')
-            category_meta = category_header.find('div', class_='card__meta') if category_header else None
-            if not category_meta:
-                continue
-
-            category_name = html.unescape(category_meta.get_text(strip=True))
-
-            # Skip TV Show categories
-            if "tv show" in category_name.lower():
-                continue
+        self.last_fetch_status[SCHEDULE_CACHE_NAME] = status
+        return load_schedule(schedule_data, self.time_converter)
 
-            event_blocks = category_block.find_all('div', class_='schedule__event')
-            for event_block in event_blocks:
-                time_str_elem = event_block.find('span', class_='schedule__time')
-                event_title_elem = event_block.find('span', class_='schedule__eventTitle')
-
-                if not time_str_elem or not event_title_elem:
-                    continue
-
-                time_utc_str = time_str_elem.get_text(strip=True) # e.g., "15:57" (UK time)
-                event_name = html.unescape(event_title_elem.get_text(strip=True))
-
-                try:
-                    # Parse time and combine with the schedule date
-                    event_time = dparser.parse(time_utc_str).time()
-                    naive_dt = datetime.combine(schedule_date, event_time)
-                    # Localize to London time zone
-                    aware_dt_london = tz_london.localize(naive_dt)
-                    time_local_str = self._get_local_time(aware_dt_london)
-                except Exception:
-                    continue
-
-                # Extract channels with IDs
-                channels_data = []
-                channels_container = event_block.find('div', class_='schedule__channels')
-                if channels_container:
-                    channel_links = channels_container.find_all('a')
-                    for link in channel_links:
-                        channel_name = html.unescape(link.get_text(strip=True))
-                        href = link.get('href')
-                        channel_id = 'N/A'
-                        if href and 'watch.php?id=' in href:
-                             try:
-                                 # Extract ID from href="/watch.php?id=116"
-                                 parsed_link = urlparse(href)
-                                 query_params = parse_qs(parsed_link.query)
-                                 id_list = query_params.get('id', [])
-                                 if id_list:
-                                     channel_id = int(id_list[0])
-                             except (ValueError, IndexError):
-                                 channel_id = 'N/A'
-                        if channel_id != 'N/A':
-                             channels_data.append({'name': channel_name, 'id': channel_id})
-
-
-                date_only_str = schedule_date.strftime('%Y-%m-%d')
-
-                # Create event rows, one per channel
-                if not channels_data:
-                    event_rows.append({
-                        'Date': date_only_str,
-                        'Time_UTC': time_utc_str,
-                        'Time_Local': time_local_str,
-                        'Category': category_name,
-                        'Event': event_name,
-                        'Channel_Name': 'NO CHANNEL LISTED',
-                        'Channel_ID': 'N/A'
-                    })
-                else:
-                    for channel in channels_data:
-                        event_rows.append({
-                            'Date': date_only_str,
-                            'Time_UTC': time_utc_str,
-                            'Time_Local': time_local_str,
-                            'Category': category_name,
-                            'Event': event_name,
-                            'Channel_Name': channel['name'],
-                            'Channel_ID': channel['id']
-                        })
-
-        return event_rows
\ No newline at end of file
+    def parse_events(self, page_html):
+        """Processes the HTML schedule into a Schedule (see schedule_parser for the backends)."""
+        return parse_schedule(page_html, converter=self.time_converter)
\ No newline at end of file
@@ -0,0 +1,191 @@
+# event_model.py
+
+import sys
+from datetime import datetime
+
+# Display text used for events that don't list any channel.
+NO_CHANNEL_NAME = 'NO CHANNEL LISTED'
+
+class Channel:
+    """A channel as linked from the schedule. Shared by every event that lists it."""
+    __slots__ = ("id", "name")
+
+    def __init__(self, channel_id, name):
+        self.id = channel_id
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, Channel) and self.id == other.id and self.name == other.name
+
+    def __hash__(self):
+        return hash((self.id, self.name))
+
+    def __repr__(self):
+        return f"Channel({self.id!r}, {self.name!r})"
+
+class Event:
+    """
+    One scheduled event with references to the channels showing it. Strings
+    repeated across events (category, date, times) are interned, and
+    sort_key (category, start time) is computed once.
+    """
+    __slots__ = ("category", "title", "date", "time_utc", "time_local", "start_utc", "channels", "sort_key")
+
+    def __init__(self, category, title, date, time_utc, time_local, start_utc, channels=()):
+        self.category = category
+        self.title = title
+        self.date = date
+        self.time_utc = time_utc
+        self.time_local = time_local
+        self.start_utc = start_utc
+        self.channels = tuple(channels)
+        self.sort_key = (category, start_utc)
+
+    def _fields(self):
+        return (self.category, self.title, self.date, self.time_utc, self.time_local,
+                self.start_utc, self.channels)
+
+    def __eq__(self, other):
+        return isinstance(other, Event) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return f"Event({self.category!r}, {self.title!r}, {self.time_utc!r}, {len(self.channels)} channels)"
+
+class Schedule:
+    """
+    Normalized schedule: a list of Events plus the Channel objects they share.
+    Iterate it (or use playable()) instead of building a dict per (event, channel);
+    to_rows() still produces the old row dicts for anything that wants them.
+    """
+    def __init__(self):
+        self.events = []
+        self._channels = {}
+        self._playable = None
+
+    @staticmethod
+    def intern(value):
+        """Returns the shared copy of a repeated string."""
+        return sys.intern(value) if type(value) is str else value
+
+    def channel(self, channel_id, name):
+        """Returns the shared Channel for (id, name), creating it on first use."""
+        key = (channel_id, name)
+        channel = self._channels.get(key)
+        if channel is None:
+            channel = self._channels[key] = Channel(channel_id, self.intern(name))
+        return channel
+
+    def add_event(self, category, title, date, time_utc, time_local, start_utc, channels=()):
+        """Adds an event; channels is an iterable of (name, id) pairs."""
+        event = Event(
+            self.intern(category), title, self.intern(date), self.intern(time_utc),
+            self.intern(time_local), start_utc,
+            [self.channel(channel_id, name) for name, channel_id in channels],
+        )
+        self.events.append(event)
+        self._playable = None
+        return event
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __len__(self):
+        return len(self.events)
+
+    def __eq__(self, other):
+        return isinstance(other, Schedule) and self.events == other.events
+
+    @property
+    def channels(self):
+        return list(self._channels.values())
+
+    @property
+    def categories(self):
+        return sorted({event.category for event in self.events})
+
+    def row_count(self):
+        """Number of rows to_rows() would produce (one per event x channel)."""
+        return sum(len(event.channels) or 1 for event in self.events)
+
+    def playable(self):
+        """(event, channel) pairs for every listed channel, sorted by category then start time."""
+        if self._playable is None:
+            pairs = [(event, channel) for event in self.events for channel in event.channels]
+            pairs.sort(key=lambda pair: pair[0].sort_key)
+            self._playable = pairs
+        return self._playable
+
+    # --- Row (list-of-dicts) compatibility ---
+
+    def to_rows(self):
+        """The schedule as one dict per (event, channel), as returned before this model existed."""
+        rows = []
+        for event in self.events:
+            channels = event.channels or (None,)
+            for channel in channels:
+                rows.append({
+                    'Date': event.date,
+                    'Time_UTC': event.time_utc,
+                    'Time_Local': event.time_local,
+                    'Category': event.category,
+                    'Event': event.title,
+                    'Channel_Name': channel.name if channel else NO_CHANNEL_NAME,
+                    'Channel_ID': channel.id if channel else 'N/A',
+                    'Start_UTC': event.start_utc
+                })
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Rebuilds a Schedule from row dicts, grouping consecutive rows of the same event."""
+        schedule = cls()
+        current_key = None
+        pending = []
+
+        def flush():
+            if current_key is not None:
+                date, time_utc, category, title, time_local, start_utc = current_key
+                schedule.add_event(category, title, date, time_utc, time_local, start_utc, pending)
+
+        for row in rows:
+            key = (row['Date'], row['Time_UTC'], row['Category'], row['Event'],
+                   row['Time_Local'], row.get('Start_UTC'))
+            has_channel = row.get('Channel_ID', 'N/A') != 'N/A'
+            if key != current_key or not has_channel or not pending:
+                flush()
+                current_key, pending = key, []
+            if has_channel:
+                pending.append((row['Channel_Name'], row['Channel_ID']))
+            else:
+                flush()
+                current_key = None
+        flush()
+        return schedule
+
+    # --- Compact JSON form for the disk cache ---
+
+    def to_dict(self):
+        channels = self.channels
+        index = {channel: i for i, channel in enumerate(channels)}
+        return {
+            'channels': [[channel.id, channel.name] for channel in channels],
+            'events': [
+                [event.category, event.title, event.date, event.time_utc, event.time_local,
+                 event.start_utc.isoformat() if event.start_utc else None,
+                 [index[channel] for channel in event.channels]]
+                for event in self.events
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        schedule = cls()
+        channels = [(name, channel_id) for channel_id, name in data.get('channels', [])]
+        for category, title, date, time_utc, time_local, start_iso, channel_indexes in data.get('events', []):
+            start_utc = datetime.fromisoformat(start_iso) if start_iso else None
+            schedule.add_event(category, title, date, time_utc, time_local, start_utc,
+                               [channels[i] for i in channel_indexes])
+        return schedule
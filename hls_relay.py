@@ -0,0 +1,812 @@
+# hls_relay.py (LOCAL HLS RELAY: FETCH ONCE, SERVE MANY PLAYERS)
+
+import re
+import sys
+import math
+import time
+import atexit
+import socket
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from stream_probe import race_probes
+
+# --- Configuration ---
+RELAY_HOST = "127.0.0.1"    # "0.0.0.0" to serve other devices on the LAN
+RELAY_PORT = 8765           # falls back to a free port if taken
+# Channel ids players may open as /{id}/index.m3u8 without the app relaying them
+# first; each one costs a full resolve. Channels the app relayed can always be reopened.
+RELAY_AUTO_RESOLVE = ()
+# A channel with no registered players and no requests for this long is dropped.
+RELAY_IDLE_TIMEOUT = 300
+SEGMENT_CACHE_BYTES = 64 * 1024 * 1024
+# Upstream playlists are refetched at most every this fraction of the target duration,
+# however many players are polling them.
+PLAYLIST_REFRESH_FRACTION = 0.5
+MIN_PLAYLIST_REFRESH = 0.5
+UPSTREAM_TIMEOUT = 10
+# URL tokens remembered per channel (a live playlist only lists a handful at a time).
+MAX_TOKENS = 4096
+# Segments listed in the local playlist (at least as many as upstream lists).
+OUTPUT_WINDOW_SEGMENTS = 6
+# Failover: after this many failed segment fetches in a row, or when the upstream
+# playlist hasn't grown for this many target durations, switch hosts.
+SEGMENT_ERRORS_BEFORE_FAILOVER = 2
+STALL_TARGET_DURATIONS = 2
+FAILOVER_PROBE_TIMEOUT = 3
+# A host that failed is not switched back to for this long.
+FAILED_HOST_COOLDOWN = 60
+# If sequence numbers can't be matched up after a switch, start this far from the live edge.
+LIVE_EDGE_SEGMENTS = 3
+# A same-host sequence drop larger than this is treated as a restarted stream.
+SEQUENCE_RESET_SLACK = 10
+# ---------------------
+
+PLAYLIST_CONTENT_TYPE = "application/vnd.apple.mpegurl"
+_URI_ATTR_RE = re.compile(r'URI="([^"]+)"')
+
+class RelayError(Exception):
+    """Upstream fetch failed; `status` is the upstream HTTP status, or None if unreachable."""
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers share its result."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = func()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+class SegmentCache:
+    """Thread-safe LRU of segment bodies bounded by total size in bytes."""
+    def __init__(self, max_bytes=SEGMENT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, data, content_type):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._entries[key] = (data, content_type)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (old, _) = self._entries.popitem(last=False)
+                self.size -= len(old)
+
+def url_token(url):
+    """Stable short name for an upstream URL, so every player asks for it by the same path."""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+def _extension(url):
+    path = urlsplit(url).path
+    name = path.rsplit("/", 1)[-1]
+    return name[name.rfind("."):] if "." in name else ""
+
+class MediaPlaylist:
+    """The parts of an upstream media playlist the relay needs."""
+    __slots__ = ("version", "target_duration", "media_sequence", "segments", "endlist")
+
+    def __init__(self):
+        self.version = 3
+        self.target_duration = None
+        self.media_sequence = 0
+        # (upstream sequence, duration, absolute url, tag lines, discontinuity)
+        self.segments = []
+        self.endlist = False
+
+def _attribute(line, name):
+    match = re.search(rf'{name}=("[^"]*"|[^,]*)', line)
+    return match.group(1).strip('"') if match else None
+
+def best_variant(text, base_url):
+    """Absolute URL of the highest-bandwidth variant of a master playlist, or None."""
+    best = None
+    bandwidth = None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("#EXT-X-STREAM-INF"):
+            try:
+                bandwidth = int(_attribute(line, "BANDWIDTH") or 0)
+            except ValueError:
+                bandwidth = 0
+        elif line and not line.startswith("#") and bandwidth is not None:
+            if best is None or bandwidth > best[0]:
+                best = (bandwidth, urljoin(base_url, line))
+            bandwidth = None
+    return best[1] if best else None
+
+def parse_media_playlist(text, base_url, rewrite_uri=None):
+    """
+    Parses a media playlist. Segment-level tags are kept verbatim, except that
+    URI="..." attributes (keys, init sections) are passed through rewrite_uri.
+    """
+    playlist = MediaPlaylist()
+    tags = []
+    duration = None
+    discontinuity = False
+    sequence = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("#EXT-X-VERSION:"):
+            playlist.version = max(3, int(line.split(":", 1)[1] or 3))
+        elif line.startswith("#EXT-X-TARGETDURATION:"):
+            playlist.target_duration = float(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-MEDIA-SEQUENCE:"):
+            playlist.media_sequence = int(line.split(":", 1)[1])
+        elif line.startswith("#EXT-X-ENDLIST"):
+            playlist.endlist = True
+        elif line.startswith("#EXTINF:"):
+            duration = float(line.split(":", 1)[1].split(",", 1)[0])
+        elif line == "#EXT-X-DISCONTINUITY":
+            discontinuity = True
+        elif line.startswith(("#EXT-X-KEY", "#EXT-X-MAP", "#EXT-X-PROGRAM-DATE-TIME", "#EXT-X-BYTERANGE")):
+            if rewrite_uri is not None and 'URI="' in line:
+                line = _URI_ATTR_RE.sub(lambda m: f'URI="{rewrite_uri(urljoin(base_url, m.group(1)))}"', line)
+            tags.append(line)
+        elif not line.startswith("#"):
+            sequence = playlist.media_sequence if sequence is None else sequence + 1
+            playlist.segments.append(
+                (sequence, duration or 0.0, urljoin(base_url, line), tags, discontinuity)
+            )
+            tags, duration, discontinuity = [], None, False
+    if playlist.target_duration is None:
+        playlist.target_duration = max((s[1] for s in playlist.segments), default=2.0)
+    return playlist
+
+class _OutputSegment:
+    __slots__ = ("sequence", "duration", "path", "tags", "discontinuity")
+
+    def __init__(self, sequence, duration, path, tags, discontinuity):
+        self.sequence = sequence
+        self.duration = duration
+        self.path = path
+        self.tags = tags
+        self.discontinuity = discontinuity
+
+class RelayChannel:
+    """
+    One upstream stream served under /{name}/. The relay keeps its own output
+    playlist, refetching the upstream one at most once per refresh interval
+    and appending new segments (fetched once each, shared through the relay's
+    SegmentCache).
+
+    If the upstream errors or stalls, the channel fails over to the next
+    healthy URL in `candidates` (other stream servers for the same channel):
+    players keep reading the same local playlist, and the new host's segments
+    are appended after the last one relayed when media sequence numbers line
+    up, or from its live edge behind a discontinuity when they don't.
+
+    A player that needs to know when it is being fed registers with
+    add_client() and reads the playlist under its own /{name}/p/{client}/
+    prefix; the playlist's relative segment paths keep its requests there.
+    """
+    def __init__(self, relay, name, playlist_url, headers=None, cookies=None, alternates=()):
+        self.relay = relay
+        self.name = name
+        self._clients = {}
+        self._client_ids = itertools.count(1)
+        self._last_used = time.monotonic()
+        # The last upstream failure reported to a player, for error messages
+        self.last_error = None
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self.playlist_url = None
+        self.headers = {}
+        self.candidates = []
+        self._failed_at = {}
+        self._moved = {}
+        self._media_url = None
+        self._timeline = []
+        self._next_sequence = 0
+        self._discontinuity_sequence = 0
+        self._last_upstream_sequence = None
+        self._aligning = False
+        self._target_duration = 2.0
+        self._version = 3
+        self._endlist = False
+        self._advanced_at = time.monotonic()
+        self._segment_errors = 0
+        self._rendered = None
+        self.set_upstream(playlist_url, headers, cookies, alternates)
+
+    def set_upstream(self, playlist_url, headers=None, cookies=None, alternates=()):
+        """Points the channel at a (re-)resolved upstream; players already reading it carry on."""
+        headers = dict(headers or {})
+        if cookies:
+            headers["Cookie"] = cookies
+        with self._lock:
+            self.headers = headers
+            self.candidates = list(dict.fromkeys([playlist_url, *alternates, *self.candidates]))
+            if playlist_url != self.playlist_url:
+                self._switch_locked(playlist_url)
+
+    def _switch_locked(self, playlist_url):
+        previous = self.playlist_url
+        if previous is not None:
+            self._moved[previous.rsplit("/", 1)[0]] = playlist_url.rsplit("/", 1)[0]
+            # The next upstream playlist is aligned to what was already relayed
+            self._aligning = self._last_upstream_sequence is not None
+        self.playlist_url = playlist_url
+        self._media_url = None
+        self._rendered = None
+        self._segment_errors = 0
+        self._advanced_at = time.monotonic()
+
+    def local_url(self, client=None):
+        if client is None:
+            return f"{self.relay.base_url}/{self.name}/index.m3u8"
+        return f"{self.relay.base_url}/{self.name}/p/{client}/index.m3u8"
+
+    # --- Clients ---
+
+    def add_client(self, on_first_segment=None):
+        """
+        Registers a player and returns its client id (see local_url(client)).
+        on_first_segment() is called once, from a relay thread, when the first
+        segment has been sent to that player.
+        """
+        with self._lock:
+            client = str(next(self._client_ids))
+            self._clients[client] = on_first_segment
+        return client
+
+    def remove_client(self, client):
+        with self._lock:
+            self._clients.pop(client, None)
+
+    def touch(self):
+        with self._lock:
+            self._last_used = time.monotonic()
+
+    def idle_for(self, now):
+        """Seconds since the last request, or 0 while a player is registered."""
+        with self._lock:
+            return 0 if self._clients else now - self._last_used
+
+    def segment_served(self, client):
+        with self._lock:
+            if self._clients.get(client) is None:
+                return
+            callback, self._clients[client] = self._clients[client], None
+        callback()
+
+    # --- URL rewriting ---
+
+    def _local_path(self, url):
+        with self._lock:
+            return self._local_path_locked(url)
+
+    def _local_path_locked(self, url):
+        token = url_token(url)
+        self._tokens[token] = url
+        self._tokens.move_to_end(token)
+        while len(self._tokens) > MAX_TOKENS:
+            self._tokens.popitem(last=False)
+        # Relative, so each client's requests stay under the prefix it read the playlist from
+        return f"s/{token}{_extension(url)}"
+
+    def upstream_url(self, token):
+        with self._lock:
+            return self._tokens.get(token)
+
+    # --- Fetching ---
+
+    def _fetch(self, url):
+        self.relay.count("upstream_requests")
+        try:
+            resp = self.relay.session.get(url, headers=self.headers, timeout=UPSTREAM_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            raise RelayError(f"Upstream unreachable: {url} ({e})")
+        if resp.status_code not in (200, 206):
+            raise RelayError(f"Upstream returned {resp.status_code} for {url}", resp.status_code)
+        self.relay.count("upstream_bytes", len(resp.content))
+        return resp
+
+    def _load_upstream(self):
+        """Fetches the current upstream's media playlist (following a master playlist to its best variant)."""
+        with self._lock:
+            playlist_url = self.playlist_url
+            url = self._media_url or playlist_url
+        resp = self._fetch(url)
+        base = resp.url or url
+        text = resp.text
+        if "#EXT-X-STREAM-INF" in text:
+            variant = best_variant(text, base)
+            if variant is None:
+                raise RelayError(f"Master playlist without variants: {url}")
+            with self._lock:
+                # Unless the channel failed over meanwhile
+                if self.playlist_url == playlist_url:
+                    self._media_url = variant
+            resp = self._fetch(variant)
+            base, text = resp.url or variant, resp.text
+        return parse_media_playlist(text, base, rewrite_uri=self._local_path)
+
+    def playlist(self):
+        """The channel's local media playlist text."""
+        with self._lock:
+            rendered = self._rendered
+        if rendered is not None and time.monotonic() < rendered[1]:
+            return rendered[0]
+        return self.relay.flights.do(("playlist", self.name), self._refresh)
+
+    def _refresh(self):
+        try:
+            upstream = self._load_upstream()
+        except RelayError as e:
+            if not self.failover(str(e)):
+                raise
+            upstream = self._load_upstream()
+        self._merge(upstream)
+        if self._stalled():
+            if self.failover(f"no new segments for {time.monotonic() - self._advanced_at:.1f}s"):
+                try:
+                    self._merge(self._load_upstream())
+                except RelayError as e:
+                    print(f"Relay: {e}")
+        return self._render()
+
+    def _stalled(self):
+        with self._lock:
+            return (not self._endlist and
+                    time.monotonic() - self._advanced_at > STALL_TARGET_DURATIONS * self._target_duration)
+
+    def _merge(self, upstream):
+        segments = upstream.segments
+        with self._lock:
+            last = self._last_upstream_sequence
+            discontinuity = False
+            if not segments:
+                new = []
+            elif last is None:
+                new = segments
+            else:
+                first, final = segments[0][0], segments[-1][0]
+                # Same numbering (mirrors of one origin), possibly a few segments ahead
+                related = (last - SEQUENCE_RESET_SLACK <= final and
+                           first <= last + 1 + SEQUENCE_RESET_SLACK)
+                if (self._aligning and not related) or final + SEQUENCE_RESET_SLACK < last:
+                    # Unrelated numbering or a restarted stream: join at the live edge
+                    new = segments[-LIVE_EDGE_SEGMENTS:]
+                    discontinuity = bool(self._timeline)
+                    print(f"Relay: channel {self.name} sequence numbers don't line up "
+                          f"({last} vs {first}-{final}), joining at the live edge")
+                else:
+                    # Continue right after the last segment relayed; skipped ones leave a discontinuity
+                    new = [s for s in segments if s[0] > last]
+                    discontinuity = bool(new) and new[0][0] > last + 1
+            self._aligning = False
+
+            for i, (sequence, duration, url, tags, upstream_discontinuity) in enumerate(new):
+                self._timeline.append(_OutputSegment(
+                    self._next_sequence, duration, self._local_path_locked(url), tags,
+                    upstream_discontinuity or (discontinuity and i == 0)
+                ))
+                self._next_sequence += 1
+            if new:
+                self._last_upstream_sequence = new[-1][0]
+                self._advanced_at = time.monotonic()
+
+            window = max(OUTPUT_WINDOW_SEGMENTS, len(segments))
+            while len(self._timeline) > window:
+                if self._timeline.pop(0).discontinuity:
+                    self._discontinuity_sequence += 1
+            self._target_duration = upstream.target_duration or self._target_duration
+            self._version = upstream.version
+            self._endlist = upstream.endlist
+
+    def _render(self):
+        with self._lock:
+            timeline = list(self._timeline)
+            target = max([self._target_duration] + [s.duration for s in timeline])
+            lines = [
+                "#EXTM3U",
+                f"#EXT-X-VERSION:{self._version}",
+                f"#EXT-X-TARGETDURATION:{int(math.ceil(target))}",
+                f"#EXT-X-MEDIA-SEQUENCE:{timeline[0].sequence if timeline else self._next_sequence}",
+            ]
+            if self._discontinuity_sequence:
+                lines.append(f"#EXT-X-DISCONTINUITY-SEQUENCE:{self._discontinuity_sequence}")
+            for segment in timeline:
+                if segment.discontinuity:
+                    lines.append("#EXT-X-DISCONTINUITY")
+                lines.extend(segment.tags)
+                lines.append(f"#EXTINF:{segment.duration:.3f},")
+                lines.append(segment.path)
+            if self._endlist:
+                lines.append("#EXT-X-ENDLIST")
+                ttl = 3600.0
+            else:
+                ttl = max(MIN_PLAYLIST_REFRESH, self._target_duration * PLAYLIST_REFRESH_FRACTION)
+            text = "\n".join(lines) + "\n"
+            self._rendered = (text, time.monotonic() + ttl)
+            return text
+
+    def segment(self, token):
+        """(body, content_type) of a segment, fetched upstream at most once while cached."""
+        url = self.upstream_url(token)
+        if url is None:
+            return None
+        cached = self.relay.cache.get(url)
+        if cached is not None:
+            self.relay.count("cache_hits")
+            return cached
+
+        def fetch():
+            try:
+                resp = self._fetch(url)
+            except RelayError as e:
+                resp = self._recover_segment(url, e)
+            with self._lock:
+                self._segment_errors = 0
+            entry = (resp.content, resp.headers.get("Content-Type") or "video/mp2t")
+            self.relay.cache.put(url, *entry)
+            return entry
+        return self.relay.flights.do(("segment", url), fetch)
+
+    def _recover_segment(self, url, error):
+        """After a failed segment fetch: maybe fail over, then try the segment on the current host."""
+        with self._lock:
+            self._segment_errors += 1
+            errors = self._segment_errors
+        if errors >= SEGMENT_ERRORS_BEFORE_FAILOVER:
+            self.failover(f"{errors} segment errors in a row ({error})")
+        with self._lock:
+            moved = [(old, new) for old, new in self._moved.items() if url.startswith(old + "/")]
+        for old, new in moved:
+            try:
+                return self._fetch(new + url[len(old):])
+            except RelayError:
+                continue
+        raise error
+
+    # --- Failover ---
+
+    def failover(self, reason):
+        """Switches to the best-responding other candidate; False if none is healthy."""
+        return self.relay.flights.do(("failover", self.name), lambda: self._failover(reason))
+
+    def _failover(self, reason):
+        now = time.monotonic()
+        with self._lock:
+            current = self.playlist_url
+            self._failed_at[current] = now
+            candidates = [url for url in self.candidates if url != current and
+                          now - self._failed_at.get(url, -FAILED_HOST_COOLDOWN) >= FAILED_HOST_COOLDOWN]
+            headers = dict(self.headers)
+        print(f"Relay: channel {self.name} upstream in trouble ({reason})")
+        if not candidates:
+            print(f"Relay: no other healthy host for channel {self.name}")
+            return False
+        winner, results = race_probes(candidates, headers=headers, timeout=FAILOVER_PROBE_TIMEOUT)
+        with self._lock:
+            for index, (status, _) in results.items():
+                if status not in (200, 206):
+                    self._failed_at[candidates[index]] = now
+        if winner is None:
+            print(f"Relay: none of {len(candidates)} other hosts answered for channel {self.name}")
+            return False
+        with self._lock:
+            self._switch_locked(candidates[winner])
+        self.relay.count("failovers")
+        print(f"Relay: channel {self.name} switched to {candidates[winner]}")
+        return True
+
+class RelayRequestHandler(BaseHTTPRequestHandler):
+    server_version = "DaddyLiveRelay/1.0"
+
+    def do_GET(self):
+        relay = self.server.relay
+        parts = [part for part in self.path.split("?", 1)[0].split("/") if part]
+        channel = None
+        try:
+            if not parts:
+                return self._send(200, "text/plain; charset=utf-8", relay.describe().encode("utf-8"))
+            channel = relay.channel(parts[0])
+            if channel is None:
+                return self._send(404, "text/plain", b"Unknown channel")
+            client, rest = None, parts[1:]
+            if len(rest) >= 2 and rest[0] == "p":
+                # /{name}/p/{client}/...: a registered player's own view of the channel
+                client, rest = rest[1], rest[2:]
+            if rest == ["index.m3u8"]:
+                body = channel.playlist()
+            elif len(rest) == 2 and rest[0] == "s":
+                entry = channel.segment(rest[1].split(".", 1)[0])
+                if entry is None:
+                    return self._send(404, "text/plain", b"Unknown or expired segment")
+                if self._send(200, entry[1], entry[0]) and client is not None:
+                    channel.segment_served(client)
+                return
+            else:
+                return self._send(404, "text/plain", b"Not found")
+            return self._send(200, PLAYLIST_CONTENT_TYPE, body.encode("utf-8"), cache=False)
+        except RelayError as e:
+            print(f"Relay: {e}")
+            if channel is not None:
+                channel.last_error = str(e)
+            return self._send(502, "text/plain", str(e).encode("utf-8"))
+
+    def _send(self, status, content_type, body, cache=True):
+        """Sends a response; False if the player hung up first."""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if not cache:
+                self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+            self.server.relay.count("served_requests")
+            self.server.relay.count("served_bytes", len(body))
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            # Players routinely drop connections when seeking or closing
+            return False
+
+    def log_message(self, format, *args):
+        pass
+
+class HLSRelay:
+    """
+    Local HTTP server relaying HLS streams: each upstream playlist and segment
+    is fetched once, and any number of players (mpv, VLC, other LAN clients)
+    read the rewritten playlist at http://host:port/{name}/index.m3u8.
+
+    Channels are registered with add_channel() (resolved with `resolver`, by
+    default stream_resolver.resolve) or add_source() for a plain playlist URL.
+    Channel ids in `auto_resolve`, and ones added with add_channel() before,
+    are resolved when a client requests them; other names are 404s. Channels
+    idle for `idle_timeout` seconds (see RelayChannel.idle_for) are dropped.
+    """
+    def __init__(self, host=RELAY_HOST, port=RELAY_PORT, resolver=None, cache_bytes=SEGMENT_CACHE_BYTES,
+                 auto_resolve=RELAY_AUTO_RESOLVE, idle_timeout=RELAY_IDLE_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.resolver = resolver
+        self.idle_timeout = idle_timeout
+        # Channel names clients may have resolved on demand
+        self._resolvable = {str(channel_id) for channel_id in auto_resolve}
+        self._swept_at = time.monotonic()
+        self.cache = SegmentCache(cache_bytes)
+        self.flights = SingleFlight()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._channels = {}
+        self._stats = dict.fromkeys(
+            ("upstream_requests", "upstream_bytes", "served_requests", "served_bytes", "cache_hits", "failovers"), 0
+        )
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        return f"http://{host}:{self.port}"
+
+    def start(self):
+        """Starts serving in a background thread; returns the base URL."""
+        if self._server is not None:
+            return self.base_url
+        try:
+            server = ThreadingHTTPServer((self.host, self.port), RelayRequestHandler)
+        except OSError:
+            server = ThreadingHTTPServer((self.host, 0), RelayRequestHandler)
+        server.daemon_threads = True
+        server.relay = self
+        self.port = server.server_address[1]
+        self._server = server
+        self._thread = threading.Thread(target=server.serve_forever, name="hls-relay", daemon=True)
+        self._thread.start()
+        print(f"HLS relay listening on {self.base_url}")
+        return self.base_url
+
+    def stop(self):
+        server, self._server = self._server, None
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    def count(self, stat, amount=1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def add_source(self, name, playlist_url, headers=None, cookies=None, alternates=()):
+        """
+        Relays an already known playlist URL under /{name}/; returns the local
+        URL. `alternates` are playlist URLs of the same stream on other hosts,
+        used for failover.
+        """
+        name = str(name)
+        with self._lock:
+            channel = self._channels.get(name)
+            if channel is None:
+                channel = self._channels[name] = RelayChannel(
+                    self, name, playlist_url, headers, cookies, alternates
+                )
+                return channel.local_url()
+        # Already relayed: keep the channel (and its players' tokens), just update the upstream
+        channel.set_upstream(playlist_url, headers, cookies, alternates)
+        return channel.local_url()
+
+    def add_channel(self, channel_id, resolved=None):
+        """
+        Relays a DaddyLive channel; returns the local playlist URL. `resolved` is
+        an already resolved (stream_url, headers, cookies); otherwise the channel
+        is resolved now, once, however many callers ask for it at the same time.
+        """
+        name = str(channel_id)
+        with self._lock:
+            self._resolvable.add(name)
+        existing = self.channel(name, resolve=False)
+        if existing is not None and resolved is None:
+            return existing.local_url()
+        if resolved is None:
+            resolved = self.flights.do(("resolve", name), lambda: self._resolve(name))
+        stream_url, headers, cookies = resolved
+        from stream_resolver import failover_urls
+        return self.add_source(name, stream_url, headers, cookies, alternates=failover_urls(stream_url))
+
+    def _resolve(self, name):
+        resolver = self.resolver
+        if resolver is None:
+            from stream_resolver import resolve as resolver
+        return resolver(int(name))
+
+    def channel(self, name, resolve=True):
+        """The RelayChannel for `name`, resolving allowed channel ids (see auto_resolve) on first use."""
+        self._evict_idle()
+        with self._lock:
+            channel = self._channels.get(name)
+            resolvable = name in self._resolvable
+        if channel is None and resolve and resolvable:
+            try:
+                self.add_channel(name)
+            except Exception as e:
+                raise RelayError(f"Could not resolve channel {name}: {e}")
+            with self._lock:
+                channel = self._channels.get(name)
+        if channel is not None:
+            channel.touch()
+        return channel
+
+    def _evict_idle(self):
+        """Drops channels idle for idle_timeout; runs at most a few times per timeout."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._swept_at < self.idle_timeout / 4:
+                return
+            self._swept_at = now
+            # Channel locks are only ever taken inside the relay's, never the other way round
+            idle = [name for name, channel in self._channels.items() if channel.idle_for(now) >= self.idle_timeout]
+            for name in idle:
+                del self._channels[name]
+        for name in idle:
+            print(f"Relay: dropped channel {name} after {self.idle_timeout}s without players")
+
+    def remove_channel(self, name):
+        with self._lock:
+            self._resolvable.discard(str(name))
+            return self._channels.pop(str(name), None) is not None
+
+    def describe(self):
+        with self._lock:
+            names = sorted(self._channels)
+        lines = [f"{self.base_url}/{name}/index.m3u8" for name in names]
+        stats = self.stats()
+        lines.append(
+            f"upstream: {stats['upstream_requests']} requests, {stats['upstream_bytes'] / 1048576:.1f} MiB; "
+            f"served: {stats['served_requests']} requests, {stats['served_bytes'] / 1048576:.1f} MiB; "
+            f"segment cache: {self.cache.size / 1048576:.1f} MiB, {stats['cache_hits']} hits; "
+            f"{stats['failovers']} host failovers"
+        )
+        return "\n".join(lines) + "\n"
+
+_relay = None
+_relay_lock = threading.Lock()
+
+def get_relay(resolver=None):
+    """Returns the app-wide relay, starting it on first use."""
+    global _relay
+    with _relay_lock:
+        if _relay is None:
+            _relay = HLSRelay(resolver=resolver)
+            _relay.start()
+            atexit.register(_relay.stop)
+        return _relay
+
+def lan_address():
+    """Best guess at this machine's LAN address, for showing URLs to other devices."""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("10.255.255.255", 1))
+            return s.getsockname()[0]
+    except OSError:
+        return "127.0.0.1"
+
+if __name__ == "__main__":
+    # Usage: python hls_relay.py [--port=N] [--lan] [--upstream=URL [--fallback=URL ...]] [channel_id ...]
+    host, port = RELAY_HOST, RELAY_PORT
+    upstreams, channel_ids = [], []
+    for arg in sys.argv[1:]:
+        if arg == "--lan":
+            host = "0.0.0.0"
+        elif arg.startswith("--port="):
+            port = int(arg.split("=", 1)[1])
+        elif arg.startswith("--upstream="):
+            upstreams.append([arg.split("=", 1)[1]])
+        elif arg.startswith("--fallback=") and upstreams:
+            # Same stream on another host, for failover
+            upstreams[-1].append(arg.split("=", 1)[1])
+        else:
+            try:
+                channel_ids.append(int(arg))
+            except ValueError:
+                print(f"Warning: Invalid channel ID '{arg}', ignoring it.")
+
+    relay = HLSRelay(host=host, port=port)
+    relay.start()
+    for i, (url, *fallbacks) in enumerate(upstreams, 1):
+        print(f"Relaying {url} at {relay.add_source(f'upstream{i}', url, alternates=fallbacks)}")
+    for channel_id in channel_ids:
+        print(f"Relaying channel {channel_id} at {relay.add_channel(channel_id)}")
+    if host == "0.0.0.0":
+        print(f"Other devices: http://{lan_address()}:{relay.port}/<channel id>/index.m3u8")
+    print("Channels not listed here can be opened as /<channel id>/index.m3u8 if they are in "
+          "RELAY_AUTO_RESOLVE. Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(60)
+            print(relay.describe().splitlines()[-1])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        relay.stop()
@@ -0,0 +1,137 @@
+# host_scoreboard.py
+
+import time
+import threading
+
+import app_cache
+
+# --- Configuration ---
+SCOREBOARD_FILE = "host_scores.json"
+# Weight of the newest probe in the success-rate and latency averages.
+EWMA_ALPHA = 0.3
+# Old observations fade back toward the prior with this half-life, so a host
+# that was dead yesterday is not written off forever.
+DECAY_HALF_LIFE = 6 * 3600
+PRIOR_SUCCESS = 0.5
+PRIOR_LATENCY = 1.0
+# A host we haven't probed for this long is probed alongside the leader once.
+RETRY_AFTER = 30 * 60
+# Leaders at or above this (decayed) success rate are probed alone first.
+CONFIDENT_SUCCESS = 0.8
+# How much a channel-specific history outweighs the host-wide one.
+CHANNEL_WEIGHT = 0.7
+# ---------------------
+
+def _new_stat():
+    return {"success": PRIOR_SUCCESS, "latency": None, "samples": 0,
+            "updated": 0.0, "last_failure": None}
+
+class HostScoreboard:
+    """
+    Persistent per-host and per-(channel, host) probe history used to order
+    stream-server candidates: success-rate EWMA, latency EWMA and last failure.
+    """
+    def __init__(self, filename=SCOREBOARD_FILE, clock=time.time):
+        self.filename = filename
+        self.clock = clock
+        self._lock = threading.Lock()
+        data = app_cache.load_json(filename, default={})
+        if not isinstance(data, dict):
+            data = {}
+        self._hosts = data.get("hosts", {})
+        self._channels = data.get("channels", {})
+
+    @staticmethod
+    def _channel_key(channel_id, host):
+        return f"{channel_id}|{host}"
+
+    @staticmethod
+    def _update(stat, ok, latency, now):
+        stat["success"] = EWMA_ALPHA * (1.0 if ok else 0.0) + (1 - EWMA_ALPHA) * stat["success"]
+        if ok and latency is not None:
+            previous = stat["latency"]
+            stat["latency"] = latency if previous is None else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * previous
+            )
+        if not ok:
+            stat["last_failure"] = now
+        stat["samples"] += 1
+        stat["updated"] = now
+
+    def record(self, channel_id, results):
+        """
+        Records a batch of probe results for one channel and saves the board.
+        results is a list of (host, status, latency); status None means unreachable.
+        Only unreachable hosts and server errors count against the host as a whole;
+        a 403/404 just says the channel isn't available there.
+        """
+        now = self.clock()
+        with self._lock:
+            for host, status, latency in results:
+                ok = status in (200, 206)
+                host_down = status is None or status >= 500
+                if ok or host_down:
+                    self._update(self._hosts.setdefault(host, _new_stat()), ok, latency, now)
+                key = self._channel_key(channel_id, host)
+                self._update(self._channels.setdefault(key, _new_stat()), ok, latency, now)
+            try:
+                app_cache.save_json(self.filename, {"hosts": self._hosts, "channels": self._channels})
+            except OSError:
+                pass
+
+    @staticmethod
+    def _decayed(stat, now):
+        """Success rate and latency pulled back toward the prior according to age."""
+        if stat is None or not stat["samples"]:
+            return PRIOR_SUCCESS, PRIOR_LATENCY
+        weight = 0.5 ** (max(0.0, now - stat["updated"]) / DECAY_HALF_LIFE)
+        success = PRIOR_SUCCESS + (stat["success"] - PRIOR_SUCCESS) * weight
+        latency = PRIOR_LATENCY if stat["latency"] is None else (
+            PRIOR_LATENCY + (stat["latency"] - PRIOR_LATENCY) * weight
+        )
+        return success, latency
+
+    def _success_and_latency(self, host, channel_id, now):
+        host_success, host_latency = self._decayed(self._hosts.get(host), now)
+        channel_stat = self._channels.get(self._channel_key(channel_id, host)) if channel_id is not None else None
+        if not channel_stat:
+            return host_success, host_latency
+        channel_success, channel_latency = self._decayed(channel_stat, now)
+        return (CHANNEL_WEIGHT * channel_success + (1 - CHANNEL_WEIGHT) * host_success,
+                CHANNEL_WEIGHT * channel_latency + (1 - CHANNEL_WEIGHT) * host_latency)
+
+    def score(self, host, channel_id=None):
+        """Higher is better: expected success discounted by latency."""
+        success, latency = self._success_and_latency(host, channel_id, self.clock())
+        return success / (1.0 + latency)
+
+    def order(self, candidates, channel_id=None):
+        """
+        Returns (ordered_candidates, first_wave). first_wave is how many leading
+        candidates should be probed straight away: just the leader when it is a
+        confident pick, plus one stale host promoted to second place for a retry.
+        Ties keep the configured candidate order.
+        """
+        now = self.clock()
+        with self._lock:
+            ranked = []
+            for index, host in enumerate(candidates):
+                success, latency = self._success_and_latency(host, channel_id, now)
+                ranked.append((-(success / (1.0 + latency)), index, host, success))
+            if not ranked:
+                return [], 0
+            ranked.sort()
+            ordered = [host for _, _, host, _ in ranked]
+
+            if ranked[0][3] < CONFIDENT_SUCCESS:
+                return ordered, len(ordered)
+
+            first_wave = 1
+            for host in ordered[1:]:
+                stat = self._hosts.get(host)
+                if stat and stat["samples"] and now - stat["updated"] >= RETRY_AFTER:
+                    ordered.remove(host)
+                    ordered.insert(1, host)
+                    first_wave = 2
+                    break
+            return ordered, first_wave
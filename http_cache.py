@@ -0,0 +1,100 @@
+# http_cache.py
+
+import time
+import hashlib
+import threading
+
+import app_cache
+
+class HttpCache:
+    """
+    On-disk cache of named HTTP resources (e.g. the channel list and schedule page).
+    Each entry keeps the raw body, its validators (ETag / Last-Modified), a hash
+    of the body and the parsed result, so unchanged pages are neither downloaded
+    in full nor parsed again.
+    """
+    def __init__(self, prefix="http_cache"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def _meta_file(self, name):
+        return f"{self.prefix}_{name}.json"
+
+    def _body_file(self, name):
+        return f"{self.prefix}_{name}.html"
+
+    def load(self, name):
+        """Returns the cached entry for `name` (including 'parsed'), or None."""
+        entry = app_cache.load_json(self._meta_file(name))
+        return entry if isinstance(entry, dict) and "parsed" in entry else None
+
+    def raw_body(self, name):
+        """Returns the cached raw body for `name`, or None."""
+        try:
+            with open(app_cache.cache_path(self._body_file(name)), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _save(self, name, entry, body=None):
+        with self._lock:
+            try:
+                if body is not None:
+                    with open(app_cache.cache_path(self._body_file(name)), "w", encoding="utf-8") as f:
+                        f.write(body)
+                app_cache.save_json(self._meta_file(name), entry)
+            except OSError:
+                pass
+
+    def fetch(self, session, name, url, parse, headers=None, timeout=10, raise_for_status=True,
+              encode=None, decode=None):
+        """
+        GETs `url` conditionally and returns (parsed, status), where status is:
+          "not_modified" - server answered 304, cached result reused
+          "unchanged"    - full body received but identical to the cached one
+          "fresh"        - body changed (or no cache) and was parsed with `parse`
+        If `parse` returns something JSON can't store, pass `encode` to turn it
+        into JSON data and `decode` to turn cached JSON data back into it.
+        Requests exceptions propagate to the caller.
+        """
+        decode = decode or (lambda cached: cached)
+        entry = self.load(name)
+        if entry and entry.get("url") != url:
+            # Base URL moved; validators from another host mean nothing here.
+            entry = None
+
+        request_headers = dict(headers or {})
+        if entry:
+            if entry.get("etag"):
+                request_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request_headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = session.get(url, headers=request_headers, timeout=timeout)
+        now = time.time()
+
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = now
+            self._save(name, entry)
+            return decode(entry["parsed"]), "not_modified"
+
+        if raise_for_status:
+            response.raise_for_status()
+
+        body = response.text
+        body_hash = hashlib.sha256(body.encode("utf-8")).hexdigest()
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+
+        if entry and entry.get("body_hash") == body_hash:
+            entry.update(validators, fetched_at=now)
+            self._save(name, entry)
+            return decode(entry["parsed"]), "unchanged"
+
+        parsed = parse(body)
+        stored = encode(parsed) if encode else parsed
+        entry = {"url": url, "body_hash": body_hash, "fetched_at": now, "parsed": stored, **validators}
+        self._save(name, entry, body)
+        return parsed, "fresh"
@@ -0,0 +1,266 @@
+# list_models.py
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractProxyModel, QModelIndex, pyqtSignal
+
+from search_index import TrigramIndex
+from search_engine import SearchEngine
+
+# data(index, RECORD_ROLE) returns the underlying record (channel dict, (event, channel) pair).
+RECORD_ROLE = Qt.ItemDataRole.UserRole
+# Shorter queries match most of the list; they only get the substring filter.
+MIN_RANKED_QUERY = 2
+
+class RecordListModel(QAbstractListModel):
+    """
+    List model backed directly by the app's records. Display strings are built
+    once per record with `display(record)`, and a TrigramIndex over them
+    answers substring search() without scanning every row.
+
+    If `documents(records)` is given (see search_engine.channel_documents /
+    event_documents), a SearchEngine also ranks fuzzy, prefix and multi-token
+    matches ahead of the plain substring ones, and the documents' keys identify
+    records across refreshes; otherwise the display text does.
+
+    set_records() replaces everything; update_records() diffs by key and only
+    inserts, removes or changes the affected rows, so views keep their
+    selection and scroll position.
+    """
+    # Emitted once a set_records()/update_records() call is complete
+    records_changed = pyqtSignal()
+
+    def __init__(self, display, documents=None, parent=None):
+        super().__init__(parent)
+        self.display = display
+        self.documents = documents
+        self.engine = SearchEngine() if documents else None
+        self._records = []
+        self._texts = []
+        self._keys = []
+        self._rows_by_key = {}
+        self._index = TrigramIndex()
+
+    def _keyed(self, records):
+        """(key, record, fields or None) per record, with keys made unique."""
+        if self.documents is not None:
+            items = self.documents(records)
+        else:
+            items = ((self.display(record), record, None) for record in records)
+        seen = set()
+        keyed = []
+        for key, record, fields in items:
+            # The same listing can appear twice; keep both rows
+            occurrence = 0
+            while (key, occurrence) in seen:
+                occurrence += 1
+            seen.add((key, occurrence))
+            keyed.append(((key, occurrence), record, fields))
+        return keyed
+
+    def _finish_update(self, keyed):
+        self._rows_by_key = {key: row for row, key in enumerate(self._keys)}
+        if self.engine is not None:
+            # Only documents that changed since the last update are re-indexed
+            self.engine.sync(keyed)
+
+    def set_records(self, records):
+        keyed = self._keyed(records)
+        self.beginResetModel()
+        self._keys = [key for key, _, _ in keyed]
+        self._records = [record for _, record, _ in keyed]
+        self._texts = [self.display(record) for record in self._records]
+        self._index = TrigramIndex()
+        for key, text in zip(self._keys, self._texts):
+            self._index.add(key, text)
+        self._finish_update(keyed)
+        self.endResetModel()
+        self.records_changed.emit()
+
+    def update_records(self, records):
+        """
+        Brings the model to `records` with the fewest row operations: rows whose
+        key disappeared are removed, new keys are inserted in place and records
+        that changed under the same key are updated. Falls back to a reset if
+        the surviving rows were reordered. Returns (inserted, removed, changed).
+        """
+        keyed = self._keyed(records)
+        new_keys = [key for key, _, _ in keyed]
+        new_positions = {key: i for i, key in enumerate(new_keys)}
+
+        survivors = [new_positions[key] for key in self._keys if key in new_positions]
+        if any(a > b for a, b in zip(survivors, survivors[1:])):
+            previous_rows = len(self._keys)
+            self.set_records([record for _, record, _ in keyed])
+            return len(keyed), previous_rows, 0
+
+        # Removals, from the bottom up in contiguous blocks
+        removed = 0
+        row = len(self._keys) - 1
+        while row >= 0:
+            if self._keys[row] in new_positions:
+                row -= 1
+                continue
+            end = row
+            while row >= 0 and self._keys[row] not in new_positions:
+                row -= 1
+            start = row + 1
+            self.beginRemoveRows(QModelIndex(), start, end)
+            for key in self._keys[start:end + 1]:
+                self._index.remove(key)
+            del self._keys[start:end + 1]
+            del self._records[start:end + 1]
+            del self._texts[start:end + 1]
+            self.endRemoveRows()
+            removed += end - start + 1
+
+        # Insertions and changes, walking both lists in order
+        inserted = changed = 0
+        row = i = 0
+        while i < len(keyed):
+            key, record, _ = keyed[i]
+            if row < len(self._keys) and self._keys[row] == key:
+                if record != self._records[row]:
+                    text = self.display(record)
+                    self._records[row] = record
+                    if text != self._texts[row]:
+                        self._texts[row] = text
+                        self._index.add(key, text)
+                    model_index = self.index(row)
+                    self.dataChanged.emit(model_index, model_index)
+                    changed += 1
+                row += 1
+                i += 1
+                continue
+            j = i
+            while j < len(keyed) and (row >= len(self._keys) or keyed[j][0] != self._keys[row]):
+                j += 1
+            block = keyed[i:j]
+            self.beginInsertRows(QModelIndex(), row, row + len(block) - 1)
+            texts = [self.display(record) for _, record, _ in block]
+            self._keys[row:row] = [key for key, _, _ in block]
+            self._records[row:row] = [record for _, record, _ in block]
+            self._texts[row:row] = texts
+            for (key, _, _), text in zip(block, texts):
+                self._index.add(key, text)
+            self.endInsertRows()
+            row += len(block)
+            inserted += len(block)
+            i = j
+
+        self._finish_update(keyed)
+        self.records_changed.emit()
+        return inserted, removed, changed
+
+    def refresh_display(self, affected=None):
+        """
+        Rebuilds the display texts, e.g. after `display` started depending on
+        outside state (such as liveness badges), and updates rows whose text
+        changed. With `affected(record)`, only rows it accepts are rebuilt.
+        Returns how many rows changed.
+        """
+        changed = 0
+        for row, (key, record) in enumerate(zip(self._keys, self._records)):
+            if affected is not None and not affected(record):
+                continue
+            text = self.display(record)
+            if text == self._texts[row]:
+                continue
+            self._texts[row] = text
+            self._index.add(key, text)
+            model_index = self.index(row)
+            self.dataChanged.emit(model_index, model_index)
+            changed += 1
+        if changed:
+            self.records_changed.emit()
+        return changed
+
+    def record(self, row):
+        """Returns the record shown at `row`, or None."""
+        if 0 <= row < len(self._records):
+            return self._records[row]
+        return None
+
+    def search(self, query):
+        """
+        Matching rows: ranked search-engine hits first (if enabled), then any
+        other rows whose display text contains `query` (case-insensitive).
+        """
+        rows_by_key = self._rows_by_key
+        substring_rows = sorted(rows_by_key[key] for key in self._index.search(query))
+        if self.engine is None or len(query.strip()) < MIN_RANKED_QUERY:
+            return substring_rows
+        # Equal scores are shown in list order
+        hits = sorted((-score, rows_by_key[key]) for key, _, score in self.engine.search(query))
+        rows = [row for _, row in hits]
+        seen = set(rows)
+        rows.extend(row for row in substring_rows if row not in seen)
+        return rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._records)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._records):
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self._texts[index.row()]
+        if role == RECORD_ROLE:
+            return self._records[index.row()]
+        return None
+
+class SearchResultsModel(QAbstractProxyModel):
+    """
+    The rows of a RecordListModel matching the current query, for use as a
+    QCompleter model in UnfilteredPopupCompletion mode. Being a proxy of the
+    combo box's own model lets QComboBox map a picked completion straight back
+    to the source row.
+    """
+    def __init__(self, source, parent=None):
+        super().__init__(parent)
+        self._query = ""
+        self._rows = []
+        self._positions = {}
+        self.setSourceModel(source)
+        # Refreshed once per source update, after its row/key bookkeeping is done
+        source.records_changed.connect(self.refresh)
+        self.refresh()
+
+    def set_query(self, query):
+        self._query = query
+        self.refresh()
+
+    def refresh(self):
+        self.beginResetModel()
+        self._rows = self.sourceModel().search(self._query)
+        self._positions = {source_row: row for row, source_row in enumerate(self._rows)}
+        self.endResetModel()
+
+    def source_row(self, row):
+        return self._rows[row] if 0 <= row < len(self._rows) else -1
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if parent.isValid() or column != 0 or not 0 <= row < len(self._rows):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=None):
+        if index is None:
+            # QObject.parent()
+            return super().parent()
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 1
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        return self.sourceModel().index(self.source_row(proxy_index.row()), 0)
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = self._positions.get(source_index.row())
+        return QModelIndex() if row is None else self.createIndex(row, 0)
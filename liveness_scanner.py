@@ -0,0 +1,238 @@
+# liveness_scanner.py
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import app_cache
+from stream_probe import PROBE_TIMEOUT
+from stream_resolver import DOMAIN_CANDIDATES, build_candidate_url, get_stream_headers, cached_session_cookies
+
+# --- Configuration ---
+LIVENESS_FILE = "channel_liveness.json"
+# Probes in flight at once, across all hosts.
+MAX_CONCURRENT_PROBES = 16
+# Per-host token bucket: sustained probes per second, and burst size.
+HOST_RATE_LIMIT = 4.0
+HOST_BURST = 4
+# Live channels are rechecked after this long...
+LIVE_RESCAN_AFTER = 15 * 60
+# ...dead ones after this, doubling with every consecutive dead scan up to the cap.
+DEAD_RESCAN_AFTER = 30 * 60
+DEAD_RESCAN_MAX = 12 * 3600
+# Results are written to disk every this many channels during a scan.
+SAVE_EVERY = 50
+# Channels refused (403) on every host that answered need a session first; they're
+# rechecked after this long in case one has been established since.
+GATED_RESCAN_AFTER = 60 * 60
+# Scan due channels in the background whenever the lists are loaded in the GUI,
+# at most this many per refresh (the stalest first, so the list is covered over time).
+AUTO_SCAN_CHANNELS = True
+AUTO_SCAN_LIMIT = 100
+# ---------------------
+
+class HostRateLimiter:
+    """Token bucket per host; acquire() blocks until the host may be probed again."""
+    def __init__(self, rate=HOST_RATE_LIMIT, burst=HOST_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host, stop_event=None):
+        while True:
+            with self._lock:
+                now = self.clock()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return True
+                self._buckets[host] = (tokens, now)
+                wait_for = (1 - tokens) / self.rate
+            if stop_event is not None:
+                if stop_event.wait(wait_for):
+                    return False
+            else:
+                time.sleep(wait_for)
+
+class LivenessScanner:
+    """
+    Probes channels' playlists on every candidate stream server and keeps a
+    persistent map of channel id -> {"live", "gated", "best_host", "latency",
+    "checked_at", "dead_scans"}.
+
+    Probes share one pooled keep-alive session, at most `max_concurrent` run at
+    once and each host is rate limited. scan() only probes channels that are
+    due: live ones every LIVE_RESCAN_AFTER, dead ones with a growing back-off.
+    on_result(channel_id, entry) is called from worker threads as channels finish.
+
+    Probes carry the channel's cached session cookies, if any (`cookie_source()`
+    returns {channel_id: Cookie header}). A channel refused with 403 and live
+    nowhere is recorded as "gated" rather than dead: it needs a session first.
+    """
+    def __init__(self, hosts=None, max_concurrent=MAX_CONCURRENT_PROBES, rate_limiter=None,
+                 filename=LIVENESS_FILE, timeout=PROBE_TIMEOUT, on_result=None, clock=time.time,
+                 cookie_source=cached_session_cookies):
+        self.hosts = list(hosts or DOMAIN_CANDIDATES)
+        self.max_concurrent = max_concurrent
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.filename = filename
+        self.timeout = timeout
+        self.on_result = on_result
+        self.clock = clock
+        self.cookie_source = cookie_source
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.hosts), pool_maxsize=max_concurrent)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        data = app_cache.load_json(filename, default={})
+        self._results = data if isinstance(data, dict) else {}
+
+    # --- Results ---
+
+    def get(self, channel_id):
+        """The channel's last scan result, or None if it was never scanned."""
+        with self._lock:
+            entry = self._results.get(str(channel_id))
+            return dict(entry) if entry else None
+
+    def snapshot(self):
+        with self._lock:
+            return {channel_id: dict(entry) for channel_id, entry in self._results.items()}
+
+    def save(self):
+        with self._lock:
+            data = dict(self._results)
+        try:
+            app_cache.save_json(self.filename, data)
+        except OSError:
+            pass
+
+    @staticmethod
+    def rescan_interval(entry):
+        if entry["live"]:
+            return LIVE_RESCAN_AFTER
+        if entry.get("gated"):
+            return GATED_RESCAN_AFTER
+        return min(DEAD_RESCAN_MAX, DEAD_RESCAN_AFTER * 2 ** max(0, entry.get("dead_scans", 1) - 1))
+
+    def due(self, channel_ids, now=None):
+        """Channel ids that need probing, never-scanned ones first, then the stalest."""
+        now = now or self.clock()
+        due = []
+        with self._lock:
+            for channel_id in dict.fromkeys(str(c) for c in channel_ids):
+                entry = self._results.get(channel_id)
+                if entry is None:
+                    due.append((0, channel_id))
+                elif now - entry["checked_at"] >= self.rescan_interval(entry):
+                    due.append((entry["checked_at"], channel_id))
+        # Stable, so never-scanned channels keep the caller's order
+        due.sort(key=lambda item: item[0])
+        return [channel_id for _, channel_id in due]
+
+    # --- Probing ---
+
+    def _probe(self, channel_id, host, headers):
+        """(host, HTTP status or None, latency) for one channel on one host."""
+        if not self.rate_limiter.acquire(host, self._stop):
+            return host, None, None
+        url = build_candidate_url(host, channel_id)
+        start = time.monotonic()
+        try:
+            resp = self._session.head(url, headers=headers, timeout=self.timeout, allow_redirects=True)
+            resp.close()
+            return host, resp.status_code, time.monotonic() - start
+        except requests.exceptions.RequestException:
+            return host, None, None
+
+    def _record(self, channel_id, probes):
+        live = [(latency, host) for host, status, latency in probes if status in (200, 206)]
+        gated = not live and any(status == 403 for _, status, _ in probes)
+        with self._lock:
+            previous = self._results.get(channel_id)
+            entry = {"live": bool(live), "gated": gated, "best_host": None, "latency": None,
+                     "checked_at": self.clock(), "dead_scans": 0}
+            if live:
+                entry["latency"], entry["best_host"] = min(live)
+            elif not gated:
+                entry["dead_scans"] = (previous or {}).get("dead_scans", 0) + 1
+            self._results[channel_id] = entry
+        if self.on_result:
+            self.on_result(channel_id, dict(entry))
+        return entry
+
+    def scan(self, channel_ids, force=False, limit=None):
+        """
+        Probes the due channels (all of them if `force`), at most `limit` of
+        them, on every host and returns how many were scanned. Blocks until
+        done or stop() is called.
+        """
+        self._stop.clear()
+        return self._scan(channel_ids, force, limit)
+
+    def _scan(self, channel_ids, force, limit):
+        todo = list(dict.fromkeys(str(c) for c in channel_ids)) if force else self.due(channel_ids)
+        todo = todo[:limit]
+        if not todo:
+            return 0
+        print(f"Checking {len(todo)} channels for liveness on {len(self.hosts)} hosts...")
+        base_headers = get_stream_headers()
+        cookies = self.cookie_source() if self.cookie_source else {}
+        scanned = live = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="liveness") as executor:
+            # A bounded window of channels in flight keeps memory flat and lets stop() act quickly
+            window = 2 * max(1, self.max_concurrent // len(self.hosts))
+            pending = []
+            for channel_id in todo + [None] * window:
+                if channel_id is not None and not self._stop.is_set():
+                    headers = base_headers
+                    if cookies.get(channel_id):
+                        headers = dict(base_headers, Cookie=cookies[channel_id])
+                    pending.append((channel_id, [executor.submit(self._probe, channel_id, host, headers)
+                                                 for host in self.hosts]))
+                if not pending or (channel_id is not None and len(pending) < window):
+                    continue
+                done_id, futures = pending.pop(0)
+                probes = [future.result() for future in futures]
+                if self._stop.is_set():
+                    # Interrupted probes say nothing about the channel
+                    continue
+                live += self._record(done_id, probes)["live"]
+                scanned += 1
+                if scanned % SAVE_EVERY == 0:
+                    self.save()
+        self.save()
+        print(f"Liveness scan: {live}/{scanned} channels live ({time.monotonic() - started:.1f}s)")
+        return scanned
+
+    def scan_in_background(self, channel_ids, force=False, limit=None):
+        """Runs scan() in a daemon thread unless a scan is already running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self._thread
+            # Cleared here rather than in the thread, so a stop() before it gets going still counts
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._scan, args=(list(channel_ids), force, limit),
+                                            name="liveness-scan", daemon=True)
+            self._thread.start()
+            return self._thread
+
+    def stop(self):
+        """Stops a running scan after the probes already in flight."""
+        self._stop.set()
+
+def liveness_badge(entry):
+    """Prefix for a channel's list entry: live, dead, or nothing if not scanned yet or gated."""
+    if not entry or entry.get("gated"):
+        return ""
+    return "🟢 " if entry["live"] else "⚫ "
@@ -0,0 +1,451 @@
+# mpv_controller.py (ONE PERSISTENT MPV, CONTROLLED OVER JSON IPC)
+
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+if sys.platform == "win32":
+    import _winapi
+
+# --- Configuration ---
+if sys.platform == "win32":
+    MPV_IPC_PATH = rf"\\.\pipe\daddylive-mpv-{os.getpid()}"
+else:
+    MPV_IPC_PATH = os.path.join(tempfile.gettempdir(), f"daddylive-mpv-{os.getpid()}.sock")
+MPV_WINDOW_TITLE = "Daddy Live Player"
+MPV_START_TIMEOUT = 10
+IPC_TIMEOUT = 5
+# Bytes read from the IPC connection at a time.
+IPC_READ_SIZE = 64 * 1024
+# Properties mirrored into MpvController.state as mpv reports changes.
+OBSERVED_PROPERTIES = (
+    "idle-active", "pause", "core-idle", "paused-for-cache", "cache-buffering-state",
+    "demuxer-cache-duration", "video-bitrate", "audio-bitrate", "media-title",
+    "frame-drop-count", "decoder-frame-drop-count",
+)
+# ---------------------
+
+class MpvError(Exception):
+    """mpv could not be started, the IPC connection failed, or a command was rejected."""
+
+class _IpcConnection:
+    """
+    Line-oriented connection to mpv's IPC server (Unix socket, or a named pipe
+    on Windows). Incoming data is read in chunks and split into lines here.
+    """
+    def __init__(self, path):
+        self._sock = None
+        self._handle = None
+        self._pending_read = None
+        self._buffer = b""
+        if sys.platform == "win32":
+            # Overlapped, so the reader thread blocking on a read doesn't hold up commands
+            # written from other threads (synchronous pipe handles serialise all I/O)
+            self._handle = _winapi.CreateFile(
+                path, _winapi.GENERIC_READ | _winapi.GENERIC_WRITE, 0, _winapi.NULL,
+                _winapi.OPEN_EXISTING, _winapi.FILE_FLAG_OVERLAPPED, _winapi.NULL
+            )
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(path)
+        self._write_lock = threading.Lock()
+
+    def send(self, message):
+        data = json.dumps(message).encode("utf-8") + b"\n"
+        with self._write_lock:
+            if self._sock is not None:
+                self._sock.sendall(data)
+                return
+            if self._handle is None:
+                raise OSError("mpv IPC pipe is closed")
+            while data:
+                ov, _ = _winapi.WriteFile(self._handle, data, overlapped=True)
+                written, _ = ov.GetOverlappedResult(True)
+                data = data[written:]
+
+    def _read_chunk(self):
+        """Up to IPC_READ_SIZE bytes as they arrive; b"" once the connection is closed."""
+        if self._sock is not None:
+            return self._sock.recv(IPC_READ_SIZE)
+        try:
+            ov, _ = _winapi.ReadFile(self._handle, IPC_READ_SIZE, overlapped=True)
+            self._pending_read = ov
+            ov.GetOverlappedResult(True)
+            return ov.getbuffer()
+        except OSError as e:
+            if e.winerror == _winapi.ERROR_BROKEN_PIPE:
+                return b""
+            raise
+        finally:
+            self._pending_read = None
+
+    def lines(self):
+        """Yields incoming messages until the connection closes."""
+        while True:
+            while b"\n" not in self._buffer:
+                chunk = self._read_chunk()
+                if not chunk:
+                    return
+                self._buffer += chunk
+            line, self._buffer = self._buffer.split(b"\n", 1)
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._sock.close()
+        if self._handle is not None:
+            pending = self._pending_read
+            if pending is not None:
+                # Wakes the reader thread; its read completes as aborted
+                try:
+                    pending.cancel()
+                except OSError:
+                    pass
+            try:
+                _winapi.CloseHandle(self._handle)
+            except OSError:
+                pass
+            self._handle = None
+
+class Playback:
+    """
+    One file loaded into the shared player: started/ended events and the end
+    reason. on_started(), if given, is called once from the IPC reader thread
+    when mpv reports the file loaded.
+    """
+    def __init__(self, url, on_started=None):
+        self.url = url
+        self.entry_id = None
+        self.started = threading.Event()
+        self.ended = threading.Event()
+        self.end_reason = None
+        self.error = None
+        self.on_started = on_started
+
+    def _start(self):
+        if not self.started.is_set() and not self.ended.is_set():
+            self.started.set()
+            if self.on_started:
+                self.on_started()
+
+    def _end(self, reason, error=None):
+        if not self.ended.is_set():
+            self.end_reason = reason
+            self.error = error
+            self.ended.set()
+
+class MpvController:
+    """
+    Keeps one mpv window alive (idle between streams) and switches what it
+    plays with `loadfile`, so changing channel costs no player startup or
+    window churn. The HTTP headers and cookies each stream needs are set per
+    load.
+
+    `state` mirrors OBSERVED_PROPERTIES; stats() summarises playback and
+    cache/buffer state. on_state(stats), if given, is called from the IPC
+    reader thread whenever a property changes.
+    """
+    def __init__(self, mpv_path="mpv", ipc_path=MPV_IPC_PATH, on_state=None, title=MPV_WINDOW_TITLE):
+        self.mpv_path = mpv_path
+        self.ipc_path = ipc_path
+        self.on_state = on_state
+        self.title = title
+        self.state = {}
+        # Times playback stalled to rebuffer since the current stream was loaded
+        self.stalls = 0
+        self.process = None
+        self._connection = None
+        self._reader = None
+        self._pending = {}
+        self._next_request_id = 1
+        self._current = None
+        self._lock = threading.Lock()
+
+    # --- Process and connection ---
+
+    def is_running(self):
+        return self.process is not None and self.process.poll() is None and self._connection is not None
+
+    def start(self):
+        """Starts mpv (idle, with its window) and connects to it, unless already running."""
+        with self._lock:
+            if self.is_running():
+                return
+            self._cleanup_locked()
+            if self.process is not None and self.process.poll() is None:
+                # Alive but unreachable; replace it
+                self.process.kill()
+            if sys.platform != "win32" and os.path.exists(self.ipc_path):
+                os.remove(self.ipc_path)
+            cmd = [
+                self.mpv_path, "--idle=yes", "--force-window=yes", "--keep-open=no",
+                f"--input-ipc-server={self.ipc_path}", f"--title={self.title}",
+                "--no-terminal",
+            ]
+            try:
+                self.process = subprocess.Popen(
+                    cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
+                )
+            except OSError as e:
+                raise MpvError(f"Could not start mpv: {e}")
+
+            deadline = time.monotonic() + MPV_START_TIMEOUT
+            while True:
+                try:
+                    self._connection = _IpcConnection(self.ipc_path)
+                    break
+                except OSError:
+                    if self.process.poll() is not None:
+                        raise MpvError(f"mpv exited during startup (code {self.process.returncode})")
+                    if time.monotonic() > deadline:
+                        self.process.kill()
+                        raise MpvError("mpv did not open its IPC server in time")
+                    time.sleep(0.05)
+            self.state = {}
+            self._reader = threading.Thread(target=self._read_loop, args=(self._connection,),
+                                            name="mpv-ipc", daemon=True)
+            self._reader.start()
+        for request_id, name in enumerate(OBSERVED_PROPERTIES, 1):
+            self.command("observe_property", request_id, name)
+        print(f"mpv started with IPC at {self.ipc_path}")
+
+    def _cleanup_locked(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(MpvError("mpv connection closed"))
+        self._pending = {}
+        if self._current is not None:
+            self._current._end("quit")
+            self._current = None
+
+    def quit(self):
+        """Closes the player window and mpv."""
+        if self.is_running():
+            try:
+                self.command("quit", timeout=2)
+            except MpvError:
+                pass
+        with self._lock:
+            process = self.process
+            self._cleanup_locked()
+            self.process = None
+        if process is not None:
+            try:
+                process.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if sys.platform != "win32" and os.path.exists(self.ipc_path):
+            try:
+                os.remove(self.ipc_path)
+            except OSError:
+                pass
+
+    # --- IPC ---
+
+    def command(self, *args, timeout=IPC_TIMEOUT):
+        """Runs an mpv input command and returns its "data"; raises MpvError on failure."""
+        return self._request(list(args), args[0], timeout)
+
+    def command_named(self, name, timeout=IPC_TIMEOUT, **args):
+        """Like command(), with mpv's named arguments (optional ones can be left out)."""
+        return self._request(dict(args, name=name), name, timeout)
+
+    def _request(self, command, name, timeout):
+        with self._lock:
+            connection = self._connection
+            if connection is None:
+                raise MpvError("mpv is not running")
+            request_id = self._next_request_id
+            self._next_request_id += 1
+            future = self._pending[request_id] = Future()
+        try:
+            connection.send({"command": command, "request_id": request_id})
+            reply = future.result(timeout=timeout)
+        except OSError as e:
+            raise MpvError(f"mpv IPC failed: {e}")
+        except FutureTimeoutError:
+            raise MpvError(f"mpv did not answer {name!r}")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+        if reply.get("error") != "success":
+            raise MpvError(f"mpv rejected {name!r}: {reply.get('error')}")
+        return reply.get("data")
+
+    def set_property(self, name, value):
+        return self.command("set_property", name, value)
+
+    def _read_loop(self, connection):
+        try:
+            for message in connection.lines():
+                if "request_id" in message and "event" not in message:
+                    with self._lock:
+                        future = self._pending.get(message["request_id"])
+                    if future is not None and not future.done():
+                        future.set_result(message)
+                    continue
+                self._handle_event(message)
+        except (OSError, ValueError):
+            pass
+        # mpv exited or closed the connection
+        with self._lock:
+            if self._connection is connection:
+                self._cleanup_locked()
+        self._notify_state()
+
+    def _handle_event(self, message):
+        event = message.get("event")
+        if event == "property-change":
+            name, value = message.get("name"), message.get("data")
+            if name == "paused-for-cache" and value and not self.state.get(name):
+                self.stalls += 1
+            self.state[name] = value
+            self._notify_state()
+            return
+        with self._lock:
+            current = self._current
+        if current is None:
+            return
+        entry_id = message.get("playlist_entry_id")
+        if event == "start-file" and current.entry_id is None:
+            current.entry_id = entry_id
+        elif event in ("file-loaded", "playback-restart"):
+            if entry_id is None or entry_id == current.entry_id:
+                current._start()
+        elif event == "end-file":
+            if entry_id is not None and entry_id != current.entry_id:
+                # The previous stream's end, reported after the new one was loaded
+                return
+            current._end(message.get("reason"), message.get("file_error"))
+
+    def _notify_state(self):
+        if self.on_state:
+            self.on_state(self.stats())
+
+    # --- Playback ---
+
+    def load(self, url, headers=None, cookies=None, options=None, on_started=None):
+        """
+        Plays `url` in the shared window, replacing whatever is playing, and
+        returns its Playback (see Playback for `on_started`). Starts mpv
+        first if needed. `options` are mpv options for this file only; mpv
+        restores the previous values when the next file is loaded.
+        """
+        self.start()
+        headers = dict(headers or {})
+        user_agent = headers.pop("User-Agent", "")
+        referrer = headers.pop("Referer", "")
+        fields = [f"{name}: {value}" for name, value in headers.items()]
+        if cookies:
+            fields.append(f"Cookie: {cookies}")
+        # Options apply to the next loadfile, including every playlist and segment request;
+        # every load sets all three, so nothing carries over from the previous stream
+        self.set_property("user-agent", user_agent)
+        self.set_property("referrer", referrer)
+        self.set_property("http-header-fields", fields)
+
+        playback = Playback(url, on_started)
+        with self._lock:
+            previous, self._current = self._current, playback
+            self.stalls = 0
+        if previous is not None:
+            previous._end("replaced")
+        # Named arguments, as mpv 0.38 inserted an index argument before the per-file options
+        args = {"options": _file_options(options)} if options else {}
+        self.command_named("loadfile", url=url, flags="replace", **args)
+        self.set_property("pause", False)
+        return playback
+
+    def stop(self, playback=None):
+        """Stops playback (the window stays open, idle). With `playback`, only if it is still current."""
+        with self._lock:
+            current = self._current
+            if playback is not None and playback is not current:
+                return
+            self._current = None
+        if current is not None:
+            current._end("stop")
+        if self.is_running():
+            try:
+                self.command("stop")
+            except MpvError:
+                pass
+
+    def stats(self):
+        """Playback state and cache/buffer stats for display."""
+        state = self.state
+        running = self.is_running()
+        bitrate = (state.get("video-bitrate") or 0) + (state.get("audio-bitrate") or 0)
+        dropped = (state.get("frame-drop-count") or 0) + (state.get("decoder-frame-drop-count") or 0)
+        return {
+            "running": running,
+            "idle": not running or bool(state.get("idle-active", True)),
+            "paused": bool(state.get("pause")),
+            "buffering": bool(state.get("paused-for-cache")),
+            "cache_seconds": state.get("demuxer-cache-duration"),
+            "cache_percent": state.get("cache-buffering-state"),
+            "bitrate_kbps": bitrate / 1000 if bitrate else None,
+            "dropped_frames": dropped,
+            "stalls": self.stalls,
+            "title": state.get("media-title"),
+        }
+
+def _file_options(options):
+    """loadfile's per-file options as "name=value,...", each value length-quoted (%n%) so commas are safe."""
+    parts = []
+    for name, value in options.items():
+        if isinstance(value, bool):
+            value = "yes" if value else "no"
+        value = str(value)
+        parts.append(f"{name}=%{len(value.encode('utf-8'))}%{value}")
+    return ",".join(parts)
+
+def format_player_stats(stats):
+    if not stats["running"]:
+        return "Player closed"
+    if stats["idle"]:
+        return "Player idle"
+    parts = ["Buffering" if stats["buffering"] else ("Paused" if stats["paused"] else "Playing")]
+    if stats["cache_seconds"] is not None:
+        parts.append(f"buffer {stats['cache_seconds']:.1f}s")
+    if stats["buffering"] and stats["cache_percent"] is not None:
+        parts.append(f"{stats['cache_percent']}%")
+    if stats["bitrate_kbps"]:
+        parts.append(f"{stats['bitrate_kbps']:.0f} kbps")
+    return ", ".join(parts)
+
+_controller = None
+_controller_lock = threading.Lock()
+
+def is_mpv(player):
+    """True if find_player() picked mpv (rather than VLC)."""
+    return player is not None and "mpv" in os.path.basename(player).lower()
+
+def get_mpv_controller(mpv_path="mpv"):
+    """Returns the app-wide mpv controller (mpv itself starts on the first load)."""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = MpvController(mpv_path)
+        return _controller
+
+def peek_mpv_controller():
+    """The app-wide controller if one was created, without creating it."""
+    return _controller
@@ -0,0 +1,121 @@
+# parse_pool.py
+
+import os
+import atexit
+import importlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# --- Configuration ---
+# Where page parsing runs:
+#   "process"     - warm worker process(es), so parsing never holds this process's GIL
+#   "interpreter" - subinterpreters (Python 3.14+), falling back to "process"
+#   "thread"      - in the calling thread, as before
+PARSE_BACKEND = "process"
+PARSE_WORKERS = 1
+# ---------------------
+
+# --- Worker-side functions (only raw HTML goes in, compact results come out) ---
+
+_worker_converter = None
+
+def _warm_up():
+    """Imports the parsers in the worker so the first real parse doesn't pay for it."""
+    import schedule_parser
+    # A "spawn" child starts with nothing imported, and data_retriever (requests,
+    # BeautifulSoup) is the slowest import parse_channels_html needs
+    importlib.import_module("data_retriever")
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = schedule_parser.EventTimeConverter()
+    return os.getpid()
+
+def parse_schedule_html(page_html):
+    """Schedule page -> Schedule.to_dict(). Time conversions are cached across calls in the worker."""
+    import schedule_parser
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = schedule_parser.EventTimeConverter()
+    return schedule_parser.parse_schedule(page_html, converter=_worker_converter).to_dict()
+
+def parse_channels_html(page_html):
+    """24/7 channels page -> list of channel dicts."""
+    from data_retriever import DataRetriever
+    return DataRetriever.parse_channels(page_html)
+
+# ---------------------
+
+class ParsePool:
+    """
+    Runs CPU-bound parsing outside the GIL of the GUI process. The workers are
+    started once (see warm_up) and reused for every refresh; if the pool breaks,
+    it is recreated on the next call and the current parse runs in-thread.
+    """
+    def __init__(self, backend=PARSE_BACKEND, workers=PARSE_WORKERS):
+        self.backend = backend
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _create_executor(self):
+        if self.backend == "interpreter":
+            try:
+                from concurrent.futures import InterpreterPoolExecutor
+                return InterpreterPoolExecutor(max_workers=self.workers, initializer=_warm_up)
+            except ImportError:
+                print("Subinterpreters not available, parsing in a worker process instead")
+        # "spawn" everywhere: forking a process that runs Qt and other threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_up,
+        )
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def warm_up(self):
+        """Starts the workers in the background (non-blocking)."""
+        if self.backend == "thread":
+            return
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_warm_up)
+
+    def run(self, func, *args):
+        """Calls func(*args) in a worker and returns its result; exceptions propagate."""
+        if self.backend == "thread":
+            return func(*args)
+        executor = self._get_executor()
+        try:
+            return executor.submit(func, *args).result()
+        except BrokenProcessPool as e:
+            print(f"Parse worker died ({e}); restarting it and parsing in-thread this time")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            return func(*args)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+def get_parse_pool():
+    """Returns the app-wide ParsePool, creating it on first use."""
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool()
+            atexit.register(_parse_pool.shutdown)
+        return _parse_pool
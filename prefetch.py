@@ -0,0 +1,147 @@
+# prefetch.py
+
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from stream_probe import ProbeAbort
+from stream_resolver import resolve
+
+# --- Configuration ---
+RESOLVE_CACHE_SIZE = 16
+RESOLVE_CACHE_TTL = 5 * 60
+MAX_SPECULATIVE_IN_FLIGHT = 2
+# ---------------------
+
+class ResolveCache:
+    """Small thread-safe LRU of resolved (url, headers, cookies) tuples with a TTL."""
+    def __init__(self, max_size=RESOLVE_CACHE_SIZE, ttl=RESOLVE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, channel_id):
+        with self._lock:
+            entry = self._entries.get(channel_id)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[channel_id]
+                return None
+            self._entries.move_to_end(channel_id)
+            return value
+
+    def put(self, channel_id, value):
+        with self._lock:
+            self._entries[channel_id] = (time.monotonic(), value)
+            self._entries.move_to_end(channel_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, channel_id):
+        with self._lock:
+            self._entries.pop(channel_id, None)
+
+class SpeculativeResolver:
+    """
+    Resolves channels ahead of time (e.g. while the user is browsing the list) so
+    that pressing Play can skip straight to launching the player.
+
+    At most `max_in_flight` speculative resolves run at once. A new speculation
+    cancels the others, so scrolling quickly through a list only resolves what
+    the user lingers on: queued ones never start and running ones have their
+    stream-server probes aborted through a ProbeAbort passed to the resolver as
+    `cancel`. A resolve that playback has joined is no longer speculative and
+    is left to finish. Results that didn't validate on any
+    stream server (see stream_resolver.ResolvedStream) are returned but never
+    cached, so a dead URL isn't reused for the whole TTL.
+    """
+    def __init__(self, resolver=resolve, max_in_flight=MAX_SPECULATIVE_IN_FLIGHT, cache=None):
+        self.resolver = resolver
+        self.cache = cache or ResolveCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="speculative-resolve")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def speculate(self, channel_id):
+        """Starts resolving a channel in the background unless it is cached or already underway."""
+        if self.cache.get(channel_id) is not None:
+            return
+        with self._lock:
+            entry = self._futures.get(channel_id)
+            if entry is not None and not entry[0].done():
+                return
+            self._cancel_locked(keep=channel_id)
+            cancel = ProbeAbort()
+            future = self._executor.submit(self._resolve_into_cache, channel_id, cancel)
+            self._futures[channel_id] = (future, cancel)
+
+    def _resolve_into_cache(self, channel_id, cancel=None):
+        result = self.resolver(channel_id, cancel=cancel)
+        self._cache_if_validated(channel_id, result)
+        return result
+
+    def _cache_if_validated(self, channel_id, result):
+        """Caches a result unless it is only a guessed URL no stream server accepted."""
+        if getattr(result, "validated", True):
+            self.cache.put(channel_id, result)
+        else:
+            print(f"Channel {channel_id} did not validate on any stream server; not caching it")
+
+    def _cancel_locked(self, keep=None):
+        for channel_id, (future, cancel) in list(self._futures.items()):
+            if channel_id == keep:
+                continue
+            # cancel() only succeeds for futures that haven't started running
+            if not future.done() and not future.cancel():
+                cancel.set()
+            del self._futures[channel_id]
+
+    def cancel_pending(self, keep=None):
+        """
+        Drops speculative work for every channel but `keep` (e.g. the one about
+        to be played): queued resolves never start and running ones are aborted.
+        """
+        with self._lock:
+            self._cancel_locked(keep)
+
+    def resolve(self, channel_id, on_progress=None):
+        """
+        Drop-in replacement for stream_resolver.resolve: serves a cached result,
+        joins a speculative resolve already underway, or resolves directly.
+        """
+        result = self.cache.get(channel_id)
+        if result is None:
+            with self._lock:
+                # Joined work is no longer speculative: later cancels must leave it alone
+                entry = self._futures.pop(channel_id, None)
+            if entry is not None and not entry[0].cancelled():
+                try:
+                    result = entry[0].result()
+                except Exception:
+                    result = None
+        if result is not None:
+            print(f"Using pre-resolved stream for channel {channel_id}")
+            if on_progress:
+                on_progress("url_selected")
+            return result
+
+        result = self.resolver(channel_id, on_progress=on_progress)
+        self._cache_if_validated(channel_id, result)
+        return result
+
+    def refresh(self, channel_id):
+        """Resolves now, replacing any cached result (keeps pre-warmed channels fresh)."""
+        return self._resolve_into_cache(channel_id)
+
+    def invalidate(self, channel_id):
+        """Forgets a resolved result, e.g. after playback with it failed."""
+        self.cache.invalidate(channel_id)
+
+    def shutdown(self):
+        with self._lock:
+            self._cancel_locked()
+        self._executor.shutdown(wait=False)
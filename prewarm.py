@@ -0,0 +1,200 @@
+# prewarm.py
+
+import time
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+from search_engine import event_key
+
+# --- Configuration ---
+# Start resolving a watched event's channel this long before kick-off...
+PREWARM_LEAD = 5 * 60
+# ...re-resolve it this often so it is still fresh at kick-off (ResolveCache TTL is 5 min)...
+PREWARM_REFRESH = 2 * 60
+# ...and keep doing so for this long after the scheduled start (kick-offs run late).
+PREWARM_GRACE = 15 * 60
+MAX_CONCURRENT_PREWARMS = 2
+# How often the scheduler checks its watch list.
+PREWARM_TICK = 15
+# ---------------------
+
+# Watch states reported to on_change
+WAITING = "waiting"
+WARMING = "warming"
+WARM = "warm"
+FAILED = "failed"
+DROPPED = "dropped"
+
+class _Watch:
+    __slots__ = ("key", "channel_id", "title", "start_utc", "state", "resolved_at", "future")
+
+    def __init__(self, key, channel_id, title, start_utc):
+        self.key = key
+        self.channel_id = channel_id
+        self.title = title
+        self.start_utc = start_utc
+        self.state = WAITING
+        self.resolved_at = None
+        self.future = None
+
+class PrewarmScheduler:
+    """
+    Pre-resolves the channels of events the user is watching, shortly before
+    they start, into a SpeculativeResolver's cache and keeps the result fresh
+    until a little after kick-off, so Play launches straight away.
+
+    At most `max_concurrent` pre-warms run at once (earliest kick-off first);
+    sync() drops watches for events that left the schedule. on_change(key,
+    state) is called from the scheduler's threads whenever a watch changes state.
+    """
+    def __init__(self, speculative_resolver, max_concurrent=MAX_CONCURRENT_PREWARMS,
+                 on_change=None, tick=PREWARM_TICK, clock=None):
+        self.speculative_resolver = speculative_resolver
+        self.max_concurrent = max_concurrent
+        self.on_change = on_change
+        self.tick_interval = tick
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="prewarm")
+        self._watches = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts checking the watch list in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="prewarm-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Cleared before the watches are checked, so a wake-up set during tick() isn't lost
+            self._wake.clear()
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Pre-warm scheduler error: {e}")
+            self._wake.wait(self.tick_interval)
+
+    def _notify(self, key, state):
+        if self.on_change:
+            self.on_change(key, state)
+
+    def watch(self, event, channel):
+        """
+        Watches an (event, channel) listing from Schedule.playable(). Returns its
+        key, or None if the event is already over.
+        """
+        if event.start_utc is None:
+            return None
+        if (self.clock() - event.start_utc).total_seconds() > PREWARM_GRACE:
+            return None
+        key = event_key(event, channel)
+        with self._lock:
+            if key in self._watches:
+                return key
+            self._watches[key] = _Watch(key, channel.id, event.title, event.start_utc)
+        print(f"Watching '{event.title}' on channel {channel.id}")
+        self._notify(key, WAITING)
+        # Check right away in case kick-off is already within the lead time
+        self._wake.set()
+        return key
+
+    def unwatch(self, key, state=DROPPED):
+        with self._lock:
+            watch = self._watches.pop(key, None)
+        if watch is None:
+            return False
+        if watch.future is not None:
+            # A pre-warm that already started still finishes into the cache
+            watch.future.cancel()
+        self._notify(key, state)
+        return True
+
+    def is_watched(self, key):
+        with self._lock:
+            return key in self._watches
+
+    def state(self, key):
+        with self._lock:
+            watch = self._watches.get(key)
+            return watch.state if watch else None
+
+    def watched(self):
+        """[(key, title, channel_id, start_utc, state)] ordered by start time."""
+        with self._lock:
+            watches = sorted(self._watches.values(), key=lambda w: w.start_utc)
+            return [(w.key, w.title, w.channel_id, w.start_utc, w.state) for w in watches]
+
+    def sync(self, pairs):
+        """
+        Drops watches whose (event, channel) listing is no longer among `pairs`
+        (e.g. a refreshed Schedule.playable()). Returns the dropped keys.
+        """
+        current = {event_key(event, channel) for event, channel in pairs}
+        with self._lock:
+            gone = [key for key in self._watches if key not in current]
+        for key in gone:
+            print(f"Watched event left the schedule, dropping its pre-warm: {key}")
+            self.unwatch(key)
+        return gone
+
+    def tick(self, now=None):
+        """Starts the pre-warms that are due, up to the concurrency cap."""
+        now = now or self.clock()
+        expired = []
+        with self._lock:
+            in_flight = sum(1 for w in self._watches.values()
+                            if w.future is not None and not w.future.done())
+            for watch in sorted(self._watches.values(), key=lambda w: w.start_utc):
+                until_start = (watch.start_utc - now).total_seconds()
+                if until_start < -PREWARM_GRACE:
+                    expired.append(watch.key)
+                    continue
+                if until_start > PREWARM_LEAD:
+                    # Sorted by start time, so nothing later is due either
+                    break
+                if watch.future is not None and not watch.future.done():
+                    continue
+                if watch.resolved_at is not None and (
+                        time.monotonic() - watch.resolved_at < PREWARM_REFRESH):
+                    continue
+                if in_flight >= self.max_concurrent:
+                    break
+                watch.state = WARMING
+                watch.future = self._executor.submit(self._prewarm, watch)
+                in_flight += 1
+        for key in expired:
+            self.unwatch(key)
+
+    def _prewarm(self, watch):
+        self._notify(watch.key, WARMING)
+        try:
+            resolved = self.speculative_resolver.refresh(watch.channel_id)
+            if getattr(resolved, "validated", True):
+                state = WARM
+            else:
+                print(f"Pre-warm for channel {watch.channel_id}: no stream server validated")
+                state = FAILED
+        except Exception as e:
+            print(f"Pre-warm failed for channel {watch.channel_id}: {e}")
+            state = FAILED
+        with self._lock:
+            if self._watches.get(watch.key) is not watch:
+                # Unwatched while resolving
+                return
+            watch.state = state
+            # Failures are retried after the same interval as refreshes
+            watch.resolved_at = time.monotonic()
+        self._notify(watch.key, state)
+
+    def shutdown(self):
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            for watch in self._watches.values():
+                if watch.future is not None:
+                    watch.future.cancel()
+        self._executor.shutdown(wait=False)
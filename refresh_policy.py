@@ -0,0 +1,49 @@
+# refresh_policy.py
+
+from datetime import datetime, timezone
+
+# --- Configuration ---
+# Refresh often while events are about to start (channels get added late).
+KICKOFF_WINDOW = 30 * 60
+KICKOFF_REFRESH = 3 * 60
+# Events that started this recently still count as "about to start".
+RECENT_START = 15 * 60
+SOON_WINDOW = 2 * 3600
+SOON_REFRESH = 10 * 60
+DEFAULT_REFRESH = 30 * 60
+# Local hours during which, with nothing coming up, refreshing can idle.
+OVERNIGHT_HOURS = range(1, 7)
+IDLE_REFRESH = 2 * 3600
+# ---------------------
+
+def next_refresh_delay(schedule, now=None, local_hour=None):
+    """
+    Returns (seconds, reason) until the schedule should next be refreshed,
+    based on how close the nearest event start is. `schedule` is an iterable
+    of events with an aware `start_utc` (e.g. event_model.Schedule).
+    """
+    now = now or datetime.now(timezone.utc)
+    if local_hour is None:
+        local_hour = now.astimezone().hour
+
+    until_next = None
+    for event in schedule or ():
+        start = event.start_utc
+        if start is None:
+            continue
+        seconds = (start - now).total_seconds()
+        if seconds >= -RECENT_START and (until_next is None or seconds < until_next):
+            until_next = seconds
+
+    if until_next is not None and until_next <= KICKOFF_WINDOW:
+        return KICKOFF_REFRESH, "events starting now"
+    if until_next is not None and until_next <= SOON_WINDOW:
+        return SOON_REFRESH, "events starting soon"
+
+    delay, reason = DEFAULT_REFRESH, "no events starting soon"
+    if local_hour in OVERNIGHT_HOURS:
+        delay, reason = IDLE_REFRESH, "overnight"
+    if until_next is not None:
+        # Wake up in time for the next kick-off window
+        delay = min(delay, max(KICKOFF_REFRESH, until_next - KICKOFF_WINDOW))
+    return delay, reason
@@ -0,0 +1,485 @@
+# schedule_parser.py
+
+import re
+import html
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import urlparse, parse_qs
+
+import pytz
+from dateutil import parser as dparser
+from dateutil import tz as dateutil_tz
+
+from event_model import Schedule
+
+# --- Configuration ---
+# "stream" (stdlib, default), "lxml" (optional dependency) or "bs4" (reference).
+# "auto" uses lxml when it is installed and the stream extractor otherwise.
+SCHEDULE_PARSER = "stream"
+# ---------------------
+
+# Elements html.parser never expects a closing tag for.
+VOID_ELEMENTS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+))
+
+# Every backend reduces the page to the same intermediate structure:
+#   (day_title_text_or_None,
+#    [(category_name_or_None, [(time_text, title_text, [(link_text, href), ...] or None), ...]), ...])
+# Text is what BeautifulSoup's get_text(strip=True) would return. Events lacking
+# a time or title element carry None for it. The Schedule model is then built
+# from this structure by build_schedule, so all backends produce identical output.
+
+def schedule_date_from_title(day_title):
+    """Parses the schedule date from the day title text, falling back to today in London."""
+    tz_london = pytz.timezone("Europe/London")
+    try:
+        if day_title is None:
+            raise ValueError("Could not find 'schedule__dayTitle' element")
+        date_part = day_title.split(" - ")[0].strip()
+        return dparser.parse(date_part, fuzzy=True).date()
+    except Exception:
+        return datetime.now(tz=tz_london).date()
+
+def local_time_str(aware_dt, local_tz=None):
+    """Converts a timezone-aware datetime to the local timezone as 'H:MM AM/PM'."""
+    if not isinstance(aware_dt, datetime) or aware_dt.tzinfo is None:
+        return "N/A Time"
+    try:
+        local_dt = aware_dt.astimezone(local_tz or dateutil_tz.tzlocal())
+        # Format as HH:MM AM/PM, removing leading zero from hour if present
+        return local_dt.strftime('%I:%M %p').lstrip('0')
+    except Exception:
+        return "N/A Time"
+
+_HH_MM_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+class EventTimeConverter:
+    """
+    Converts the schedule's UK "HH:MM" times into (aware UTC datetime, local
+    'H:MM AM/PM' string). Time zones are looked up once, plain "HH:MM" strings
+    skip dateutil, and each distinct (date, time) pair is converted only once,
+    since hundreds of events share a few dozen start times.
+    """
+    MAX_ENTRIES = 4096
+
+    def __init__(self, source_tz="Europe/London"):
+        self.source_tz = pytz.timezone(source_tz)
+        self.local_tz = dateutil_tz.tzlocal()
+        self._cache = {}
+
+    @staticmethod
+    def parse_time(time_str):
+        """Parses "HH:MM" directly, anything else with dateutil. Raises ValueError on failure."""
+        match = _HH_MM_RE.fullmatch(time_str)
+        if match:
+            hour, minute = int(match.group(1)), int(match.group(2))
+            if hour < 24 and minute < 60:
+                return time(hour, minute)
+        try:
+            return dparser.parse(time_str).time()
+        except (ValueError, OverflowError) as e:
+            raise ValueError(f"Unparseable event time {time_str!r}: {e}")
+
+    def convert(self, schedule_date, time_str):
+        """Returns (start_utc, time_local_str) or None if the time can't be parsed."""
+        key = (schedule_date, time_str)
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        try:
+            naive_dt = datetime.combine(schedule_date, self.parse_time(time_str))
+            aware_dt = self.source_tz.localize(naive_dt)
+            result = (aware_dt.astimezone(timezone.utc), local_time_str(aware_dt, self.local_tz))
+        except Exception:
+            result = None
+        if len(self._cache) >= self.MAX_ENTRIES:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+def load_schedule(cached, converter=None):
+    """
+    Returns a Schedule from its cached form: Schedule.to_dict() output, or the
+    list of row dicts cached by older versions.
+    """
+    if isinstance(cached, Schedule):
+        return cached
+    if isinstance(cached, dict):
+        return Schedule.from_dict(cached)
+    return Schedule.from_rows(restore_event_times(cached or [], converter))
+
+def restore_event_times(event_rows, converter=None):
+    """
+    Makes sure every row carries an aware 'Start_UTC' datetime. Rows read back
+    from the JSON cache hold it as an ISO string, and rows cached by older
+    versions don't have it at all.
+    """
+    if not event_rows:
+        return event_rows
+    for row in event_rows:
+        start = row.get('Start_UTC')
+        if isinstance(start, datetime):
+            continue
+        if isinstance(start, str):
+            try:
+                row['Start_UTC'] = datetime.fromisoformat(start)
+                continue
+            except ValueError:
+                pass
+        converter = converter or EventTimeConverter()
+        converted = None
+        try:
+            converted = converter.convert(date.fromisoformat(row['Date']), row['Time_UTC'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        row['Start_UTC'] = converted[0] if converted else datetime.min.replace(tzinfo=timezone.utc)
+    return event_rows
+
+@lru_cache(maxsize=4096)
+def channel_id_from_href(href):
+    """Returns the integer id from a '/watch.php?id=116' link, or 'N/A'."""
+    if not href or 'watch.php?id=' not in href:
+        return 'N/A'
+    try:
+        id_list = parse_qs(urlparse(href).query).get('id', [])
+        if id_list:
+            return int(id_list[0])
+    except (ValueError, IndexError):
+        pass
+    return 'N/A'
+
+def build_schedule(day_title, categories, converter=None):
+    """Turns the extracted schedule structure into a Schedule."""
+    schedule_date = schedule_date_from_title(day_title)
+    date_only_str = schedule_date.strftime('%Y-%m-%d')
+    converter = converter or EventTimeConverter()
+
+    schedule = Schedule()
+    for category_name, events in categories:
+        if category_name is None:
+            continue
+        category_name = html.unescape(category_name)
+
+        # Skip TV Show categories
+        if "tv show" in category_name.lower():
+            continue
+
+        for time_utc_str, event_title, links in events:
+            if time_utc_str is None or event_title is None:
+                continue
+            event_name = html.unescape(event_title)
+
+            # Time is UK time (e.g. "15:57") on the schedule date
+            converted = converter.convert(schedule_date, time_utc_str)
+            if converted is None:
+                continue
+            start_utc, time_local_str = converted
+
+            channels_data = []
+            for link_text, href in links or ():
+                channel_id = channel_id_from_href(href)
+                if channel_id != 'N/A':
+                    channels_data.append((html.unescape(link_text), channel_id))
+
+            schedule.add_event(category_name, event_name, date_only_str, time_utc_str,
+                               time_local_str, start_utc, channels_data)
+    return schedule
+
+def build_event_rows(day_title, categories, converter=None):
+    """
+    The extracted schedule as event rows, one dict per channel. Besides the
+    display strings, each row has 'Start_UTC', an aware UTC datetime.
+    """
+    return build_schedule(day_title, categories, converter).to_rows()
+
+# --- BeautifulSoup backend (reference implementation) ---
+
+def extract_bs4(page_html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page_html, 'html.parser')
+    title_element = soup.find('div', class_='schedule__dayTitle')
+    day_title = title_element.get_text(strip=True) if title_element else None
+
+    categories = []
+    for category_block in soup.find_all('div', class_='schedule__category'):
+        category_header = category_block.find('div', class_='schedule__catHeader')
+        category_meta = category_header.find('div', class_='card__meta') if category_header else None
+        category_name = category_meta.get_text(strip=True) if category_meta else None
+
+        events = []
+        for event_block in category_block.find_all('div', class_='schedule__event'):
+            time_elem = event_block.find('span', class_='schedule__time')
+            title_elem = event_block.find('span', class_='schedule__eventTitle')
+            channels_container = event_block.find('div', class_='schedule__channels')
+            links = None
+            if channels_container:
+                links = [(link.get_text(strip=True), link.get('href'))
+                         for link in channels_container.find_all('a')]
+            events.append((
+                time_elem.get_text(strip=True) if time_elem else None,
+                title_elem.get_text(strip=True) if title_elem else None,
+                links,
+            ))
+        categories.append((category_name, events))
+    return day_title, categories
+
+# --- lxml backend (optional dependency) ---
+
+def _xpath_class(tag, class_name):
+    return f"{tag}[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def _lxml_text(element):
+    """get_text(strip=True) for an lxml element: stripped text nodes, comments excluded."""
+    parts = []
+
+    def walk(node):
+        if node.text:
+            text = node.text.strip()
+            if text:
+                parts.append(text)
+        for child in node:
+            if isinstance(child.tag, str):
+                walk(child)
+            if child.tail:
+                tail = child.tail.strip()
+                if tail:
+                    parts.append(tail)
+
+    walk(element)
+    return "".join(parts)
+
+def _lxml_first(element, path):
+    found = element.xpath(f"(.//{path})[1]")
+    return found[0] if found else None
+
+def extract_lxml(page_html):
+    """
+    Uses libxml2's HTML parser. It is the fastest backend but repairs badly
+    broken markup differently from html.parser, so it is opt-in.
+    """
+    import lxml.html
+
+    root = lxml.html.fromstring(page_html)
+    title_element = _lxml_first(root, _xpath_class("div", "schedule__dayTitle"))
+    day_title = _lxml_text(title_element) if title_element is not None else None
+
+    categories = []
+    for category_block in root.xpath(f".//{_xpath_class('div', 'schedule__category')}"):
+        category_header = _lxml_first(category_block, _xpath_class("div", "schedule__catHeader"))
+        category_meta = _lxml_first(category_header, _xpath_class("div", "card__meta")) if category_header is not None else None
+        category_name = _lxml_text(category_meta) if category_meta is not None else None
+
+        events = []
+        for event_block in category_block.xpath(f".//{_xpath_class('div', 'schedule__event')}"):
+            time_elem = _lxml_first(event_block, _xpath_class("span", "schedule__time"))
+            title_elem = _lxml_first(event_block, _xpath_class("span", "schedule__eventTitle"))
+            channels_container = _lxml_first(event_block, _xpath_class("div", "schedule__channels"))
+            links = None
+            if channels_container is not None:
+                links = [(_lxml_text(link), link.get('href')) for link in channels_container.iter('a')]
+            events.append((
+                _lxml_text(time_elem) if time_elem is not None else None,
+                _lxml_text(title_elem) if title_elem is not None else None,
+                links,
+            ))
+        categories.append((category_name, events))
+    return day_title, categories
+
+# --- Streaming backend (stdlib only) ---
+
+class _ScheduleExtractor(HTMLParser):
+    """
+    Single pass over the page that only tracks the schedule__* elements and
+    collects their text, without building a tree. Open/close handling follows
+    BeautifulSoup's html.parser builder: void elements never open, and a stray
+    end tag closes everything up to its matching start tag (or is ignored).
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.day_title = None
+        self.categories = []
+        self._day_title_seen = False
+        # Open elements as [tag, callbacks to run when the element closes]
+        self._stack = []
+        # Text buffers of elements whose get_text() is being collected
+        self._captures = []
+        self._pending_text = []
+        self._category = None
+        self._event = None
+        self._in_header = False
+        self._in_channels = False
+
+    def _flush_text(self):
+        if self._pending_text:
+            text = "".join(self._pending_text).strip()
+            self._pending_text = []
+            if text:
+                for parts in self._captures:
+                    parts.append(text)
+
+    def _capture(self, on_close, on_text):
+        """Starts collecting text for the element just opened; on_text gets it when it closes."""
+        parts = []
+        self._captures.append(parts)
+
+        def done():
+            self._captures.remove(parts)
+            on_text("".join(parts))
+
+        on_close.append(done)
+
+    def handle_data(self, data):
+        self._pending_text.append(data)
+
+    def handle_comment(self, data):
+        self._flush_text()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_text()
+        if tag in VOID_ELEMENTS:
+            return
+        on_close = []
+        self._stack.append([tag, on_close])
+
+        classes = ()
+        if tag in ("div", "span"):
+            for name, value in attrs:
+                if name == "class" and value:
+                    classes = value.split()
+                    break
+
+        if tag == "div" and "schedule__dayTitle" in classes and not self._day_title_seen:
+            self._day_title_seen = True
+            self._capture(on_close, self._set_day_title)
+
+        category = self._category
+        if category is None:
+            if tag == "div" and "schedule__category" in classes:
+                self._category = {"name": None, "header_seen": False, "meta_seen": False, "events": []}
+                on_close.append(self._close_category)
+            return
+
+        if tag == "div" and "schedule__catHeader" in classes and not category["header_seen"]:
+            category["header_seen"] = True
+            self._in_header = True
+            on_close.append(self._close_header)
+        elif self._in_header and tag == "div" and "card__meta" in classes and not category["meta_seen"]:
+            category["meta_seen"] = True
+            self._capture(on_close, self._set_category_name)
+
+        event = self._event
+        if event is None:
+            if tag == "div" and "schedule__event" in classes:
+                self._event = {"time": None, "title": None, "links": None,
+                               "time_seen": False, "title_seen": False}
+                on_close.append(self._close_event)
+            return
+
+        if tag == "span":
+            if "schedule__time" in classes and not event["time_seen"]:
+                event["time_seen"] = True
+                self._capture(on_close, lambda text: event.__setitem__("time", text))
+            if "schedule__eventTitle" in classes and not event["title_seen"]:
+                event["title_seen"] = True
+                self._capture(on_close, lambda text: event.__setitem__("title", text))
+        elif tag == "div" and "schedule__channels" in classes and event["links"] is None:
+            event["links"] = []
+            self._in_channels = True
+            on_close.append(self._close_channels)
+        elif tag == "a" and self._in_channels:
+            href = None
+            for name, value in attrs:
+                if name == "href":
+                    href = value
+                    break
+            links = event["links"]
+            index = len(links)
+            links.append(None)
+            self._capture(on_close, lambda text: links.__setitem__(index, (text, href)))
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                self._pop_to(index)
+                return
+
+    def _pop_to(self, index):
+        while len(self._stack) > index:
+            _, on_close = self._stack.pop()
+            for callback in on_close:
+                callback()
+
+    def close(self):
+        super().close()
+        self._flush_text()
+        # Unclosed elements extend to the end of the document
+        self._pop_to(0)
+
+    def _set_day_title(self, text):
+        self.day_title = text
+
+    def _set_category_name(self, text):
+        self._category["name"] = text
+
+    def _close_header(self):
+        self._in_header = False
+
+    def _close_channels(self):
+        self._in_channels = False
+
+    def _close_event(self):
+        event, self._event = self._event, None
+        self._category["events"].append((event["time"], event["title"], event["links"]))
+
+    def _close_category(self):
+        category, self._category = self._category, None
+        self.categories.append((category["name"], category["events"]))
+
+def extract_stream(page_html):
+    extractor = _ScheduleExtractor()
+    extractor.feed(page_html)
+    extractor.close()
+    return extractor.day_title, extractor.categories
+
+# ---------------------
+
+BACKENDS = {
+    "stream": extract_stream,
+    "lxml": extract_lxml,
+    "bs4": extract_bs4,
+}
+
+def available_backends():
+    """Names of the backends whose dependencies are importable."""
+    names = ["stream"]
+    for name, module in (("lxml", "lxml.html"), ("bs4", "bs4")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+def _resolve_backend(name):
+    if name == "auto":
+        return "lxml" if "lxml" in available_backends() else "stream"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown schedule parser '{name}'. Choose from: auto, {', '.join(BACKENDS)}")
+    return name
+
+def parse_schedule(page_html, backend=None, converter=None):
+    """Parses the schedule page into a Schedule using the configured (or given) backend."""
+    extract = BACKENDS[_resolve_backend(backend or SCHEDULE_PARSER)]
+    day_title, categories = extract(page_html)
+    return build_schedule(day_title, categories, converter)
@@ -0,0 +1,300 @@
+# search_engine.py
+
+import re
+import heapq
+from bisect import bisect_left, insort
+
+# --- Configuration ---
+# Relative weight of a match in each field of a document.
+FIELD_WEIGHTS = {
+    "name": 1.0,      # channel name / event title
+    "channel": 0.8,   # channel showing an event
+    "category": 0.6,
+}
+# Query tokens shorter than this only match exactly: expanding one or two
+# letters by prefix or typos matches most of the list, slowly.
+MIN_EXPANDED_TOKEN = 3
+# One typo is tolerated per this many characters of a query token, up to MAX_EDITS.
+CHARS_PER_EDIT = 4
+MAX_EDITS = 2
+# search() returns at most this many hits unless told otherwise.
+MAX_RESULTS = 50
+# Score of a token match by kind; fuzzy matches lose FUZZY_PENALTY per edit.
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.7
+FUZZY_SCORE = 0.75
+FUZZY_PENALTY = 0.2
+# Tokens that only separate teams in event titles.
+STOPWORDS = frozenset(("vs", "v"))
+# ---------------------
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+def tokenize(text):
+    """Lower-cased word tokens of `text`, without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+def max_edits(token):
+    """Typos tolerated in a query token of this length."""
+    if len(token) < MIN_EXPANDED_TOKEN:
+        return 0
+    return min(MAX_EDITS, len(token) // CHARS_PER_EDIT)
+
+def _deletes(token, distance):
+    """All strings reachable from `token` by deleting up to `distance` characters."""
+    results = {token}
+    frontier = {token}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier if len(word) > 1 for i in range(len(word))}
+        results |= frontier
+    return results
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps count as one edit), or limit + 1 if greater."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = current[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class SearchEngine:
+    """
+    Ranked token search over documents made of named text fields.
+
+    Every query token must match a token of the document exactly, as a prefix,
+    or within a few typos (found via a deletion index, SymSpell style); tokens
+    shorter than MIN_EXPANDED_TOKEN only match exactly, and the typos allowed
+    grow with the token's length (see max_edits). A document scores the sum
+    over query tokens of its best match, weighted by the field it was found in;
+    search() returns the best MAX_RESULTS, ties in insertion order.
+
+    sync() updates the index in place from a fresh set of documents, touching
+    only those that were added, removed or changed.
+    """
+    # Query-token expansions remembered between keystrokes
+    MATCH_CACHE_SIZE = 256
+
+    def __init__(self, field_weights=None):
+        self.field_weights = dict(FIELD_WEIGHTS, **(field_weights or {}))
+        # Documents are numbered internally; the number doubles as insertion order
+        self._ids = {}           # key -> doc id
+        self._docs = {}          # doc id -> (key, record, fields, {token: weight})
+        self._postings = {}      # token -> {doc id: weight}
+        self._vocabulary = []    # sorted tokens, for prefix lookups
+        self._deletes = {}       # deletion variant -> set of tokens
+        self._match_cache = {}
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, key):
+        return key in self._ids
+
+    def record(self, key):
+        doc_id = self._ids.get(key)
+        return self._docs[doc_id][1] if doc_id is not None else None
+
+    # --- Index maintenance ---
+
+    def _doc_tokens(self, fields):
+        tokens = {}
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 0.5)
+            for token in tokenize(text or ""):
+                if weight > tokens.get(token, 0.0):
+                    tokens[token] = weight
+        return tokens
+
+    def _add_token(self, token):
+        insort(self._vocabulary, token)
+        for variant in _deletes(token, max_edits(token)):
+            self._deletes.setdefault(variant, set()).add(token)
+        self._match_cache.clear()
+
+    def _remove_token(self, token):
+        index = bisect_left(self._vocabulary, token)
+        if index < len(self._vocabulary) and self._vocabulary[index] == token:
+            del self._vocabulary[index]
+        for variant in _deletes(token, max_edits(token)):
+            tokens = self._deletes.get(variant)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._deletes[variant]
+        self._match_cache.clear()
+
+    def _index_doc(self, doc_id, key, record, fields):
+        tokens = self._doc_tokens(fields)
+        self._docs[doc_id] = (key, record, dict(fields), tokens)
+        for token, weight in tokens.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._add_token(token)
+            postings[doc_id] = weight
+
+    def _unindex_doc(self, doc_id):
+        _, _, _, tokens = self._docs.pop(doc_id)
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            if not postings:
+                del self._postings[token]
+                self._remove_token(token)
+
+    def add(self, key, record, fields):
+        """Adds or replaces a document. fields maps field name (see FIELD_WEIGHTS) to text."""
+        doc_id = self._ids.get(key)
+        if doc_id is None:
+            doc_id = self._ids[key] = self._next_id
+            self._next_id += 1
+        else:
+            self._unindex_doc(doc_id)
+        self._index_doc(doc_id, key, record, fields)
+
+    def remove(self, key):
+        doc_id = self._ids.pop(key, None)
+        if doc_id is not None:
+            self._unindex_doc(doc_id)
+
+    def sync(self, documents):
+        """
+        Makes the index hold exactly `documents`, an iterable of (key, record, fields).
+        Unchanged documents are left alone (their record is refreshed) and keep
+        their position for tie-breaking. Returns (added, removed, changed) counts.
+        """
+        seen = set()
+        added = changed = 0
+        for key, record, fields in documents:
+            seen.add(key)
+            doc_id = self._ids.get(key)
+            if doc_id is None:
+                self.add(key, record, fields)
+                added += 1
+                continue
+            existing = self._docs[doc_id]
+            if existing[2] != fields:
+                self.add(key, record, fields)
+                changed += 1
+            else:
+                self._docs[doc_id] = (key, record) + existing[2:]
+        removed_keys = [key for key in self._ids if key not in seen]
+        for key in removed_keys:
+            self.remove(key)
+        return added, len(removed_keys), changed
+
+    # --- Querying ---
+
+    def _token_matches(self, query_token):
+        """{vocabulary token: match score} for one query token."""
+        cached = self._match_cache.get(query_token)
+        if cached is not None:
+            return cached
+
+        matches = {}
+        if query_token in self._postings:
+            matches[query_token] = EXACT_SCORE
+
+        # Prefixes (as-you-type)
+        if len(query_token) >= MIN_EXPANDED_TOKEN:
+            start = bisect_left(self._vocabulary, query_token)
+            for token in self._vocabulary[start:]:
+                if not token.startswith(query_token):
+                    break
+                if token not in matches:
+                    matches[token] = PREFIX_SCORE + (EXACT_SCORE - PREFIX_SCORE) * len(query_token) / len(token)
+
+        limit = max_edits(query_token)
+        if limit:
+            candidates = set()
+            for variant in _deletes(query_token, limit):
+                candidates |= self._deletes.get(variant, set())
+            for token in candidates:
+                if token in matches:
+                    continue
+                distance = edit_distance(query_token, token, limit)
+                if distance <= limit:
+                    matches[token] = FUZZY_SCORE - FUZZY_PENALTY * distance
+
+        if len(self._match_cache) >= self.MATCH_CACHE_SIZE:
+            self._match_cache.clear()
+        self._match_cache[query_token] = matches
+        return matches
+
+    def _token_scores(self, matches, restrict=None):
+        """{doc id: best weighted score} for one query token's matches, optionally only within `restrict`."""
+        scores = None
+        for token, match_score in matches.items():
+            postings = self._postings[token]
+            if restrict is None:
+                token_scores = {doc_id: weight * match_score for doc_id, weight in postings.items()}
+            elif len(restrict) < len(postings):
+                token_scores = {doc_id: postings[doc_id] * match_score for doc_id in restrict if doc_id in postings}
+            else:
+                token_scores = {doc_id: weight * match_score for doc_id, weight in postings.items() if doc_id in restrict}
+            if scores is None:
+                scores = token_scores
+                continue
+            for doc_id, score in token_scores.items():
+                if score > scores.get(doc_id, 0.0):
+                    scores[doc_id] = score
+        return scores or {}
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Returns up to `limit` (None: all) [(key, record, score)] best first for a free-text query."""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        expanded = [self._token_matches(token) for token in query_tokens]
+        # Most selective tokens first, so later ones only score surviving documents
+        expanded.sort(key=lambda matches: sum(len(self._postings[token]) for token in matches))
+
+        totals = None
+        for matches in expanded:
+            scores = self._token_scores(matches, totals)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {doc_id: total + scores[doc_id] for doc_id, total in totals.items() if doc_id in scores}
+            if not totals:
+                return []
+
+        ordered = [(-score, doc_id) for doc_id, score in totals.items()]
+        ranked = heapq.nsmallest(limit, ordered) if limit is not None else sorted(ordered)
+        docs = self._docs
+        return [(docs[doc_id][0], docs[doc_id][1], -negative) for negative, doc_id in ranked]
+
+# --- Documents built from DataRetriever output ---
+
+def channel_documents(channels):
+    """(key, record, fields) for each channel dict from DataRetriever.extract_all_streams()."""
+    for channel in channels:
+        yield ("channel", channel['DLChNo']), channel, {"name": channel['DLChName']}
+
+def event_key(event, channel):
+    """Stable identity of a scheduled (event, channel) listing across refreshes."""
+    return ("event", event.date, event.time_utc, event.category, event.title, channel.id)
+
+def event_documents(pairs):
+    """(key, record, fields) for each (event, channel) pair, e.g. from Schedule.playable()."""
+    for event, channel in pairs:
+        yield event_key(event, channel), (event, channel), {
+            "name": event.title, "channel": channel.name, "category": event.category,
+        }
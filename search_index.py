@@ -0,0 +1,72 @@
+# search_index.py
+
+# Queries shorter than this are answered by a scan over the lowered texts,
+# which is cheap and avoids indexing single characters and pairs.
+TRIGRAM = 3
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+class TrigramIndex:
+    """
+    Case-insensitive substring search over keyed texts, with the same results
+    as a "contains" scan but answered from trigram posting sets: only texts
+    containing every trigram of the query are checked. Texts given to the
+    constructor are keyed by their position; add() and remove() update the
+    index in place.
+    """
+    def __init__(self, texts=()):
+        self._texts = {}
+        self._postings = {}
+        for key, text in enumerate(texts):
+            self.add(key, text)
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, key, text):
+        """Indexes `text` under `key`, replacing any text the key had."""
+        if key in self._texts:
+            self.remove(key)
+        text = text.lower()
+        self._texts[key] = text
+        for gram in _trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = set()
+            postings.add(key)
+
+    def remove(self, key):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        for gram in _trigrams(text):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, query):
+        """Returns the set of keys whose text contains `query`."""
+        query = query.lower()
+        if not query:
+            return set(self._texts)
+        if len(query) < TRIGRAM:
+            return {key for key, text in self._texts.items() if query in text}
+
+        postings = []
+        for gram in _trigrams(query):
+            keys = self._postings.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for keys in postings[1:]:
+            candidates &= keys
+            if not candidates:
+                return candidates
+        # Trigrams can all be present without forming the query, so confirm
+        texts = self._texts
+        return {key for key in candidates if query in texts[key]}
@@ -0,0 +1,140 @@
+# session_bootstrap.py
+
+import time
+import threading
+
+import requests
+
+import app_cache
+from data_retriever import build_headers
+
+BOOTSTRAP_STATS_FILE = "bootstrap_stats.json"
+HTTP_BOOTSTRAP_TIMEOUT = 8
+# Weight of the newest sample in each tier's latency average.
+LATENCY_EWMA_ALPHA = 0.3
+
+class BootstrapStrategy:
+    """
+    One way of obtaining session cookies for a channel page.
+    Subclasses return a list of Selenium-style cookie dicts, or raise on failure.
+    """
+    name = "base"
+
+    def fetch_cookies(self, channel_id):
+        raise NotImplementedError
+
+class RequestsBootstrap(BootstrapStrategy):
+    """Fast tier: a plain HTTP GET of watch.php with browser-like headers."""
+    name = "http"
+
+    def __init__(self, base_webpage, timeout=HTTP_BOOTSTRAP_TIMEOUT):
+        self.base_webpage = base_webpage.rstrip('/')
+        self.timeout = timeout
+
+    def fetch_cookies(self, channel_id):
+        url = f"{self.base_webpage}/watch.php?id={channel_id}"
+        # A fresh session per visit keeps one channel's cookies out of another's.
+        with requests.Session() as session:
+            response = session.get(url, headers=build_headers(self.base_webpage), timeout=self.timeout)
+            response.raise_for_status()
+            return [
+                {"name": c.name, "value": c.value, **({"expiry": c.expires} if c.expires else {})}
+                for c in session.cookies
+            ]
+
+class SeleniumBootstrap(BootstrapStrategy):
+    """Expensive tier: load watch.php in a warm headless browser from a BrowserPool."""
+    name = "browser"
+
+    def __init__(self, base_webpage, pool_factory):
+        self.base_webpage = base_webpage.rstrip('/')
+        # Called lazily so the browser pool is only created if this tier is reached.
+        self.pool_factory = pool_factory
+
+    def fetch_cookies(self, channel_id):
+        url = f"{self.base_webpage}/watch.php?id={channel_id}"
+        return self.pool_factory().fetch_cookies(url)
+
+class BootstrapStats:
+    """Per-tier attempt/hit counts and latency, persisted so they survive restarts."""
+    def __init__(self, filename=BOOTSTRAP_STATS_FILE):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def load(self):
+        data = app_cache.load_json(self.filename, default={})
+        return data if isinstance(data, dict) else {}
+
+    def record(self, tier, success, latency):
+        with self._lock:
+            data = self.load()
+            entry = data.setdefault(tier, {"attempts": 0, "hits": 0, "latency_ewma": None})
+            entry["attempts"] += 1
+            if success:
+                entry["hits"] += 1
+            previous = entry["latency_ewma"]
+            entry["latency_ewma"] = latency if previous is None else (
+                LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * previous
+            )
+            try:
+                app_cache.save_json(self.filename, data)
+            except OSError:
+                pass
+
+    def summary(self):
+        """One line per tier, e.g. 'http: 41/50 hits (82%), avg 0.41s'."""
+        lines = []
+        for tier, entry in self.load().items():
+            attempts = entry.get("attempts", 0)
+            hits = entry.get("hits", 0)
+            rate = (100.0 * hits / attempts) if attempts else 0.0
+            latency = entry.get("latency_ewma")
+            latency_str = f"{latency:.2f}s" if latency is not None else "n/a"
+            lines.append(f"{tier}: {hits}/{attempts} hits ({rate:.0f}%), avg {latency_str}")
+        return "\n".join(lines)
+
+class BootstrapChain:
+    """
+    Runs bootstrap strategies cheapest-first and escalates only when the stream
+    server rejects a tier's cookies (e.g. the m3u8 probe returns 403), or the
+    tier produced no cookies at all. If the hosts are simply unreachable, a
+    more expensive tier would fail the same way, so the chain stops there.
+    """
+    def __init__(self, strategies, stats=None):
+        self.strategies = list(strategies)
+        self.stats = stats or BootstrapStats()
+
+    def bootstrap(self, channel_id, validate):
+        """
+        `validate(cookies)` must return (ok, payload, rejected), where `rejected`
+        means the cookies themselves were refused. Returns (cookies, payload,
+        tier_name) from the first tier whose cookies validate, or from the last
+        tier that produced cookies if none did.
+        """
+        fallback = (None, None, None)
+        for i, strategy in enumerate(self.strategies):
+            start = time.monotonic()
+            ok = False
+            rejected = True
+            try:
+                cookies = strategy.fetch_cookies(channel_id)
+            except Exception as e:
+                print(f"Session bootstrap tier '{strategy.name}' failed: {e}")
+                cookies = None
+
+            if cookies is not None:
+                ok, payload, rejected = validate(cookies)
+                fallback = (cookies, payload, strategy.name)
+
+            self.stats.record(strategy.name, ok, time.monotonic() - start)
+            if ok:
+                print(f"Session established via '{strategy.name}' tier")
+                return fallback
+            if i < len(self.strategies) - 1:
+                if not rejected:
+                    print(f"Tier '{strategy.name}' cookies were not rejected, but no stream server "
+                          f"validated; not escalating")
+                    break
+                print(f"Tier '{strategy.name}' did not yield a working session; escalating...")
+
+        return fallback
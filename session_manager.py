@@ -0,0 +1,495 @@
+# session_manager.py
+
+import os
+import time
+import itertools
+import threading
+
+from stream_player import StreamPlayer
+from stream_resolver import find_player, PLAYBACK_BACKEND
+from mpv_controller import MpvController, MPV_IPC_PATH, MPV_WINDOW_TITLE, get_mpv_controller, is_mpv
+
+try:
+    import psutil
+except ImportError:  # Optional: without it, CPU use is always the per-level estimate
+    psutil = None
+
+# --- Configuration ---
+MAX_SESSIONS = 4
+# Budget for all sessions together. Bandwidth is what each player reports
+# (mpv) or else the estimate for its quality level. CPU is counted in
+# "full-quality streams": the mpv process's measured CPU use (with psutil)
+# over FULL_QUALITY_CPU_PERCENT, or else each level's relative decode cost.
+BANDWIDTH_BUDGET_KBPS = 20000
+CPU_BUDGET = 3.0
+# CPU use of one full-quality stream, in percent of one core.
+FULL_QUALITY_CPU_PERCENT = 50.0
+# Quality levels, best first: (name, cpu cost, estimated kbps, Streamlink
+# selector, mpv options). The mpv options are passed per loadfile, so they
+# only apply to the stream they were loaded with.
+QUALITY_LEVELS = (
+    ("best", 1.0, 6000, "best",
+     {"hls-bitrate": "max", "vd-lavc-skiploopfilter": "default", "framedrop": "vo"}),
+    ("medium", 0.6, 3000, "720p,540p,480p,best",
+     {"hls-bitrate": 3000000, "vd-lavc-skiploopfilter": "nonref", "framedrop": "vo"}),
+    ("low", 0.35, 1200, "480p,360p,worst",
+     {"hls-bitrate": "min", "vd-lavc-skiploopfilter": "all", "framedrop": "decoder+vo"}),
+)
+# Sessions are upgraded again only while usage stays under this share of the budget...
+UPGRADE_HEADROOM = 0.8
+# ...and no sooner than this after their last quality change (s).
+QUALITY_CHANGE_COOLDOWN = 60
+# A player's measured bitrate and CPU use lag a quality change; the estimates are used meanwhile (s).
+MEASUREMENT_SETTLE = 15
+# A stream that ends by itself after playing is restarted up to this many times.
+MAX_SESSION_RESTARTS = 3
+# ---------------------
+
+# Priorities; the lowest is downgraded first.
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+PRIORITY_NAMES = {PRIORITY_HIGH: "High", PRIORITY_NORMAL: "Normal", PRIORITY_LOW: "Low"}
+
+# Session states reported to on_change. The last three are final; the
+# session has already been removed from the manager when they are reported.
+STARTING = "starting"
+PLAYING = "playing"
+RESTARTING = "restarting"
+STOPPED = "stopped"
+ENDED = "ended"
+FAILED = "failed"
+
+def _ipc_path(session_id):
+    """IPC socket/pipe for a session's own mpv window, next to the shared one's."""
+    base, ext = os.path.splitext(MPV_IPC_PATH)
+    return f"{base}-{session_id}{ext}"
+
+class SessionLimitError(Exception):
+    """MAX_SESSIONS streams are already playing."""
+
+class PlaybackSession:
+    """One stream being played: its StreamPlayer, priority, quality level and stats."""
+    def __init__(self, session_id, channel_id, name, priority, adjustable, controller, dedicated):
+        self.id = session_id
+        self.channel_id = channel_id
+        self.name = name
+        self.priority = priority
+        # Index into QUALITY_LEVELS; only backends that take a quality can change it
+        self.quality = 0
+        self.adjustable = adjustable
+        # The mpv window it plays in (None if not playing in mpv), and whether it owns it
+        self.controller = controller
+        self.dedicated = dedicated
+        self.player = None
+        self.launch = 0
+        self.state = STARTING
+        self.error = None
+        self.stage_timings = []
+        self.restarts = 0
+        self.quality_changes = 0
+        self.quality_changed_at = None
+        self.player_stats = None
+        # Percent of one core used by its mpv process since the previous poll
+        self.cpu_percent = None
+        self._cpu_process = None
+
+    @property
+    def quality_name(self):
+        return QUALITY_LEVELS[self.quality][0]
+
+    def measured_kbps(self):
+        stats = self.player_stats
+        return stats["bitrate_kbps"] if stats and stats["running"] and not stats["idle"] else None
+
+    def _measured_level(self, level, now):
+        """True if `level` is the current quality and has been long enough for measurements to reflect it."""
+        if level != self.quality:
+            return False
+        return self.quality_changed_at is None or now - self.quality_changed_at > MEASUREMENT_SETTLE
+
+    def bandwidth(self, level, now):
+        """Bandwidth in kbps at quality `level`: measured if it is the current, settled level."""
+        measured = self.measured_kbps()
+        if measured and self._measured_level(level, now):
+            return measured
+        return QUALITY_LEVELS[level][2]
+
+    def cpu_cost(self, level, now):
+        """CPU cost at quality `level` in full-quality streams: measured if it is the current, settled level."""
+        if self.cpu_percent is not None and self._measured_level(level, now):
+            return self.cpu_percent / FULL_QUALITY_CPU_PERCENT
+        return QUALITY_LEVELS[level][1]
+
+    def sample_cpu(self):
+        """Updates cpu_percent from its mpv process (needs psutil); None until there are two samples."""
+        process = self.controller.process if self.controller is not None else None
+        if psutil is None or process is None:
+            self.cpu_percent = self._cpu_process = None
+            return
+        try:
+            if self._cpu_process is None or self._cpu_process.pid != process.pid:
+                # The first call only starts psutil's measurement interval
+                self._cpu_process = psutil.Process(process.pid)
+                self._cpu_process.cpu_percent()
+                self.cpu_percent = None
+            else:
+                self.cpu_percent = self._cpu_process.cpu_percent()
+        except psutil.Error:
+            self.cpu_percent = self._cpu_process = None
+
+    def stats(self):
+        """Per-session numbers for display."""
+        stats = self.player_stats or {}
+        return {
+            "bitrate_kbps": self.measured_kbps(),
+            "buffer_seconds": stats.get("cache_seconds"),
+            "buffering": bool(stats.get("buffering")),
+            "dropped_frames": stats.get("dropped_frames"),
+            "stalls": stats.get("stalls"),
+            "cpu_percent": self.cpu_percent,
+            "restarts": self.restarts,
+            "quality_changes": self.quality_changes,
+        }
+
+class SessionManager:
+    """
+    Runs several StreamPlayer sessions at once within a bandwidth and CPU
+    budget. When the sessions together exceed it, the lowest-priority (then
+    newest) session is stepped down a quality level, and so on until they
+    fit; quality comes back, highest priority first, once there is room
+    again. A quality change restarts the session's player from the resolve
+    cache, in the same window.
+
+    With the mpv backend, the first session plays in the app-wide mpv window
+    and each further one gets its own window. A session whose stream ends by
+    itself after playing is restarted up to MAX_SESSION_RESTARTS times.
+
+    on_change(session) is called from any thread whenever a session changes
+    state or quality, on_stage(session, stage, seconds) for each StreamPlayer
+    startup stage and on_error(session, message) when a session fails.
+    Call poll() periodically to refresh stats and rebalance.
+    """
+    def __init__(self, speculative_resolver=None, max_sessions=MAX_SESSIONS,
+                 bandwidth_budget=BANDWIDTH_BUDGET_KBPS, cpu_budget=CPU_BUDGET, backend=PLAYBACK_BACKEND,
+                 on_change=None, on_stage=None, on_error=None, clock=time.monotonic):
+        self.speculative_resolver = speculative_resolver
+        self.max_sessions = max_sessions
+        self.bandwidth_budget = bandwidth_budget
+        self.cpu_budget = cpu_budget
+        self.backend = backend
+        self.on_change = on_change
+        self.on_stage = on_stage
+        self.on_error = on_error
+        self.clock = clock
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # --- Sessions ---
+
+    def start(self, channel_id, name, priority=PRIORITY_NORMAL):
+        """Starts playing a channel in a new session and returns it; raises SessionLimitError when full."""
+        player = find_player()
+        use_mpv = self.backend == "mpv" and is_mpv(player)
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise SessionLimitError(f"{self.max_sessions} streams are already playing.")
+            session_id = next(self._ids)
+            controller, dedicated = None, False
+            if use_mpv:
+                shared = get_mpv_controller(player)
+                if any(s.controller is shared for s in self._sessions.values()):
+                    controller = MpvController(player, _ipc_path(session_id), title=f"{MPV_WINDOW_TITLE} - {name}")
+                    dedicated = True
+                else:
+                    controller = shared
+            session = PlaybackSession(
+                session_id, channel_id, name, priority,
+                adjustable=self.backend in ("cli", "mpv"), controller=controller, dedicated=dedicated
+            )
+            self._sessions[session_id] = session
+            # Make room for it (or start it lower) before anything is launched
+            changes = self._plan_locked()
+            for other, level in changes:
+                if other is session:
+                    session.quality = level
+            self._launch_locked(session)
+            restarts = [(other, level) for other, level in changes if other is not session]
+            for other, level in restarts:
+                self._set_quality_locked(other, level)
+        self._notify(session)
+        for other, _ in restarts:
+            self._notify(other)
+        return session
+
+    def stop(self, session_id):
+        """Stops a session (its own window, if any, is closed)."""
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return
+            session.state = STOPPED
+            session.launch += 1
+        self._release(session)
+        self._notify(session)
+
+    def stop_all(self):
+        for session in self.sessions():
+            self.stop(session.id)
+
+    def set_priority(self, session_id, priority):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or session.priority == priority:
+                return
+            session.priority = priority
+        self.rebalance()
+
+    def sessions(self):
+        """Active sessions, oldest first."""
+        with self._lock:
+            return sorted(self._sessions.values(), key=lambda s: s.id)
+
+    def find(self, channel_id):
+        """The active session playing `channel_id`, if any."""
+        with self._lock:
+            for session in self._sessions.values():
+                if str(session.channel_id) == str(channel_id):
+                    return session
+        return None
+
+    def count(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def starting(self):
+        """True while any session is still starting up."""
+        with self._lock:
+            return any(s.state in (STARTING, RESTARTING) for s in self._sessions.values())
+
+    def lowest_priority(self):
+        """The session a new one would replace: lowest priority, then oldest."""
+        with self._lock:
+            if not self._sessions:
+                return None
+            return min(self._sessions.values(), key=lambda s: (s.priority, s.id))
+
+    # --- Budget ---
+
+    def usage(self):
+        """(sessions, bandwidth kbps, cpu cost) of the active sessions."""
+        with self._lock:
+            bandwidth, cpu = self._usage_locked({})
+            return len(self._sessions), bandwidth, cpu
+
+    def over_budget(self):
+        _, bandwidth, cpu = self.usage()
+        return bandwidth > self.bandwidth_budget or cpu > self.cpu_budget
+
+    def _usage_locked(self, levels):
+        now = self.clock()
+        bandwidth = cpu = 0.0
+        for session in self._sessions.values():
+            level = levels.get(session.id, session.quality)
+            bandwidth += session.bandwidth(level, now)
+            cpu += session.cpu_cost(level, now)
+        return bandwidth, cpu
+
+    def _fits_locked(self, levels, share=1.0):
+        bandwidth, cpu = self._usage_locked(levels)
+        return bandwidth <= self.bandwidth_budget * share and cpu <= self.cpu_budget * share
+
+    def _plan_locked(self):
+        """[(session, new level)] that brings usage within budget, or one upgrade if there is room."""
+        levels = {s.id: s.quality for s in self._sessions.values()}
+        # Lowest priority first, newest first among equals
+        order = sorted((s for s in self._sessions.values() if s.adjustable),
+                       key=lambda s: (s.priority, -s.id))
+        while not self._fits_locked(levels):
+            for session in order:
+                if levels[session.id] < len(QUALITY_LEVELS) - 1:
+                    levels[session.id] += 1
+                    break
+            else:
+                # Everything is already at the lowest quality
+                break
+
+        changes = [(s, levels[s.id]) for s in order if levels[s.id] != s.quality]
+        if changes:
+            return changes
+
+        now = self.clock()
+        for session in reversed(order):
+            if session.quality == 0 or session.state != PLAYING:
+                continue
+            if session.quality_changed_at is not None and now - session.quality_changed_at < QUALITY_CHANGE_COOLDOWN:
+                continue
+            trial = dict(levels)
+            trial[session.id] -= 1
+            # Lower-priority sessions give up quality to make room for it
+            for other in order:
+                if other.priority >= session.priority:
+                    break
+                while trial[other.id] < len(QUALITY_LEVELS) - 1 and not self._fits_locked(trial, UPGRADE_HEADROOM):
+                    trial[other.id] += 1
+            if self._fits_locked(trial, UPGRADE_HEADROOM):
+                return [(s, trial[s.id]) for s in order if trial[s.id] != s.quality]
+            # Lower priorities wait until this one has its quality back
+            break
+        return []
+
+    def rebalance(self):
+        """Applies quality changes needed to fit the budget (or one upgrade); returns how many."""
+        with self._lock:
+            changes = self._plan_locked()
+            for session, level in changes:
+                self._set_quality_locked(session, level)
+        for session, level in changes:
+            print(f"Session {session.name}: quality -> {session.quality_name}")
+            self._notify(session)
+        return len(changes)
+
+    def poll(self):
+        """Refreshes every session's player stats and CPU use, then rebalances."""
+        for session in self.sessions():
+            controller = session.controller
+            if controller is not None and session.state == PLAYING:
+                session.player_stats = controller.stats()
+                session.sample_cpu()
+        self.rebalance()
+
+    # --- Players ---
+
+    def _set_quality_locked(self, session, level):
+        session.quality = level
+        session.quality_changes += 1
+        session.quality_changed_at = self.clock()
+        if session.player is not None:
+            session.state = STARTING
+            self._launch_locked(session)
+
+    def _launch_locked(self, session):
+        """Starts a new StreamPlayer for the session, retiring the one it replaces."""
+        session.launch += 1
+        launch = session.launch
+        previous = session.player
+        _, _, _, quality, mpv_options = QUALITY_LEVELS[session.quality]
+        session.error = None
+        session.stage_timings = []
+        session.player_stats = None
+        session.cpu_percent = None
+        resolver = self.speculative_resolver.resolve if self.speculative_resolver else None
+        session.player = StreamPlayer(
+            channel_id=session.channel_id,
+            start_callback=lambda: self._player_started(session, launch),
+            stop_callback=lambda: self._player_stopped(session, launch),
+            error_callback=lambda msg: self._player_error(session, launch, msg),
+            stage_callback=lambda stage, elapsed: self._player_stage(session, launch, stage, elapsed),
+            backend=self.backend,
+            resolver=resolver,
+            quality=quality,
+            mpv_options=mpv_options,
+            controller=session.controller,
+        )
+        if previous is not None:
+            # In mpv the new load replaces the old stream in place; stopping the
+            # old player only matters for other backends and may block briefly
+            threading.Thread(target=previous.stop, name="session-retire", daemon=True).start()
+        session.player.start()
+
+    def _release(self, session):
+        def release():
+            if session.player is not None:
+                session.player.stop()
+            if session.dedicated:
+                session.controller.quit()
+        threading.Thread(target=release, name="session-stop", daemon=True).start()
+
+    def _player_stage(self, session, launch, stage, elapsed):
+        if launch != session.launch:
+            return
+        session.stage_timings.append((stage, elapsed))
+        if self.on_stage:
+            self.on_stage(session, stage, elapsed)
+
+    def _player_started(self, session, launch):
+        with self._lock:
+            if launch != session.launch:
+                return
+            session.state = PLAYING
+        self._notify(session)
+
+    def _player_error(self, session, launch, message):
+        if launch == session.launch:
+            session.error = message
+
+    def _player_stopped(self, session, launch):
+        with self._lock:
+            if launch != session.launch or self._sessions.get(session.id) is not session:
+                # Replaced by a restart or quality change, or already stopped
+                return
+            player = session.player
+            if player.stream_ended() and session.restarts < MAX_SESSION_RESTARTS:
+                session.restarts += 1
+                session.state = RESTARTING
+                restart = True
+            else:
+                del self._sessions[session.id]
+                session.state = FAILED if session.error else ENDED
+                restart = False
+        if restart:
+            print(f"Session {session.name}: stream ended, restarting ({session.restarts}/{MAX_SESSION_RESTARTS})")
+            # The stream's URL may have moved; don't reuse the cached resolution
+            if self.speculative_resolver:
+                self.speculative_resolver.invalidate(session.channel_id)
+            with self._lock:
+                if self._sessions.get(session.id) is session:
+                    self._launch_locked(session)
+            self._notify(session)
+            return
+
+        if session.error and self.speculative_resolver:
+            self.speculative_resolver.invalidate(session.channel_id)
+        if session.dedicated:
+            self._release(session)
+        self._notify(session)
+        if session.error and self.on_error:
+            self.on_error(session, session.error)
+
+    def _notify(self, session):
+        if self.on_change:
+            self.on_change(session)
+
+    def shutdown(self, timeout=5):
+        """Stops every session and waits briefly for their players to exit."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            for session in sessions:
+                session.state = STOPPED
+                session.launch += 1
+        for session in sessions:
+            if session.player is not None:
+                session.player.stop()
+                session.player.join(timeout=timeout)
+            if session.dedicated:
+                session.controller.quit()
+
+def format_session_stats(session):
+    """One-line stats, e.g. 'buffer 3.2s, 4500 kbps, CPU 40%, 12 dropped frames, 1 stall'."""
+    stats = session.stats()
+    parts = []
+    if stats["buffering"]:
+        parts.append("buffering")
+    if stats["buffer_seconds"] is not None:
+        parts.append(f"buffer {stats['buffer_seconds']:.1f}s")
+    if stats["bitrate_kbps"]:
+        parts.append(f"{stats['bitrate_kbps']:.0f} kbps")
+    if stats["cpu_percent"] is not None:
+        parts.append(f"CPU {stats['cpu_percent']:.0f}%")
+    if stats["dropped_frames"]:
+        parts.append(f"{stats['dropped_frames']} dropped frames")
+    if stats["stalls"]:
+        parts.append(f"{stats['stalls']} stall{'s' if stats['stalls'] != 1 else ''}")
+    return ", ".join(parts)
@@ -3,15 +3,46 @@
 import subprocess
 import threading
 import sys
-import os
 import time
+from collections import deque
+
+from stream_resolver import (
+    resolve, find_player, build_streamlink_command, build_player_command, PLAYBACK_BACKEND, LATENCY_PROFILE
+)
+from streamlink_embed import EmbeddedStreamlinkPlayer
+from hls_relay import get_relay
+from mpv_controller import get_mpv_controller, is_mpv, MpvError
+
+# Number of trailing Streamlink output lines kept for error reports.
+OUTPUT_TAIL_LINES = 40
+# Streamlink logs this once the stream is open and its prebuffer has been
+# filled from the first segment, i.e. when the player is actually being fed.
+READY_MARKERS = ("Starting player",)
+# Streamlink logs this whenever it stops reading the stream...
+STREAM_END_MARKERS = ("Stream ended",)
+# ...and this first if that was because the player window was closed.
+PLAYER_CLOSED_MARKERS = ("Player closed",)
+# mpv end-file reasons that mean the stream ended or broke rather than the window being closed.
+MPV_STREAM_END_REASONS = ("eof", "error")
 
 class StreamPlayer(threading.Thread):
     """
-    Manages stream playback in a separate thread by calling PlayTest-streamlink.py
+    Manages stream playback in a separate thread: resolves the channel in-process
+    via stream_resolver, then spawns Streamlink (and its player) only.
+
+    start_callback fires once the stream is really playing. stage_callback, if
+    given, is called as stage_callback(stage, seconds_since_start) for each of
+    "url_selected", "launching" and "playing". resolver defaults to
+    stream_resolver.resolve and can be swapped for a caching/speculative one.
+
+    `quality` is the Streamlink stream selector and `mpv_options` are applied
+    when playing in mpv; `controller` is the MpvController to play in (the
+    app-wide shared window by default).
     """
 
-    def __init__(self, channel_id, start_callback=None, stop_callback=None, error_callback=None):
+    def __init__(self, channel_id, start_callback=None, stop_callback=None, error_callback=None,
+                 backend=PLAYBACK_BACKEND, profile=LATENCY_PROFILE, stage_callback=None,
+                 resolver=None, quality="best", mpv_options=None, controller=None):
         super().__init__()
         self.daemon = False
         
@@ -21,15 +52,52 @@ class StreamPlayer(threading.Thread):
             raise ValueError("Channel ID must be a valid integer.")
             
         self.process = None
+        self.embedded_player = None
+        self.playback = None
+        self.relay_client = None
+        self.backend = backend
+        self.profile = profile
+        self.quality = quality
+        self.mpv_options = mpv_options
+        self.controller = controller
         self._stop_event = threading.Event()
+        self._output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        self._playback_started = False
+        self._t0 = None
+        self.stage_timings = {}
         
         self.start_callback = start_callback
         self.stop_callback = stop_callback
         self.error_callback = error_callback
+        self.stage_callback = stage_callback
+        self.resolver = resolver or resolve
+
+    def _emit_stage(self, stage):
+        """Records how long after run() started a stage was reached."""
+        elapsed = time.monotonic() - self._t0
+        self.stage_timings[stage] = elapsed
+        if self.stage_callback:
+            self.stage_callback(stage, elapsed)
+
+    def _mark_started(self):
+        """Called exactly once, when the player starts receiving stream data."""
+        if self._playback_started:
+            return
+        self._playback_started = True
+        self._emit_stage("playing")
+        if self.start_callback:
+            self.start_callback()
 
     def stop(self):
         """Stops the playback process (Streamlink and associated player)."""
         self._stop_event.set()
+
+        if self.embedded_player:
+            self.embedded_player.stop()
+
+        if self.playback:
+            # Only this stream stops; the mpv window stays open for the next one
+            self.controller.stop(self.playback)
         
         if self.process and self.process.poll() is None:
             try:
@@ -50,62 +118,108 @@ class StreamPlayer(threading.Thread):
         """The main execution loop for the thread."""
         error_occurred = False
         error_message = ""
+        self._t0 = time.monotonic()
         
         try:
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            player_script = os.path.join(script_dir, 'PlayTest-streamlink.py')
-            
-            # Verify script exists
-            if not os.path.exists(player_script):
+            player = find_player()
+            if not player:
                 error_occurred = True
-                error_message = f"Script not found: {player_script}"
+                error_message = "No suitable video player found. Install mpv (recommended) or VLC."
+                return
+
+            # Resolve cookies and the stream URL in this thread, no helper interpreter
+            stream_url, headers, cookies = self.resolver(self.channel_id, on_progress=self._emit_stage)
+            if self._stop_event.is_set():
                 return
 
-            cmd = [sys.executable, player_script, str(self.channel_id), '--silent']
+            if self.backend == "embedded":
+                # Streamlink runs inside this thread and feeds the player through a pipe
+                self.embedded_player = EmbeddedStreamlinkPlayer(
+                    player, stream_url, headers, cookies,
+                    profile=self.profile, on_first_data=self._mark_started
+                )
+                self._emit_stage("launching")
+                if not self._stop_event.is_set():
+                    self.embedded_player.run()
+                if not self._playback_started and not self._stop_event.is_set():
+                    error_occurred = True
+                    error_message = "Stream ended before any data was received."
+                return
+
+            if self.backend == "mpv" and is_mpv(player):
+                try:
+                    error_message = self._play_in_mpv(player, stream_url, headers, cookies)
+                    error_occurred = error_message is not None
+                    return
+                except MpvError as e:
+                    print(f"mpv IPC unavailable ({e}); using Streamlink instead")
+
+            if self.backend == "relay":
+                # The player reads the local relay's playlist; other players can share it
+                relay = get_relay()
+                relay.add_channel(self.channel_id, resolved=(stream_url, headers, cookies))
+                channel = relay.channel(str(self.channel_id), resolve=False)
+                # Playing once the relay has sent this player its first segment
+                client = channel.add_client(on_first_segment=self._mark_started)
+                self.relay_client = (channel, client)
+                cmd = build_player_command(player, channel.local_url(client))
+            else:
+                cmd = build_streamlink_command(player, stream_url, headers, cookies, self.profile, self.quality)
 
             # Launch the process
+            self._emit_stage("launching")
             self.process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 stdin=subprocess.DEVNULL,
                 universal_newlines=True,
                 bufsize=1,
                 creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if sys.platform == 'win32' else 0
             )
+            if self._stop_event.is_set():
+                # stop() ran while we were launching and had no process to kill yet
+                self.process.terminate()
 
-            # Give it a moment to start
-            time.sleep(2)
-            
-            # Check if it failed immediately
-            if self.process.poll() is not None:
-                stdout_out, stderr_out = self.process.communicate()
-                error_msg = stderr_out.strip() if stderr_out else stdout_out.strip()
+            # Readiness is signalled by Streamlink's own log line, read as it arrives;
+            # exit (natural or via stop()) is picked up by a blocking wait, not polling
+            output_thread = threading.Thread(target=self._read_output, name="streamlink-output", daemon=True)
+            output_thread.start()
+            self.process.wait()
+            output_thread.join(timeout=1)
+
+            # Exiting before the player was started means startup failed
+            if not self._playback_started and not self._stop_event.is_set():
+                error_msg = "\n".join(self._output_tail).strip()
                 
                 error_occurred = True
-                error_message = (
-                    f"Streamlink failed to start (exit code {self.process.returncode})\n\n"
-                    f"Make sure Streamlink is installed:\n"
-                    f"  pip install streamlink\n\n"
-                    f"Details: {error_msg[:300] if error_msg else 'No output'}"
-                )
-                return
-            
-            # Notify that playback started successfully
-            if self.start_callback:
-                self.start_callback()
-            
-            # Monitor the process
-            while not self._stop_event.is_set():
-                returncode = self.process.poll()
-                if returncode is not None:
-                    # Process ended
-                    break
-                time.sleep(0.5)
+                if self.relay_client:
+                    # No Streamlink on this path: the player read from the local relay
+                    relay_error = self.relay_client[0].last_error
+                    error_message = (
+                        f"The player exited before the relay could start the stream "
+                        f"(exit code {self.process.returncode})\n\n"
+                        f"Relay: {relay_error or 'no upstream errors'}\n\n"
+                        f"Details: {error_msg[-300:] if error_msg else 'No output'}"
+                    )
+                else:
+                    error_message = (
+                        f"Streamlink failed to start (exit code {self.process.returncode})\n\n"
+                        f"Make sure Streamlink is installed:\n"
+                        f"  pip install streamlink\n\n"
+                        f"Details: {error_msg[-300:] if error_msg else 'No output'}"
+                    )
             
         except FileNotFoundError:
             error_occurred = True
-            error_message = "Python interpreter not found. This shouldn't happen!"
+            if self.relay_client:
+                error_message = f"Could not launch the player ({player}) for the relay stream."
+            else:
+                error_message = (
+                    "Streamlink not found in PATH.\n\n"
+                    "Install with:\n"
+                    "  pip install streamlink"
+                )
         except Exception as e:
             error_occurred = True
             error_message = f"Playback error: {e}"
@@ -118,8 +232,48 @@ class StreamPlayer(threading.Thread):
             if self.stop_callback:
                 self.stop_callback()
 
+    def _play_in_mpv(self, player, stream_url, headers, cookies):
+        """Plays in the mpv window until the stream ends; returns an error message or None."""
+        self._emit_stage("launching")
+        if self.controller is None:
+            self.controller = get_mpv_controller(player)
+        # Playing once mpv reports the file loaded, signalled from its IPC reader thread
+        self.playback = self.controller.load(stream_url, headers, cookies, self.mpv_options,
+                                             on_started=self._mark_started)
+        if self._stop_event.is_set():
+            self.controller.stop(self.playback)
+        self.playback.ended.wait()
+        if self._playback_started or self._stop_event.is_set() or self.playback.end_reason == "replaced":
+            return None
+        return f"mpv could not play the stream: {self.playback.error or self.playback.end_reason}"
+
+    def stream_ended(self):
+        """True if playback stopped because the stream ended or broke, not because it was stopped or closed."""
+        if not self._playback_started or self._stop_event.is_set():
+            return False
+        if self.playback is not None:
+            return self.playback.end_reason in MPV_STREAM_END_REASONS
+        tail = list(self._output_tail)
+        if any(marker in line for line in tail for marker in PLAYER_CLOSED_MARKERS):
+            return False
+        return any(marker in line for line in tail for marker in STREAM_END_MARKERS)
+
+    def _read_output(self):
+        """Reads Streamlink's merged output, keeping the tail and watching for readiness."""
+        try:
+            for line in self.process.stdout:
+                line = line.rstrip()
+                self._output_tail.append(line)
+                if not self._playback_started and any(marker in line for marker in READY_MARKERS):
+                    self._mark_started()
+        except (OSError, ValueError):
+            pass
+
     def cleanup(self):
         """Centralized cleanup method."""
+        if self.relay_client:
+            channel, client = self.relay_client
+            channel.remove_client(client)
         if self.process and self.process.poll() is None:
             try:
                 self.process.terminate()
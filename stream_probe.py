@@ -0,0 +1,273 @@
+# stream_probe.py (CONCURRENT STREAM-SERVER PROBES OVER A SHARED KEEP-ALIVE SESSION)
+
+import time
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# --- Configuration ---
+# Candidate probes are raced concurrently. PROBE_TIMEOUT bounds each probe and
+# PROBE_TIE_GRACE is how long a faster, lower-priority winner waits for the
+# earlier (preferred) candidates to finish before it is accepted.
+PROBE_TIMEOUT = 4
+PROBE_TIE_GRACE = 0.25
+# When the scoreboard is confident about the best host, only it is probed at
+# first; the remaining candidates are launched if it hasn't answered in time.
+PROBE_HEDGE_DELAY = 0.5
+# Hosts the shared session keeps pooled connections to (one pool per stream server).
+PROBE_POOL_HOSTS = 8
+# ---------------------
+
+_probe_session = None
+_probe_session_lock = threading.Lock()
+# The ProbeAbort of the race the current probe thread belongs to, if any
+_probe_context = threading.local()
+
+class ProbeCancelled(Exception):
+    """Raised by race_probes when the caller's cancel token is set mid-race."""
+
+class ProbeAbort:
+    """
+    Shared by the probes of one race: once set, probes that haven't started
+    are skipped and the sockets of those still in flight are shut down, so
+    losing probes end straight away instead of running until their timeout.
+
+    A ProbeAbort that nobody races with works as a cancel token: pass it to
+    race_probes(cancel=...) (or stream_resolver.resolve) and set() it from any
+    thread to abort whatever races are using it.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._connections = set()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def on_set(self, callback):
+        """Calls callback() once set (right away if it already is)."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def attach(self, connection):
+        with self._lock:
+            if self._event.is_set():
+                raise ConnectionAbortedError("probe race already decided")
+            self._connections.add(connection)
+
+    def detach_all(self, connections):
+        with self._lock:
+            self._connections.difference_update(connections)
+
+    def set(self):
+        with self._lock:
+            self._event.set()
+            connections, self._connections = self._connections, set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+        for connection in connections:
+            sock = getattr(connection, "sock", None)
+            if sock is None:
+                continue
+            try:
+                # socket.shutdown on the raw socket (not SSLSocket.shutdown) wakes the blocked reader
+                socket.socket.shutdown(sock, socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+class _AbortableConnectionMixin:
+    """Registers the connection with the current probe's ProbeAbort before each request."""
+    def connect(self):
+        super().connect()
+        abort = getattr(_probe_context, "abort", None)
+        if abort is not None and abort.is_set():
+            # The race was decided while this connection was being set up
+            self.close()
+            raise ConnectionAbortedError("probe race already decided")
+
+    def request(self, *args, **kwargs):
+        abort = getattr(_probe_context, "abort", None)
+        if abort is not None:
+            abort.attach(self)
+            _probe_context.connections.append(self)
+        return super().request(*args, **kwargs)
+
+class _AbortableHTTPConnection(_AbortableConnectionMixin, HTTPConnection):
+    pass
+
+class _AbortableHTTPSConnection(_AbortableConnectionMixin, HTTPSConnection):
+    pass
+
+class _AbortableHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _AbortableHTTPConnection
+
+class _AbortableHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _AbortableHTTPSConnection
+
+class _ProbeAdapter(HTTPAdapter):
+    """Keep-alive adapter whose connections can be shut down by a ProbeAbort."""
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _AbortableHTTPConnectionPool,
+            "https": _AbortableHTTPSConnectionPool,
+        }
+
+def get_probe_session():
+    """Returns the shared keep-alive HTTP session used for stream probes."""
+    global _probe_session
+    with _probe_session_lock:
+        if _probe_session is None:
+            session = requests.Session()
+            # One pooled connection per candidate host, so repeated probes reuse TLS.
+            adapter = _ProbeAdapter(pool_connections=PROBE_POOL_HOSTS, pool_maxsize=4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _probe_session = session
+        return _probe_session
+
+def _log_probe_failure(message):
+    """Prints a probe failure, unless the probe was cut short because its race was already decided."""
+    abort = getattr(_probe_context, "abort", None)
+    if abort is None or not abort.is_set():
+        print(message)
+
+def probe_status(url, headers=None, timeout=5):
+    """
+    Do a quick HEAD and return the HTTP status code, or None if the host
+    could not be reached at all.
+    """
+    if headers is None:
+        headers = {}
+    try:
+        resp = get_probe_session().head(url, headers=headers, timeout=timeout, allow_redirects=True)
+        resp.close()
+        if resp.status_code not in (200, 206):
+            print(f"Probe returned status {resp.status_code} for {url}")
+        return resp.status_code
+    except requests.exceptions.ConnectionError as e:
+        _log_probe_failure(f"Connection error probing {url}: {e}")
+        return None
+    except requests.exceptions.Timeout:
+        _log_probe_failure(f"Timeout probing {url}")
+        return None
+    except Exception as e:
+        _log_probe_failure(f"Error probing {url}: {e}")
+        return None
+
+def probe_url(url, headers=None, timeout=5):
+    """
+    Do a quick HEAD to check if the URL is reachable.
+    Returns True if HTTP status is 200 (or 206 for partial content), False otherwise.
+    """
+    # Accept 200 (OK) and 206 (partial content for HLS)
+    return probe_status(url, headers=headers, timeout=timeout) in (200, 206)
+
+def _timed_probe(url, headers, timeout, abort):
+    start = time.monotonic()
+    if abort.is_set():
+        return None, 0.0
+    _probe_context.abort = abort
+    _probe_context.connections = []
+    try:
+        status = probe_status(url, headers=headers, timeout=timeout)
+    finally:
+        # Finished connections go back to the pool; the race must not shut them down
+        abort.detach_all(_probe_context.connections)
+        _probe_context.abort = None
+    return status, time.monotonic() - start
+
+def race_probes(urls, headers=None, timeout=PROBE_TIMEOUT, grace=PROBE_TIE_GRACE,
+                first_wave=None, hedge_delay=PROBE_HEDGE_DELAY, cancel=None):
+    """
+    Probe URLs concurrently and return (winner_index, results), where winner_index
+    is None if nothing validated and results maps each finished index to
+    (HTTP status or None for unreachable, latency in seconds).
+
+    Only the first `first_wave` URLs (default: all) are launched straight away;
+    the rest follow after `hedge_delay` seconds, or as soon as the first wave has
+    failed. A successful probe is accepted once every earlier URL has finished,
+    or after `grace` seconds, so list order acts as the tie-breaker between fast
+    responders. Once the race is decided, probes still in flight are aborted
+    (their connections are shut down) and those not started yet are skipped.
+
+    Setting `cancel` (a ProbeAbort) aborts the race the same way and raises
+    ProbeCancelled, without waiting for probes stuck connecting.
+    """
+    if cancel is not None and cancel.is_set():
+        raise ProbeCancelled("probe race cancelled")
+    if not urls:
+        return None, {}
+    if first_wave is None or first_wave >= len(urls):
+        first_wave = len(urls)
+
+    executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="probe")
+    abort = ProbeAbort()
+    # Completed by the caller's cancel token, so a cancel wakes the wait below
+    cancelled = Future()
+    stop = set()
+    if cancel is not None:
+        stop.add(cancelled)
+        cancel.on_set(lambda: cancelled.set_result(None))
+        cancel.on_set(abort.set)
+    futures = {}
+    results = {}
+    first_success_at = None
+    launched_at = time.monotonic()
+
+    def _launch(indices):
+        for i in indices:
+            futures[executor.submit(_timed_probe, urls[i], headers, timeout, abort)] = i
+        return set(f for f, i in futures.items() if i in indices)
+
+    pending = _launch(range(first_wave))
+    held_back = list(range(first_wave, len(urls)))
+
+    try:
+        while pending or held_back:
+            if held_back and (not pending or time.monotonic() - launched_at >= hedge_delay):
+                # Leader is slow or dead: hedge by launching everyone else
+                pending |= _launch(held_back)
+                held_back = []
+
+            wait_timeout = None
+            if first_success_at is not None:
+                wait_timeout = max(0.0, grace - (time.monotonic() - first_success_at))
+            elif held_back:
+                wait_timeout = max(0.0, hedge_delay - (time.monotonic() - launched_at))
+            done, pending = wait(pending | stop, timeout=wait_timeout, return_when=FIRST_COMPLETED)
+            if cancelled.done():
+                raise ProbeCancelled("probe race cancelled")
+            pending -= stop
+
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    results[futures[future]] = (None, timeout)
+
+            successes = [i for i, (status, _) in results.items() if status in (200, 206)]
+            if not successes:
+                continue
+            if first_success_at is None:
+                first_success_at = time.monotonic()
+
+            best = min(successes)
+            earlier_done = all(i in results for i in range(best))
+            if earlier_done or time.monotonic() - first_success_at >= grace:
+                return best, results
+        return None, results
+    finally:
+        # Losing probes still in flight end as soon as their sockets are shut down
+        abort.set()
+        executor.shutdown(wait=False)
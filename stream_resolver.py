@@ -0,0 +1,399 @@
+# stream_resolver.py (SESSION COOKIES + MULTI-DOMAIN STREAM RESOLUTION)
+
+import re
+import subprocess
+import os
+import shutil
+import atexit
+import threading
+
+from browser_pool import BrowserPool
+from cookie_store import CookieStore, cookies_to_header
+from session_bootstrap import BootstrapChain, RequestsBootstrap, SeleniumBootstrap
+from host_scoreboard import HostScoreboard
+from stream_probe import PROBE_TIMEOUT, probe_status, race_probes
+from hls_relay import get_relay
+from mpv_controller import get_mpv_controller, is_mpv, MpvError
+from streamlink_embed import EmbeddedStreamlinkPlayer, DEFAULT_LATENCY_PROFILE, profile_cli_args
+
+# --- Configuration ---
+# If you want to try different name tokens (used both in hostname and path),
+# add them here in preferred order.
+DOMAIN_CANDIDATES = ["nfs", "dokko1", "zeko", "ddy6", "wind"]
+
+# If you want to force a specific stream server, set STREAM_SERVER_DOMAIN (full scheme+host).
+# If None, the script will try DOMAIN_CANDIDATES first and then fall back to this value.
+STREAM_SERVER_DOMAIN = None  # e.g. "https://dokko1new.newkso.ru" or None to rely on candidates
+STREAM_REFERER = "https://truncatedactivitiplay.xyz/"
+STREAM_ORIGIN = "https://truncatedactivitiplay.xyz"
+BASE_WEBPAGE = "https://dlhd.dad"
+STREAM_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/141.0.0.0 Safari/537.36"
+
+# Playback backend: "cli" runs the streamlink executable, "embedded" drives the
+# Streamlink Python API in-process and pipes the stream into the player, "relay"
+# serves the stream through the local HLS relay (hls_relay.py) so several
+# players can share one upstream download, and "mpv" loads streams into one
+# persistent mpv window over JSON IPC (mpv_controller.py), falling back to
+# "cli" when mpv isn't available (e.g. VLC).
+PLAYBACK_BACKEND = "cli"
+LATENCY_PROFILE = DEFAULT_LATENCY_PROFILE  # "low-latency", "balanced" or "stable"
+# ---------------------
+
+_cookie_store = CookieStore()
+_host_scoreboard = None
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+_bootstrap_chain = None
+_refresh_threads = {}
+_refresh_lock = threading.Lock()
+
+def find_player():
+    """Find mpv or fallback to VLC if mpv is not available."""
+    if shutil.which("mpv"):
+        return "mpv"
+    common_mpv_paths = [
+        r"C:\Program Files\mpv\mpv.exe",
+        r"C:\Program Files (x86)\mpv\mpv.exe",
+        os.path.expanduser(r"~\AppData\Local\mpv\mpv.exe"),
+    ]
+    for path in common_mpv_paths:
+        if os.path.exists(path):
+            return path
+    if shutil.which("vlc"):
+        print("Warning: mpv not found, falling back to VLC")
+        return "vlc"
+    common_vlc_paths = [
+        r"C:\Program Files\VideoLAN\VLC\vlc.exe",
+        r"C:\Program Files (x86)\VideoLAN\VLC\vlc.exe",
+    ]
+    for path in common_vlc_paths:
+        if os.path.exists(path):
+            print(f"Warning: mpv not found, falling back to VLC at {path}")
+            return path
+    return None
+
+def get_browser_pool():
+    """Returns the process-wide pool of warm headless browsers."""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool()
+            atexit.register(_browser_pool.shutdown)
+        return _browser_pool
+
+def fetch_browser_cookies(channel_id):
+    """Visit the webpage in a pooled browser tab and return its cookies as a list of dicts."""
+    print(f"Opening webpage to establish session for channel {channel_id}...")
+    try:
+        url = f"{BASE_WEBPAGE}/watch.php?id={channel_id}"
+        print(f"Visiting: {url}")
+        cookies = get_browser_pool().fetch_cookies(url)
+
+        print(f"Extracted {len(cookies)} cookies")
+        return cookies
+
+    except Exception as e:
+        print(f"Warning: Could not extract cookies: {e}")
+        print("Continuing without cookies...")
+        return None
+
+def get_session_cookies(channel_id):
+    """Use Selenium to visit the webpage and extract session cookies as a header string."""
+    return cookies_to_header(fetch_browser_cookies(channel_id))
+
+def get_bootstrap_chain():
+    """Session bootstrap tiers, cheapest first: plain HTTP, then a pooled browser."""
+    global _bootstrap_chain
+    if _bootstrap_chain is None:
+        _bootstrap_chain = BootstrapChain([
+            RequestsBootstrap(BASE_WEBPAGE),
+            SeleniumBootstrap(BASE_WEBPAGE, get_browser_pool),
+        ])
+    return _bootstrap_chain
+
+def bootstrap_session(channel_id, cancel=None):
+    """
+    Establishes a fresh session through the bootstrap chain, validating each
+    tier's cookies by probing the stream servers. Caches cookies that came with
+    a validated stream URL. Returns (cookie_header, stream_url, validated).
+    """
+    def _validate(cookie_list):
+        result = select_stream_url(channel_id, cookies_to_header(cookie_list), cancel=cancel)
+        # Only a 403 says the cookies were refused; dead hosts won't revive with a browser session
+        return result[1], result, 403 in result[2]
+
+    cookie_list, result, tier = get_bootstrap_chain().bootstrap(channel_id, _validate)
+    if result is None:
+        # No tier produced cookies at all; carry on without them.
+        print("Continuing without cookies...")
+        result = select_stream_url(channel_id, cancel=cancel)
+    elif result[1] and cookie_list:
+        _cookie_store.put(BASE_WEBPAGE, channel_id, cookie_list)
+    return cookies_to_header(cookie_list), result[0], result[1]
+
+def cached_session_cookies():
+    """{channel_id (str): Cookie header} of every cached session, without bootstrapping any."""
+    return _cookie_store.headers_by_channel(BASE_WEBPAGE)
+
+def refresh_cookies_in_background(channel_id):
+    """
+    Refreshes a near-expiry cookie entry without delaying playback. At most one
+    refresh runs per channel; while it does, further calls return its thread.
+    """
+    key = str(channel_id)
+    with _refresh_lock:
+        thread = _refresh_threads.get(key)
+        if thread is not None and thread.is_alive():
+            return thread
+        print(f"Session cookies for channel {channel_id} expire soon; refreshing in background...")
+        thread = threading.Thread(target=_refresh_cookies, args=(channel_id, key),
+                                  name=f"cookie-refresh-{channel_id}", daemon=True)
+        _refresh_threads[key] = thread
+        thread.start()
+    return thread
+
+def _refresh_cookies(channel_id, key):
+    try:
+        bootstrap_session(channel_id)
+    finally:
+        with _refresh_lock:
+            if _refresh_threads.get(key) is threading.current_thread():
+                del _refresh_threads[key]
+
+def build_candidate_url(name, channel_id):
+    """Builds the m3u8 URL for a DOMAIN_CANDIDATES entry."""
+    # hostname uses the name with 'new' appended as per examples: e.g. dokko1 -> dokko1new.newkso.ru
+    host = f"https://{name}new.newkso.ru"
+    path_segment = name  # examples show path uses the raw name (without 'new')
+    return f"{host}/{path_segment}/premium{channel_id}/mono.m3u8"
+
+def failover_urls(stream_url):
+    """
+    The same channel's playlist on the other DOMAIN_CANDIDATES hosts, best
+    scored first, for switching hosts mid-stream. [] for URLs that don't follow
+    the /{name}/premium{id}/mono.m3u8 pattern.
+    """
+    match = re.match(r"^https?://[^/]+/([^/]+)/premium(\d+)/mono\.m3u8", stream_url)
+    if not match:
+        return []
+    channel_id = match.group(2)
+    ordered, _ = get_host_scoreboard().order(DOMAIN_CANDIDATES, channel_id)
+    urls = [build_candidate_url(name, channel_id) for name in ordered]
+    return [url for url in urls if url != stream_url]
+
+def get_host_scoreboard():
+    """Returns the persistent stream-server scoreboard used to order candidates."""
+    global _host_scoreboard
+    if _host_scoreboard is None:
+        _host_scoreboard = HostScoreboard()
+    return _host_scoreboard
+
+def get_stream_headers():
+    """Headers the stream servers expect on every playlist and segment request."""
+    return {
+        "Referer": STREAM_REFERER,
+        "Origin": STREAM_ORIGIN,
+        "User-Agent": STREAM_USER_AGENT,
+    }
+
+def select_stream_url(channel_id, cookies=None, cancel=None):
+    """
+    Race DOMAIN_CANDIDATES, ordered by their scoreboard history, and pick the first
+    validated m3u8 URL, preferring better-scored candidates when several respond together.
+    If none succeed and STREAM_SERVER_DOMAIN is set, try the configured fallback.
+    Returns (stream_url, validated, statuses) where statuses lists every HTTP
+    status seen, so callers can tell a rejected session (403) from dead hosts.
+    Raises ProbeCancelled, recording nothing, if `cancel` is set mid-race.
+    """
+    headers = get_stream_headers()
+    if cookies:
+        headers["Cookie"] = cookies
+
+    scoreboard = get_host_scoreboard()
+    ordered, first_wave = scoreboard.order(DOMAIN_CANDIDATES, channel_id)
+    candidate_urls = [build_candidate_url(name, channel_id) for name in ordered]
+    print(f"Probing candidates in order {', '.join(ordered)} (first wave: {first_wave})...")
+    winner, results = race_probes(candidate_urls, headers=headers, first_wave=first_wave, cancel=cancel)
+    scoreboard.record(channel_id, [
+        (ordered[i], status, latency) for i, (status, latency) in results.items()
+    ])
+    statuses = [status for status, _ in results.values()]
+    if winner is not None:
+        print(f"Selected: {candidate_urls[winner]}")
+        return candidate_urls[winner], True, statuses
+
+    # If nothing from candidates worked, try the configured STREAM_SERVER_DOMAIN if provided
+    if STREAM_SERVER_DOMAIN:
+        # try to detect path portion by using last path segment from example (fallback to 'dokko1')
+        # Here we try to mimic the previous hardcoded path; adjust if you want different behavior.
+        fallback_name = "dokko1"
+        stream_url = f"{STREAM_SERVER_DOMAIN}/{fallback_name}/premium{channel_id}/mono.m3u8"
+        print(f"No candidate responded. Probing fallback: {stream_url}")
+        status = probe_status(stream_url, headers=headers, timeout=PROBE_TIMEOUT)
+        statuses.append(status)
+        if status in (200, 206):
+            print(f"Selected fallback: {stream_url}")
+            return stream_url, True, statuses
+
+    # If nothing responds, return the first candidate URL (for debugging), or construct a "best guess"
+    guessed = candidate_urls[0]
+    print("No candidate validated. Returning guessed URL for attempt:", guessed)
+    return guessed, False, statuses
+
+def build_and_select_stream_url(channel_id, cookies=None):
+    """
+    Probe the candidate stream servers and return the chosen STREAM_URL (string).
+    """
+    stream_url, _, _ = select_stream_url(channel_id, cookies)
+    return stream_url
+
+class ResolvedStream(tuple):
+    """
+    (stream_url, headers, cookies) as returned by resolve(). `validated` is
+    False when no stream server accepted the URL and it is only a best guess,
+    which callers shouldn't cache or report as ready.
+    """
+    def __new__(cls, stream_url, headers, cookies, validated=True):
+        resolved = super().__new__(cls, (stream_url, headers, cookies))
+        resolved.validated = validated
+        return resolved
+
+def resolve(channel_id, on_progress=None, cancel=None):
+    """
+    Resolves a channel to everything a player needs: a ResolvedStream
+    (stream_url, headers, cookies). headers is a dict of the HTTP headers to
+    send, cookies a Cookie header value or None. on_progress, if given, is
+    called with "url_selected" once the stream URL is chosen. Setting `cancel`
+    (a stream_probe.ProbeAbort) aborts the stream-server probes and raises
+    ProbeCancelled.
+    """
+    STREAM_URL = None
+    validated = False
+    cookies = None
+    cached = _cookie_store.get(BASE_WEBPAGE, channel_id)
+    if cached:
+        print(f"Reusing {len(cached['cookies'])} cached session cookies")
+        cookies = cookies_to_header(cached["cookies"])
+        if _cookie_store.needs_refresh(cached):
+            refresh_cookies_in_background(channel_id)
+
+        # Build/select the STREAM_URL by probing candidate domains
+        STREAM_URL, validated, statuses = select_stream_url(channel_id, cookies, cancel=cancel)
+        if not validated and 403 in statuses:
+            print("Cached session cookies were rejected (403); re-establishing session...")
+            _cookie_store.invalidate(BASE_WEBPAGE, channel_id)
+            STREAM_URL = None
+
+    if STREAM_URL is None:
+        # Cache miss: try cheap HTTP bootstrap first, escalating to a browser if needed
+        cookies, STREAM_URL, validated = bootstrap_session(channel_id, cancel=cancel)
+        print(get_bootstrap_chain().stats.summary())
+
+    if on_progress:
+        on_progress("url_selected")
+    return ResolvedStream(STREAM_URL, get_stream_headers(), cookies, validated)
+
+def build_streamlink_command(player, stream_url, headers, cookies=None, profile=None, quality="best"):
+    """Builds the Streamlink CLI invocation for a resolved stream (`quality` is a Streamlink stream selector)."""
+    streamlink_cmd = ["streamlink", "--player", player]
+    if profile:
+        streamlink_cmd.extend(profile_cli_args(profile))
+    for name, value in headers.items():
+        streamlink_cmd.extend(["--http-header", f"{name}={value}"])
+
+    # Add cookies if we got them
+    if cookies:
+        streamlink_cmd.extend(["--http-cookie", cookies])
+
+    # Add URL and quality
+    streamlink_cmd.extend([
+        f"hlsvariant://{stream_url}",
+        quality
+    ])
+    return streamlink_cmd
+
+def build_player_command(player, url):
+    """Launches the player directly on a URL it can fetch without extra headers (e.g. the relay)."""
+    return [player, url]
+
+def start_integrated_stream(channel_id, backend=PLAYBACK_BACKEND, profile=LATENCY_PROFILE):
+    """Resolves the channel and plays it with Streamlink (CLI or embedded), relaying its output."""
+    player = find_player()
+    if not player:
+        print("\nERROR: No suitable video player found!")
+        print("Please install mpv (recommended):")
+        print("  winget install mpv.mpv")
+        print("\nOr VLC will work as fallback:")
+        print("  winget install VideoLAN.VLC")
+        return 1
+
+    STREAM_URL, headers, cookies = resolve(channel_id)
+
+    print(f"\nStarting Streamlink for Channel ID: {channel_id}")
+    print(f"Player: {player}")
+    print(f"Stream URL: {STREAM_URL}")
+    print(f"Backend: {backend} ({profile} profile)")
+
+    if backend == "mpv" and is_mpv(player):
+        controller = get_mpv_controller(player)
+        try:
+            playback = controller.load(STREAM_URL, headers, cookies)
+        except MpvError as e:
+            print(f"mpv IPC unavailable ({e}); using Streamlink instead")
+        else:
+            playback.ended.wait()
+            print(f"Playback ended ({playback.end_reason})")
+            controller.quit()
+            return 0 if playback.started.is_set() else 1
+
+    if backend == "relay":
+        local_url = get_relay().add_channel(channel_id, resolved=(STREAM_URL, headers, cookies))
+        print(f"Relaying at {local_url}")
+        try:
+            return subprocess.call(build_player_command(player, local_url))
+        except Exception as e:
+            print(f"Relay playback failed: {e}")
+            return 1
+
+    if backend == "embedded":
+        try:
+            stats = EmbeddedStreamlinkPlayer(player, STREAM_URL, headers, cookies, profile=profile).run()
+        except Exception as e:
+            print(f"Embedded Streamlink playback failed: {e}")
+            return 1
+        print(f"Stream ended. Startup: {stats.get('first_byte_seconds', float('nan')):.2f}s, "
+              f"{stats['bytes'] / (1024 * 1024):.1f} MiB received")
+        return 0
+
+    streamlink_cmd = build_streamlink_command(player, STREAM_URL, headers, cookies, profile)
+
+    try:
+        print("Launching Streamlink...")
+        streamlink_process = subprocess.Popen(
+            streamlink_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL,
+            universal_newlines=True,
+            bufsize=1
+        )
+
+        for line in streamlink_process.stdout:
+            print(line.rstrip())
+
+        returncode = streamlink_process.wait()
+        print(f"Streamlink exited with code: {returncode}")
+
+        return returncode
+
+    except FileNotFoundError:
+        print("\nERROR: Streamlink not found in PATH")
+        print("Install with: pip install streamlink")
+        print("Or download from: https://github.com/streamlink/streamlink/releases")
+        return 1
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
@@ -0,0 +1,188 @@
+# streamlink_embed.py
+
+import time
+import threading
+import subprocess
+
+import app_cache
+
+# --- Configuration ---
+# Named latency profiles. Streamlink 7 calls the segment-thread option
+# "stream-segment-threads" (formerly "hls-segment-threads").
+LATENCY_PROFILES = {
+    "low-latency": {
+        "stream-segment-threads": 3,
+        "hls-live-edge": 1,
+        "ringbuffer-size": 8 * 1024 * 1024,
+    },
+    "balanced": {
+        "stream-segment-threads": 2,
+        "hls-live-edge": 3,
+        "ringbuffer-size": 16 * 1024 * 1024,
+    },
+    "stable": {
+        "stream-segment-threads": 2,
+        "hls-live-edge": 6,
+        "ringbuffer-size": 64 * 1024 * 1024,
+    },
+}
+DEFAULT_LATENCY_PROFILE = "balanced"
+READ_CHUNK_SIZE = 64 * 1024
+PROFILE_STATS_FILE = "latency_profile_stats.json"
+# ---------------------
+
+def get_latency_profile(name):
+    """Returns the option dict for a profile name, raising ValueError for unknown names."""
+    try:
+        return LATENCY_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"Unknown latency profile '{name}'. Choose from: {', '.join(LATENCY_PROFILES)}")
+
+def profile_cli_args(name):
+    """Translates a latency profile into Streamlink CLI arguments."""
+    args = []
+    for option, value in get_latency_profile(name).items():
+        args.extend([f"--{option}", str(value)])
+    return args
+
+def parse_cookie_header(cookies):
+    """Splits a 'a=1; b=2' Cookie header into a dict."""
+    result = {}
+    if not cookies:
+        return result
+    for part in cookies.split(";"):
+        name, sep, value = part.strip().partition("=")
+        if sep and name:
+            result[name] = value
+    return result
+
+def record_profile_stats(profile, stats):
+    """Appends startup measurements for a profile so profiles can be compared over time."""
+    data = app_cache.load_json(PROFILE_STATS_FILE, default={})
+    if not isinstance(data, dict):
+        data = {}
+    samples = data.setdefault(profile, [])
+    samples.append({
+        "time": time.time(),
+        "open_seconds": stats.get("open_seconds"),
+        "first_byte_seconds": stats.get("first_byte_seconds"),
+    })
+    # Keep the history bounded.
+    data[profile] = samples[-50:]
+    try:
+        app_cache.save_json(PROFILE_STATS_FILE, data)
+    except OSError:
+        pass
+
+class EmbeddedStreamlinkPlayer:
+    """
+    Plays a resolved HLS stream through the Streamlink Python API and pipes the
+    data into the player's stdin. Headers and cookies are set once on the session,
+    and startup timings are collected per latency profile.
+    """
+    def __init__(self, player, stream_url, headers, cookies=None,
+                 profile=DEFAULT_LATENCY_PROFILE, quality="best", on_first_data=None):
+        self.player = player
+        self.stream_url = stream_url
+        self.headers = headers
+        self.cookies = cookies
+        self.profile = profile
+        self.quality = quality
+        self.on_first_data = on_first_data
+        self.player_process = None
+        self.stats = {"profile": profile, "bytes": 0}
+        self._stream_fd = None
+        self._stop_event = threading.Event()
+
+    def _create_session(self):
+        # Imported lazily: Streamlink may be installed as a standalone app (winget)
+        # without the Python package, in which case only the CLI backend is available.
+        try:
+            from streamlink import Streamlink
+        except ImportError:
+            raise RuntimeError("The Streamlink Python package is required for embedded playback (pip install streamlink)")
+
+        session = Streamlink()
+        session.set_option("http-headers", dict(self.headers))
+        if self.cookies:
+            session.set_option("http-cookies", parse_cookie_header(self.cookies))
+        for option, value in get_latency_profile(self.profile).items():
+            session.set_option(option, value)
+        return session
+
+    def _open_stream(self, session):
+        streams = session.streams(f"hlsvariant://{self.stream_url}")
+        if not streams:
+            raise RuntimeError(f"No playable streams found at {self.stream_url}")
+        stream = streams.get(self.quality) or streams.get("best")
+        if stream is None:
+            raise RuntimeError(f"Quality '{self.quality}' not available; found {', '.join(streams)}")
+        return stream.open()
+
+    def run(self):
+        """Blocks until the stream ends, the player exits, or stop() is called. Returns stats."""
+        start = time.monotonic()
+        session = self._create_session()
+        stream_fd = self._stream_fd = self._open_stream(session)
+        self.stats["open_seconds"] = time.monotonic() - start
+
+        try:
+            if self._stop_event.is_set():
+                return self.stats
+            self.player_process = subprocess.Popen(
+                [self.player, "-"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            while not self._stop_event.is_set():
+                try:
+                    data = stream_fd.read(READ_CHUNK_SIZE)
+                except (OSError, ValueError):
+                    # Stream was closed by stop()
+                    break
+                if not data:
+                    break
+                if self.stats["bytes"] == 0:
+                    self.stats["first_byte_seconds"] = time.monotonic() - start
+                    print(f"[{self.profile}] first data after {self.stats['first_byte_seconds']:.2f}s")
+                    record_profile_stats(self.profile, self.stats)
+                    if self.on_first_data:
+                        self.on_first_data()
+                try:
+                    self.player_process.stdin.write(data)
+                except (BrokenPipeError, OSError):
+                    # Player window was closed
+                    break
+                self.stats["bytes"] += len(data)
+        finally:
+            self.stats["duration_seconds"] = time.monotonic() - start
+            self._close()
+        return self.stats
+
+    def stop(self):
+        """Stops reading the stream and closes the player."""
+        self._stop_event.set()
+        self._close()
+
+    def _close(self):
+        fd, self._stream_fd = self._stream_fd, None
+        if fd is not None:
+            try:
+                fd.close()
+            except Exception:
+                pass
+        process = self.player_process
+        if process and process.poll() is None:
+            try:
+                process.stdin.close()
+            except Exception:
+                pass
+            try:
+                process.terminate()
+                process.wait(timeout=3)
+            except Exception:
+                try:
+                    process.kill()
+                except Exception:
+                    pass
@@ -0,0 +1,135 @@
+# test_browser_pool.py
+#
+# Runs the browser pool against a local page and a fake WebDriver (no Chrome needed):
+#
+#   python -m unittest test_browser_pool     (or: python -m pytest test_browser_pool.py)
+
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from types import SimpleNamespace
+from urllib.parse import urljoin
+
+import requests
+
+import browser_pool
+
+class FakePage:
+    """
+    A page on localhost that sets its session cookies the way the real site
+    does: one with the page itself and the rest from a follow-up request its
+    script makes `delay` seconds later (see FakeDriver.get).
+    """
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                if self.path == "/page":
+                    self.send_header("Set-Cookie", "first=1; Path=/")
+                    self.send_header("X-Later", f"/late {delay}")
+                else:
+                    self.send_header("Set-Cookie", "second=2; Path=/")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/page"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class FakeDriver:
+    """Just enough of a Chrome WebDriver for BrowserPool, with a requests session as the browser."""
+    def __init__(self):
+        self.session = requests.Session()
+        self.current_window_handle = "home"
+        self.switch_to = SimpleNamespace(new_window=lambda kind: None, window=lambda handle: None)
+        self.visits = []
+        self.quits = 0
+        self._scripts = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.session.cookies.clear()
+
+    def get(self, url):
+        self.visits.append(url)
+        resp = self.session.get(url, timeout=10)
+        later = resp.headers.get("X-Later")
+        if later:
+            path, delay = later.split()
+            script = threading.Timer(float(delay), self.session.get, args=(urljoin(url, path),))
+            self._scripts.append(script)
+            script.start()
+
+    def get_cookies(self):
+        return [{"name": c.name, "value": c.value} for c in self.session.cookies]
+
+    def close(self):
+        # Closing the tab stops its scripts
+        for script in self._scripts:
+            script.cancel()
+        self._scripts = []
+
+    def quit(self):
+        self.quits += 1
+
+class BrowserPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.page = FakePage()
+        self.addCleanup(self.page.close)
+        self.drivers = []
+
+    def pool(self, **kwargs):
+        def factory():
+            driver = FakeDriver()
+            self.drivers.append(driver)
+            return driver
+        pool = browser_pool.BrowserPool(driver_factory=factory, **kwargs)
+        self.addCleanup(pool.shutdown)
+        return pool
+
+    def test_fetch_cookies_waits_for_the_cookies_to_settle(self):
+        pool = self.pool()
+        start = time.monotonic()
+        cookies = pool.fetch_cookies(self.page.url, timeout=5, settle=0.3)
+
+        # The late cookie arrives after the page's own; returning at the first one would miss it
+        self.assertEqual(sorted(c["name"] for c in cookies), ["first", "second"])
+        self.assertGreaterEqual(time.monotonic() - start, self.page.delay + 0.3)
+
+    def test_acquire_reuses_the_idle_browser(self):
+        pool = self.pool()
+        with pool.acquire() as first:
+            pass
+        with pool.acquire() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.drivers), 1)
+        self.assertEqual(second.uses, 2)
+
+    def test_browser_is_recycled_after_max_uses(self):
+        pool = self.pool(max_uses=2)
+        for _ in range(3):
+            pool.fetch_cookies(self.page.url, timeout=5, settle=0.05)
+
+        self.assertEqual(len(self.drivers), 2)
+        self.assertEqual(self.drivers[0].quits, 1)
+        self.assertEqual(len(self.drivers[0].visits), 2)
+        self.assertEqual(len(self.drivers[1].visits), 1)
+        self.assertEqual(self.drivers[1].quits, 0)
+
+if __name__ == "__main__":
+    unittest.main()
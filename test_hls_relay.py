@@ -0,0 +1,284 @@
+# test_hls_relay.py
+#
+# Runs the HLS relay against local fake live origins:
+#
+#   python -m unittest test_hls_relay     (or: python -m pytest test_hls_relay.py)
+
+import time
+import tempfile
+import threading
+import unittest
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+
+import requests
+
+import app_cache
+import hls_relay
+
+class FakeOrigin:
+    """
+    A live HLS origin on localhost: the playlist lists the last `window`
+    segments up to `sequence`, and segment N's body is b"{label}-{N}".
+    advance() publishes the next segment; `alive = False` makes every request fail.
+    """
+    def __init__(self, label, sequence, window=3, target_duration=2):
+        self.label = label
+        self.sequence = sequence
+        self.window = window
+        self.target_duration = target_duration
+        self.alive = True
+        self.requests = Counter()
+        self._lock = threading.Lock()
+        origin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                origin._respond(self, send_body=False)
+
+            def do_GET(self):
+                origin._respond(self, send_body=True)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def playlist_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/live/premium1/mono.m3u8"
+
+    def advance(self, count=1):
+        with self._lock:
+            self.sequence += count
+
+    def playlist(self):
+        with self._lock:
+            last = self.sequence
+        first = max(0, last - self.window + 1)
+        lines = ["#EXTM3U", f"#EXT-X-TARGETDURATION:{self.target_duration}", f"#EXT-X-MEDIA-SEQUENCE:{first}"]
+        for sequence in range(first, last + 1):
+            lines += [f"#EXTINF:{self.target_duration}.0,", f"seg{sequence}.ts"]
+        return "\n".join(lines) + "\n"
+
+    def _respond(self, handler, send_body):
+        path = handler.path.split("?", 1)[0]
+        with self._lock:
+            self.requests[(handler.command, path)] += 1
+        if not self.alive:
+            status, body, content_type = 500, b"down", "text/plain"
+        elif path.endswith(".m3u8"):
+            status, body, content_type = 200, self.playlist().encode("utf-8"), hls_relay.PLAYLIST_CONTENT_TYPE
+        elif path.rsplit("/", 1)[-1].startswith("seg"):
+            sequence = path.rsplit("/seg", 1)[1].split(".", 1)[0]
+            status, body, content_type = 200, f"{self.label}-{sequence}".encode("utf-8"), "video/mp2t"
+        else:
+            status, body, content_type = 404, b"", "text/plain"
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if send_body:
+            handler.wfile.write(body)
+
+    def segment_gets(self):
+        return {path: n for (method, path), n in self.requests.items() if method == "GET" and "/seg" in path}
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class Player:
+    """Reads the relay's playlist and segments the way mpv or VLC would."""
+    def __init__(self, playlist_url):
+        self.playlist_url = playlist_url
+        self.session = requests.Session()
+
+    def playlist(self):
+        resp = self.session.get(self.playlist_url, timeout=10)
+        resp.raise_for_status()
+        return resp.text
+
+    def segment_paths(self, text):
+        return [line for line in text.splitlines() if line and not line.startswith("#")]
+
+    def fetch(self, path):
+        resp = self.session.get(self.playlist_url.rsplit("/", 1)[0] + "/" + path, timeout=10)
+        resp.raise_for_status()
+        return resp.content
+
+    def fetch_all(self, text=None):
+        return [self.fetch(path) for path in self.segment_paths(text or self.playlist())]
+
+class RelayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.relay = hls_relay.HLSRelay(port=0)
+        self.relay.start()
+        self.addCleanup(self.relay.stop)
+
+    def origin(self, *args, **kwargs):
+        origin = FakeOrigin(*args, **kwargs)
+        self.addCleanup(origin.close)
+        return origin
+
+    def refresh_every_request(self):
+        """Lets each playlist request refetch upstream, so tests don't wait for the refresh interval."""
+        for name, value in (("MIN_PLAYLIST_REFRESH", 0), ("PLAYLIST_REFRESH_FRACTION", 0)):
+            patcher = mock.patch.object(hls_relay, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+class FanOutTest(RelayTestCase):
+    def test_each_playlist_and_segment_is_fetched_upstream_once(self):
+        origin = self.origin("a", sequence=10)
+        local_url = self.relay.add_source("1", origin.playlist_url)
+        players = [Player(local_url) for _ in range(3)]
+
+        texts = [player.playlist() for player in players]
+        self.assertEqual(len(set(texts)), 1)
+        bodies = [player.fetch_all(text) for player, text in zip(players, texts)]
+
+        self.assertEqual(bodies[0], [b"a-8", b"a-9", b"a-10"])
+        self.assertTrue(all(b == bodies[0] for b in bodies))
+        self.assertEqual(origin.requests[("GET", "/live/premium1/mono.m3u8")], 1)
+        self.assertEqual(set(origin.segment_gets().values()), {1})
+        self.assertEqual(self.relay.stats()["cache_hits"], 6)
+
+    def test_client_is_ready_only_once_its_own_segment_is_served(self):
+        origin = self.origin("a", sequence=10)
+        self.relay.add_source("1", origin.playlist_url)
+        channel = self.relay.channel("1", resolve=False)
+        ready = []
+        first = channel.add_client(on_first_segment=lambda: ready.append("first"))
+        second = channel.add_client(on_first_segment=lambda: ready.append("second"))
+
+        player = Player(channel.local_url(first))
+        player.fetch_all()
+        player.fetch_all()
+        self.assertEqual(ready, ["first"])
+
+        # The segments are already cached; the second player must still be counted separately
+        Player(channel.local_url(second)).fetch_all()
+        self.assertEqual(ready, ["first", "second"])
+
+class FailoverTest(RelayTestCase):
+    def setUp(self):
+        super().setUp()
+        self.refresh_every_request()
+
+    def test_failover_continues_after_the_last_segment_when_sequences_line_up(self):
+        primary = self.origin("a", sequence=10)
+        mirror = self.origin("b", sequence=10)
+        local_url = self.relay.add_source("1", primary.playlist_url, alternates=[mirror.playlist_url])
+        player = Player(local_url)
+        before = player.segment_paths(player.playlist())
+        self.assertEqual([player.fetch(path) for path in before[:2]], [b"a-8", b"a-9"])
+
+        primary.alive = False
+        mirror.advance()
+        after = player.playlist()
+
+        self.assertEqual(self.relay.stats()["failovers"], 1)
+        self.assertNotIn("#EXT-X-DISCONTINUITY", after)
+        self.assertEqual(player.segment_paths(after)[:3], before)
+        new_paths = player.segment_paths(after)[3:]
+        self.assertEqual([player.fetch(path) for path in new_paths], [b"b-11"])
+        # A segment listed before the switch but not fetched yet comes from the new host, same path
+        self.assertEqual(player.fetch(before[2]), b"b-10")
+
+    def test_failover_joins_the_live_edge_behind_a_discontinuity_when_sequences_differ(self):
+        primary = self.origin("a", sequence=10)
+        other = self.origin("b", sequence=500)
+        local_url = self.relay.add_source("1", primary.playlist_url, alternates=[other.playlist_url])
+        player = Player(local_url)
+        before = player.playlist()
+        player.fetch_all(before)
+
+        primary.alive = False
+        after = player.playlist()
+
+        self.assertEqual(self.relay.stats()["failovers"], 1)
+        lines = after.splitlines()
+        self.assertEqual(lines.count("#EXT-X-DISCONTINUITY"), 1)
+        joined = lines[lines.index("#EXT-X-DISCONTINUITY") + 1:]
+        self.assertEqual([player.fetch(path) for path in player.segment_paths("\n".join(joined))],
+                         [b"b-498", b"b-499", b"b-500"])
+        # The local media sequence keeps counting on from what was already relayed
+        self.assertIn("#EXT-X-MEDIA-SEQUENCE:0", lines)
+
+    def test_no_failover_without_a_healthy_alternate(self):
+        primary = self.origin("a", sequence=10)
+        spare = self.origin("b", sequence=10)
+        spare.alive = False
+        local_url = self.relay.add_source("1", primary.playlist_url, alternates=[spare.playlist_url])
+        player = Player(local_url)
+        player.playlist()
+
+        primary.alive = False
+        with self.assertRaises(requests.HTTPError) as raised:
+            player.playlist()
+        self.assertEqual(raised.exception.response.status_code, 502)
+        self.assertEqual(self.relay.stats()["failovers"], 0)
+        self.assertIn("500", self.relay.channel("1", resolve=False).last_error)
+
+class ChannelLifecycleTest(RelayTestCase):
+    def setUp(self):
+        super().setUp()
+        # add_channel() looks up failover hosts on the persistent scoreboard
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(app_cache, "APP_CACHE_DIR", cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.origin_a = self.origin("a", sequence=10)
+        self.resolved = []
+
+    def resolver(self, channel_id):
+        self.resolved.append(channel_id)
+        return self.origin_a.playlist_url, {}, None
+
+    def relay_with(self, **kwargs):
+        relay = hls_relay.HLSRelay(port=0, resolver=self.resolver, **kwargs)
+        relay.start()
+        self.addCleanup(relay.stop)
+        return relay
+
+    def test_only_allowed_or_added_channels_are_resolved_on_request(self):
+        relay = self.relay_with(auto_resolve=[7])
+
+        with self.assertRaises(requests.HTTPError) as raised:
+            Player(f"{relay.base_url}/8/index.m3u8").playlist()
+        self.assertEqual(raised.exception.response.status_code, 404)
+        self.assertEqual(self.resolved, [])
+
+        Player(f"{relay.base_url}/7/index.m3u8").fetch_all()
+        self.assertEqual(self.resolved, [7])
+
+        relay.add_channel(9)
+        relay.remove_channel(9)
+        with self.assertRaises(requests.HTTPError):
+            Player(f"{relay.base_url}/9/index.m3u8").playlist()
+        self.assertEqual(self.resolved, [7, 9])
+
+    def test_idle_channels_are_dropped_and_reresolved_when_reopened(self):
+        relay = self.relay_with(idle_timeout=0.2)
+        local_url = relay.add_channel(5)
+        held = relay.add_source("held", self.origin_a.playlist_url)
+        relay.channel("held", resolve=False).add_client()
+        Player(local_url).fetch_all()
+        Player(held).playlist()
+
+        time.sleep(0.3)
+        self.assertIsNone(relay.channel("5", resolve=False))
+        # A registered player keeps its channel however quiet it is
+        self.assertIsNotNone(relay.channel("held", resolve=False))
+
+        # The app added channel 5, so a player coming back to it gets it resolved again
+        self.assertEqual(Player(local_url).fetch_all(), [b"a-8", b"a-9", b"a-10"])
+        self.assertEqual(self.resolved, [5, 5])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+# test_host_scoreboard.py
+#
+#   python -m unittest test_host_scoreboard     (or: python -m pytest test_host_scoreboard.py)
+
+import tempfile
+import unittest
+from unittest import mock
+
+import app_cache
+import host_scoreboard
+from host_scoreboard import HostScoreboard
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class HostScoreboardTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(app_cache, "APP_CACHE_DIR", cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.clock = Clock()
+        self.board = HostScoreboard(clock=self.clock)
+
+    def test_orders_by_success_discounted_by_latency(self):
+        self.board.record(1, [("slow", 200, 1.5), ("fast", 200, 0.1), ("dead", None, None)])
+
+        ordered, _ = self.board.order(["dead", "slow", "fast", "unknown"])
+        self.assertEqual(ordered, ["fast", "slow", "unknown", "dead"])
+
+    def test_latency_is_an_ewma(self):
+        self.board.record(1, [("a", 200, 1.0)])
+        self.board.record(1, [("a", 200, 2.0)])
+
+        stat = self.board._hosts["a"]
+        alpha = host_scoreboard.EWMA_ALPHA
+        self.assertAlmostEqual(stat["latency"], alpha * 2.0 + (1 - alpha) * 1.0)
+        self.assertAlmostEqual(stat["success"], 1 - (1 - alpha) ** 2 * (1 - host_scoreboard.PRIOR_SUCCESS))
+
+    def test_missing_channel_only_counts_against_that_channel(self):
+        self.board.record(1, [("a", 404, 0.1), ("b", 200, 0.1)])
+
+        self.assertNotIn("a", self.board._hosts)
+        self.assertEqual(self.board.order(["a", "b"], channel_id=1)[0], ["b", "a"])
+        # Another channel only sees the host-wide history, where "a" has no strikes
+        self.assertEqual(self.board.order(["a", "b"], channel_id=2)[0], ["b", "a"])
+        self.assertGreater(self.board.score("a", channel_id=2), self.board.score("a", channel_id=1))
+
+    def test_old_failures_decay_back_toward_the_prior(self):
+        self.board.record(1, [("a", None, None)] * 3)
+        fresh = self.board.score("a")
+        prior = self.board.score("never-seen")
+        self.assertLess(fresh, prior)
+
+        self.clock.now += host_scoreboard.DECAY_HALF_LIFE
+        half_way = self.board.score("a")
+        self.assertAlmostEqual(prior - half_way, (prior - fresh) / 2, places=6)
+
+        self.clock.now += 20 * host_scoreboard.DECAY_HALF_LIFE
+        self.assertAlmostEqual(self.board.score("a"), prior, places=5)
+
+    def test_first_wave_is_everyone_until_the_leader_is_confident(self):
+        self.board.record(1, [("a", 200, 0.2)])
+        ordered, first_wave = self.board.order(["b", "a", "c"])
+        self.assertEqual(ordered[0], "a")
+        self.assertEqual(first_wave, 3)
+
+        self.board.record(1, [("a", 200, 0.2)] * 2)
+        self.assertGreaterEqual(self.board._hosts["a"]["success"], host_scoreboard.CONFIDENT_SUCCESS)
+        self.assertEqual(self.board.order(["b", "a", "c"]), (["a", "b", "c"], 1))
+
+    def test_stale_host_is_promoted_into_the_first_wave(self):
+        self.board.record(1, [("stale", None, None)])
+        self.clock.now += host_scoreboard.RETRY_AFTER
+        self.board.record(1, [("leader", 200, 0.2)] * 3)
+
+        self.assertEqual(self.board.order(["leader", "other", "stale"]), (["leader", "stale", "other"], 2))
+
+    def test_history_persists_across_instances(self):
+        self.board.record(1, [("a", None, None), ("b", 200, 0.1)])
+
+        reloaded = HostScoreboard(clock=self.clock)
+        self.assertEqual(reloaded.order(["a", "b"], channel_id=1)[0], ["b", "a"])
+        self.assertAlmostEqual(reloaded.score("a", channel_id=1), self.board.score("a", channel_id=1))
+
+if __name__ == "__main__":
+    unittest.main()
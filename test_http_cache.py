@@ -0,0 +1,128 @@
+# test_http_cache.py
+#
+# Runs the conditional-GET cache against a local server:
+#
+#   python -m unittest test_http_cache     (or: python -m pytest test_http_cache.py)
+
+import tempfile
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from unittest import mock
+
+import requests
+
+import app_cache
+from http_cache import HttpCache
+
+class FakeSite:
+    """
+    Serves `body` at any path. With `etag` set it sends that ETag and answers
+    a matching If-None-Match with 304; without it, every GET gets the full body.
+    """
+    def __init__(self, body, etag=None, last_modified=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, dict(self.headers)))
+                if site.etag and self.headers.get("If-None-Match") == site.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = site.body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if site.etag:
+                    self.send_header("ETag", site.etag)
+                if site.last_modified:
+                    self.send_header("Last-Modified", site.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def url(self, path="/page"):
+        return f"http://127.0.0.1:{self._server.server_address[1]}{path}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(app_cache, "APP_CACHE_DIR", cache_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+        self.cache = HttpCache()
+        self.parsed = []
+
+    def site(self, *args, **kwargs):
+        site = FakeSite(*args, **kwargs)
+        self.addCleanup(site.close)
+        return site
+
+    def parse(self, body):
+        self.parsed.append(body)
+        return body.split()
+
+    def fetch(self, site, path="/page", **kwargs):
+        return self.cache.fetch(self.session, "page", site.url(path), self.parse, **kwargs)
+
+    def test_not_modified_reuses_the_cached_result(self):
+        site = self.site("a b c", etag='"v1"', last_modified="Wed, 01 Oct 2025 10:00:00 GMT")
+
+        self.assertEqual(self.fetch(site), (["a", "b", "c"], "fresh"))
+        self.assertEqual(self.fetch(site), (["a", "b", "c"], "not_modified"))
+
+        headers = site.requests[1][1]
+        self.assertEqual(headers.get("If-None-Match"), '"v1"')
+        self.assertEqual(headers.get("If-Modified-Since"), "Wed, 01 Oct 2025 10:00:00 GMT")
+        self.assertEqual(self.parsed, ["a b c"])
+
+    def test_identical_body_is_not_parsed_again(self):
+        site = self.site("a b c")
+
+        self.assertEqual(self.fetch(site), (["a", "b", "c"], "fresh"))
+        self.assertEqual(self.fetch(site), (["a", "b", "c"], "unchanged"))
+        self.assertNotIn("If-None-Match", site.requests[1][1])
+        self.assertEqual(self.parsed, ["a b c"])
+
+        site.body = "a b d"
+        self.assertEqual(self.fetch(site), (["a", "b", "d"], "fresh"))
+        self.assertEqual(self.parsed, ["a b c", "a b d"])
+        self.assertEqual(self.cache.raw_body("page"), "a b d")
+
+    def test_validators_from_another_url_are_not_sent(self):
+        site = self.site("a b c", etag='"v1"')
+        self.fetch(site)
+
+        self.assertEqual(self.fetch(site, path="/moved"), (["a", "b", "c"], "fresh"))
+        self.assertNotIn("If-None-Match", site.requests[1][1])
+
+    def test_encode_and_decode_round_trip_the_cached_result(self):
+        site = self.site("b a b", etag='"v1"')
+        options = dict(encode=sorted, decode=frozenset)
+
+        parsed, status = self.cache.fetch(self.session, "page", site.url(), lambda body: set(body.split()), **options)
+        self.assertEqual((parsed, status), ({"a", "b"}, "fresh"))
+        parsed, status = self.cache.fetch(self.session, "page", site.url(), self.parse, **options)
+        self.assertEqual((parsed, status), (frozenset({"a", "b"}), "not_modified"))
+        self.assertEqual(self.cache.load("page")["parsed"], ["a", "b"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+# test_list_models.py
+#
+# Checks that RecordListModel.update_records() ends up with the same rows as
+# set_records() would, using as few row operations as it can:
+#
+#   python -m unittest test_list_models     (or: python -m pytest test_list_models.py)
+
+import unittest
+
+from PyQt6.QtCore import QCoreApplication
+
+from list_models import RecordListModel, SearchResultsModel, RECORD_ROLE
+from search_engine import channel_documents
+
+def channel(number, name):
+    return {'DLChNo': number, 'DLChName': name}
+
+def display(record):
+    return f"{record['DLChName']} ({record['DLChNo']})"
+
+BASE = [channel(1, "Sky Sports Main Event"), channel(2, "TNT Sports 1"), channel(3, "ESPN"),
+        channel(4, "BBC One"), channel(5, "Eurosport 1")]
+
+QUERIES = ["", "sport", "sky", "espm", "bbc one", "(4)", "nothing here"]
+
+class RecordListModelUpdateTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def model(self, records, **kwargs):
+        model = RecordListModel(display, **kwargs)
+        model.set_records(records)
+        return model
+
+    def snapshot(self, model):
+        rows = [(model.data(model.index(row)), model.data(model.index(row), RECORD_ROLE))
+                for row in range(model.rowCount())]
+        return rows, {query: model.search(query) for query in QUERIES}
+
+    def assert_update_matches_set(self, before, after, **kwargs):
+        """Updates a model from `before` to `after`; returns its counts and signal log."""
+        updated = self.model(before, **kwargs)
+        signals = []
+        updated.rowsInserted.connect(lambda parent, first, last: signals.append(("insert", first, last)))
+        updated.rowsRemoved.connect(lambda parent, first, last: signals.append(("remove", first, last)))
+        updated.dataChanged.connect(lambda top, bottom: signals.append(("change", top.row(), bottom.row())))
+        updated.modelReset.connect(lambda: signals.append(("reset",)))
+        counts = updated.update_records(after)
+
+        self.assertEqual(self.snapshot(updated), self.snapshot(self.model(after, **kwargs)))
+        return counts, signals
+
+    def test_inserts(self):
+        for documents in (None, channel_documents):
+            with self.subTest(documents=documents):
+                after = [channel(0, "Sky Cinema")] + BASE[:2] + [channel(9, "ESPN 2"), channel(8, "ESPN 3")] \
+                    + BASE[2:] + [channel(7, "Sport 7")]
+                counts, signals = self.assert_update_matches_set(BASE, after, documents=documents)
+
+                self.assertEqual(counts, (4, 0, 0))
+                self.assertEqual(signals, [("insert", 0, 0), ("insert", 3, 4), ("insert", 8, 8)])
+
+    def test_removals(self):
+        for documents in (None, channel_documents):
+            with self.subTest(documents=documents):
+                counts, signals = self.assert_update_matches_set(BASE, [BASE[1], BASE[4]], documents=documents)
+
+                self.assertEqual(counts, (0, 3, 0))
+                self.assertEqual(signals, [("remove", 2, 3), ("remove", 0, 0)])
+
+    def test_changed_record_keeps_its_row(self):
+        after = BASE[:2] + [channel(3, "ESPN Deportes")] + BASE[3:]
+        counts, signals = self.assert_update_matches_set(BASE, after, documents=channel_documents)
+
+        self.assertEqual(counts, (0, 0, 1))
+        self.assertEqual(signals, [("change", 2, 2)])
+
+    def test_inserts_removals_and_changes_together(self):
+        after = [channel(0, "Sky Cinema"), BASE[1], channel(3, "ESPN Deportes"), channel(6, "Premier Sports"),
+                 BASE[4]]
+        counts, signals = self.assert_update_matches_set(BASE, after, documents=channel_documents)
+
+        self.assertEqual(counts, (2, 2, 1))
+        self.assertNotIn(("reset",), signals)
+
+    def test_moves_fall_back_to_a_reset(self):
+        for documents in (None, channel_documents):
+            with self.subTest(documents=documents):
+                after = [BASE[3], BASE[0], BASE[1], BASE[2], channel(6, "Premier Sports")]
+                counts, signals = self.assert_update_matches_set(BASE, after, documents=documents)
+
+                self.assertEqual(counts, (5, 5, 0))
+                self.assertEqual(signals, [("reset",)])
+
+    def test_duplicate_listings_keep_both_rows(self):
+        duplicated = BASE[:2] + [BASE[1]] + BASE[2:]
+        counts, signals = self.assert_update_matches_set(BASE, duplicated, documents=channel_documents)
+        self.assertEqual(counts, (1, 0, 0))
+        self.assertEqual(signals, [("insert", 2, 2)])
+
+        counts, signals = self.assert_update_matches_set(duplicated, BASE, documents=channel_documents)
+        self.assertEqual(counts, (0, 1, 0))
+        self.assertEqual(signals, [("remove", 2, 2)])
+
+    def test_search_results_follow_updates(self):
+        model = self.model(BASE, documents=channel_documents)
+        results = SearchResultsModel(model)
+        results.set_query("espn")
+        self.assertEqual([results.source_row(row) for row in range(results.rowCount())], [2])
+
+        model.update_records([channel(9, "ESPN 2")] + BASE)
+        self.assertEqual(sorted(results.source_row(row) for row in range(results.rowCount())), [0, 3])
+
+if __name__ == "__main__":
+    unittest.main()
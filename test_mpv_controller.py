@@ -0,0 +1,212 @@
+# test_mpv_controller.py
+#
+# Drives MpvController's JSON IPC handling against a fake mpv on the other end
+# of a socketpair (no mpv needed):
+#
+#   python -m unittest test_mpv_controller     (or: python -m pytest test_mpv_controller.py)
+
+import json
+import socket
+import time
+import threading
+import unittest
+from types import SimpleNamespace
+
+import mpv_controller
+from mpv_controller import MpvController, MpvError, _file_options
+
+class SocketpairConnection(mpv_controller._IpcConnection):
+    """_IpcConnection over an already connected socket instead of mpv's IPC path."""
+    def __init__(self, sock):
+        self._sock = sock
+        self._handle = None
+        self._pending_read = None
+        self._buffer = b""
+        self._write_lock = threading.Lock()
+
+class FakeMpv:
+    """
+    The mpv end of the connection. Records every command it receives and
+    answers it with `replies[name]` ((error, data), default success), unless
+    the name is in `held`; send() pushes raw events or replies at any time.
+    """
+    def __init__(self, sock):
+        self.sock = sock
+        self.commands = []
+        self.replies = {}
+        self.held = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        for line in self.sock.makefile("rb"):
+            message = json.loads(line)
+            command = message["command"]
+            name = command["name"] if isinstance(command, dict) else command[0]
+            with self._lock:
+                self.commands.append(command)
+                if name in self.held:
+                    self.held[name].append(message["request_id"])
+                    continue
+            error, data = self.replies.get(name, ("success", None))
+            self.reply(message["request_id"], error, data)
+
+    def reply(self, request_id, error="success", data=None):
+        self.send({"request_id": request_id, "error": error, "data": data})
+
+    def send(self, *messages):
+        self.sock.sendall(b"".join(json.dumps(message).encode("utf-8") + b"\n" for message in messages))
+
+    def named_commands(self, name):
+        with self._lock:
+            return [command for command in self.commands if isinstance(command, dict) and command["name"] == name]
+
+class MpvControllerTestCase(unittest.TestCase):
+    def setUp(self):
+        ours, theirs = socket.socketpair()
+        self.addCleanup(theirs.close)
+        self.mpv = FakeMpv(theirs)
+        self.states = []
+        self.controller = MpvController(on_state=self.states.append)
+        # Looks like a live mpv process to is_running(), so load() doesn't start a real one
+        self.controller.process = SimpleNamespace(poll=lambda: None)
+        connection = self.controller._connection = SocketpairConnection(ours)
+        self.reader = threading.Thread(target=self.controller._read_loop, args=(connection,), daemon=True)
+        self.reader.start()
+        self.addCleanup(self.close)
+
+    def close(self):
+        with self.controller._lock:
+            self.controller._cleanup_locked()
+        self.reader.join(2)
+
+    def sync(self):
+        """Returns once everything mpv sent before this round trip has been handled."""
+        self.controller.command("get_property", "pause")
+
+class ReadLoopTest(MpvControllerTestCase):
+    def test_replies_are_matched_to_requests_by_id(self):
+        self.mpv.held["get_property"] = held = []
+        results = {}
+
+        def ask(name):
+            results[name] = self.controller.command("get_property", name)
+        threads = [threading.Thread(target=ask, args=(name,)) for name in ("volume", "pause")]
+        for thread in threads:
+            thread.start()
+        while len(held) < 2:
+            time.sleep(0.01)
+
+        # Answered in reverse order, with an event in between
+        first, second = held
+        self.mpv.send({"request_id": second, "error": "success", "data": "second"},
+                      {"event": "property-change", "id": 1, "name": "pause", "data": True},
+                      {"request_id": first, "error": "success", "data": "first"})
+        for thread in threads:
+            thread.join(2)
+        asked_first = self.mpv.commands[0][1]
+        self.assertEqual(results[asked_first], "first")
+        self.assertEqual(set(results.values()), {"first", "second"})
+        self.assertIs(self.controller.state["pause"], True)
+
+    def test_errors_and_events_carrying_a_request_id(self):
+        self.mpv.replies["set_property"] = ("property not found", None)
+        with self.assertRaises(MpvError) as raised:
+            self.controller.set_property("no-such-property", 1)
+        self.assertIn("property not found", str(raised.exception))
+
+        # Events can carry the request_id of the command that caused them; they are still events
+        self.mpv.send({"event": "property-change", "name": "paused-for-cache", "data": True, "request_id": 1})
+        self.sync()
+        self.assertIs(self.controller.state["paused-for-cache"], True)
+        self.assertEqual(self.controller.stalls, 1)
+        self.assertTrue(self.states[-1]["buffering"])
+
+    def test_closed_connection_fails_pending_requests_and_ends_playback(self):
+        playback = self.controller.load("http://example.invalid/a.m3u8")
+        self.mpv.held["get_property"] = []
+        errors = []
+
+        def ask():
+            try:
+                self.controller.command("get_property", "volume")
+            except MpvError as e:
+                errors.append(e)
+        thread = threading.Thread(target=ask)
+        thread.start()
+        while not self.mpv.held["get_property"]:
+            time.sleep(0.01)
+        self.mpv.sock.shutdown(socket.SHUT_RDWR)
+        thread.join(2)
+        self.reader.join(2)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(playback.end_reason, "quit")
+        self.assertFalse(self.controller.is_running())
+        self.assertFalse(self.states[-1]["running"])
+
+class PlaybackEventsTest(MpvControllerTestCase):
+    def test_file_events_drive_the_current_playback(self):
+        started = []
+        playback = self.controller.load("http://example.invalid/a.m3u8", on_started=lambda: started.append(1))
+        self.mpv.send({"event": "start-file", "playlist_entry_id": 1},
+                      {"event": "file-loaded", "playlist_entry_id": 1},
+                      {"event": "playback-restart", "playlist_entry_id": 1})
+        self.assertTrue(playback.started.wait(2))
+        self.sync()
+        self.assertEqual(playback.entry_id, 1)
+        self.assertEqual(started, [1])
+
+        self.mpv.send({"event": "end-file", "playlist_entry_id": 1, "reason": "error", "file_error": "loading failed"})
+        self.assertTrue(playback.ended.wait(2))
+        self.assertEqual((playback.end_reason, playback.error), ("error", "loading failed"))
+
+    def test_previous_streams_end_file_is_ignored(self):
+        first = self.controller.load("http://example.invalid/a.m3u8")
+        self.mpv.send({"event": "start-file", "playlist_entry_id": 1}, {"event": "file-loaded", "playlist_entry_id": 1})
+        self.assertTrue(first.started.wait(2))
+
+        second = self.controller.load("http://example.invalid/b.m3u8")
+        self.assertEqual(first.end_reason, "replaced")
+        # mpv may report the old entry's end before or after the new one starts
+        self.mpv.send({"event": "end-file", "playlist_entry_id": 1, "reason": "stop"},
+                      {"event": "start-file", "playlist_entry_id": 2},
+                      {"event": "end-file", "playlist_entry_id": 1, "reason": "stop"},
+                      {"event": "file-loaded", "playlist_entry_id": 1})
+        self.sync()
+        self.assertFalse(second.ended.is_set())
+        self.assertFalse(second.started.is_set())
+        self.assertEqual(second.entry_id, 2)
+
+        self.mpv.send({"event": "file-loaded", "playlist_entry_id": 2},
+                      {"event": "end-file", "playlist_entry_id": 2, "reason": "eof"})
+        self.assertTrue(second.ended.wait(2))
+        self.assertTrue(second.started.is_set())
+        self.assertEqual(second.end_reason, "eof")
+        self.assertEqual(first.end_reason, "replaced")
+
+    def test_load_sends_headers_and_per_file_options(self):
+        self.controller.load("http://example.invalid/a.m3u8",
+                             headers={"User-Agent": "UA", "Referer": "https://ref/", "Origin": "https://ref"},
+                             cookies="a=1; b=2", options={"cache": True, "demuxer-lavf-o": "a=1,b=2"})
+        self.sync()
+
+        self.assertIn(["set_property", "user-agent", "UA"], self.mpv.commands)
+        self.assertIn(["set_property", "referrer", "https://ref/"], self.mpv.commands)
+        self.assertIn(["set_property", "http-header-fields", ["Origin: https://ref", "Cookie: a=1; b=2"]],
+                      self.mpv.commands)
+        loadfile, = self.mpv.named_commands("loadfile")
+        self.assertEqual(loadfile, {"name": "loadfile", "url": "http://example.invalid/a.m3u8", "flags": "replace",
+                                    "options": "cache=%3%yes,demuxer-lavf-o=%7%a=1,b=2"})
+
+class FileOptionsTest(unittest.TestCase):
+    def test_values_are_length_quoted_in_bytes(self):
+        self.assertEqual(_file_options({"cache": False, "cache-secs": 20}), "cache=%2%no,cache-secs=%2%20")
+        self.assertEqual(_file_options({"title": "Match, live"}), "title=%11%Match, live")
+        # The length counts UTF-8 bytes, as mpv does
+        self.assertEqual(_file_options({"title": "Zürich %1%"}), "title=%11%Zürich %1%")
+        self.assertEqual(_file_options({"force-media-title": ""}), "force-media-title=%0%")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+# test_schedule_parser.py
+#
+# Checks that every schedule parser backend builds the same Schedule:
+#
+#   python -m unittest test_schedule_parser     (or: python -m pytest test_schedule_parser.py)
+
+import unittest
+
+import schedule_parser
+from schedule_parser import EventTimeConverter, build_schedule
+
+SCHEDULE_PAGE = """<!DOCTYPE html>
+<html><head><title>Schedule</title><meta charset="utf-8"></head><body>
+<div class="schedule">
+ <div class="schedule__day">
+  <div class="schedule__dayTitle">Saturday 18th Oct 2025 <!-- edition --> - Schedule Time UK GMT</div>
+  <div class="schedule__category is-open">
+   <div class="schedule__catHeader"><div class="card__meta">Soccer &amp; Football</div></div>
+   <div class="schedule__events">
+    <div class="schedule__event">
+     <div class="schedule__eventHeader">
+      <span class="schedule__time" data-time="15:00">15:00</span>
+      <span class="schedule__eventTitle">Arsenal <b>vs</b> Chelsea&nbsp;</span>
+     </div>
+     <div class="schedule__channels">
+      <a href="/watch.php?id=44" target="_blank">Sky Sports&nbsp;Main Event</a>
+      <a href="https://dlhd.dad/watch.php?id=45&amp;lang=en">TNT <br>Sports 1</a>
+      <a href="/info.php">More info</a>
+     </div>
+    </div>
+    <div class="schedule__event">
+     <div class="schedule__eventHeader">
+      <span class="schedule__time">7:45 PM</span>
+      <span class="schedule__eventTitle">Liverpool vs Everton</span>
+     </div>
+    </div>
+    <div class="schedule__event">
+     <div class="schedule__eventHeader"><span class="schedule__eventTitle">No start time</span></div>
+     <div class="schedule__channels"><a href="/watch.php?id=1">ESPN</a></div>
+    </div>
+    <div class="schedule__event">
+     <div class="schedule__eventHeader">
+      <span class="schedule__time">not a time</span><span class="schedule__eventTitle">Postponed</span>
+     </div>
+    </div>
+   </div>
+  </div>
+  <div class="schedule__category">
+   <div class="schedule__catHeader"><div class="card__meta">TV Shows</div></div>
+   <div class="schedule__event">
+    <span class="schedule__time">20:00</span><span class="schedule__eventTitle">Quiz Night</span>
+    <div class="schedule__channels"><a href="/watch.php?id=7">BBC One</a></div>
+   </div>
+  </div>
+  <div class="schedule__category">
+   <div class="schedule__catHeader"><div class="extra card__meta  ">Tennis</div></div>
+   <div class="schedule__event">
+    <span class="schedule__time"> 09:30 </span>
+    <span class="schedule__eventTitle">ATP Vienna: <i>R16</i></span>
+    <div class="schedule__channels">
+     <a href="/watch.php?id=12">Eurosport 1</a><a href="/watch.php?id=12">Eurosport 1</a>
+     <a href="/watch.php?id=abc">Broken link</a>
+    </div>
+   </div>
+  </div>
+ </div>
+</div>
+</body></html>
+"""
+
+# Not well-formed inside the events: stray and missing end tags. lxml repairs
+# these its own way (which is why it is opt-in), so only the stream extractor
+# must match bs4 here.
+BROKEN_PAGE = """<div class="schedule__dayTitle">Sunday 19th Oct 2025</div>
+<div class="schedule__category"><div class="schedule__catHeader"><div class="card__meta">Darts</div></div>
+ <div class="schedule__event"><span class="schedule__time">13:00</span></p>
+  <span class="schedule__eventTitle">Final</b></span>
+  <div class="schedule__channels"><a href="/watch.php?id=3">Sky <a href="/watch.php?id=4">Arena</div>
+ </div>
+ <div class="schedule__event"><span class="schedule__time">14:00<span class="schedule__eventTitle">Derby</span></div>
+</div>
+<div class="schedule__category"><div class="schedule__catHeader"><div class="card__meta">Rugby</div></div>
+ <div class="schedule__event"><span class="schedule__time">16:30</span><span class="schedule__eventTitle">Cup
+"""
+
+class ScheduleParserBackendTest(unittest.TestCase):
+    def schedules(self, page_html, backends):
+        converter = EventTimeConverter()
+        extracted = {name: schedule_parser.BACKENDS[name](page_html) for name in backends}
+        built = {name: build_schedule(*result, converter=converter) for name, result in extracted.items()}
+        return extracted, built
+
+    def assert_backends_agree(self, page_html, backends):
+        extracted, built = self.schedules(page_html, backends)
+        reference = backends[0]
+        for name in backends[1:]:
+            with self.subTest(backend=name):
+                self.assertEqual(extracted[name], extracted[reference])
+                self.assertEqual(built[name], built[reference])
+                self.assertEqual(built[name].to_rows(), built[reference].to_rows())
+        return built[reference]
+
+    def test_stream_matches_bs4(self):
+        schedule = self.assert_backends_agree(SCHEDULE_PAGE, ["bs4", "stream"])
+
+        self.assertEqual([event.title for event in schedule],
+                         ["ArsenalvsChelsea", "Liverpool vs Everton", "ATP Vienna:R16"])
+        self.assertEqual(schedule.categories, ["Soccer & Football", "Tennis"])
+        first = schedule.events[0]
+        self.assertEqual([(channel.id, channel.name) for channel in first.channels],
+                         [(44, "Sky Sports\xa0Main Event"), (45, "TNTSports 1")])
+        self.assertEqual(schedule.events[1].time_utc, "7:45 PM")
+        self.assertFalse(schedule.events[1].channels)
+        self.assertEqual(schedule.events[0].date, "2025-10-18")
+
+    @unittest.skipUnless("lxml" in schedule_parser.available_backends(), "lxml is not installed")
+    def test_lxml_matches_bs4(self):
+        self.assert_backends_agree(SCHEDULE_PAGE, ["bs4", "lxml"])
+
+    def test_stream_matches_bs4_on_broken_markup(self):
+        schedule = self.assert_backends_agree(BROKEN_PAGE, ["bs4", "stream"])
+        self.assertEqual(schedule.categories, ["Darts", "Rugby"])
+
+    def test_parse_schedule_uses_the_requested_backend(self):
+        expected = build_schedule(*schedule_parser.extract_bs4(SCHEDULE_PAGE))
+        for name in schedule_parser.available_backends():
+            with self.subTest(backend=name):
+                self.assertEqual(schedule_parser.parse_schedule(SCHEDULE_PAGE, backend=name), expected)
+        with self.assertRaises(ValueError):
+            schedule_parser.parse_schedule(SCHEDULE_PAGE, backend="regex")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+# test_search_engine.py
+#
+#   python -m unittest test_search_engine     (or: python -m pytest test_search_engine.py)
+
+import unittest
+
+import search_engine
+from search_engine import SearchEngine, max_edits
+
+TITLES = ["Liverpool vs Everton", "Arsenal vs Chelsea", "Manchester City vs Liverpool", "Real Madrid vs Barcelona",
+          "Boston Celtics vs Miami Heat", "Bayern vs Dortmund", "Main Event: Boxing"]
+
+class SearchEngineTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = SearchEngine()
+        self.engine.sync((title, title, {"name": title}) for title in TITLES)
+
+    def keys(self, query, **kwargs):
+        return [key for key, _, _ in self.engine.search(query, **kwargs)]
+
+    def test_typos_allowed_grow_with_token_length(self):
+        self.assertEqual([max_edits(token) for token in ("b", "ma", "man", "main", "celtcs", "liverpol")],
+                         [0, 0, 0, 1, 1, 2])
+        self.assertEqual(self.keys("celtcs"), ["Boston Celtics vs Miami Heat"])
+        self.assertEqual(self.keys("madird"), ["Real Madrid vs Barcelona"])
+        self.assertEqual(self.keys("liverpol"), ["Liverpool vs Everton", "Manchester City vs Liverpool"])
+        # A 3-letter token is a prefix or nothing: "man" must not reach "main"
+        self.assertEqual(self.keys("man"), ["Manchester City vs Liverpool"])
+
+    def test_short_tokens_only_match_exactly(self):
+        self.assertEqual(self.keys("b"), [])
+        self.assertEqual(self.keys("ba"), [])
+        self.engine.add("BT", "BT", {"name": "BT Sport 1"})
+        self.assertEqual(self.keys("bt"), ["BT"])
+        self.assertEqual(self.keys("bt sport"), ["BT"])
+
+    def test_results_are_ranked_and_capped(self):
+        count = search_engine.MAX_RESULTS * 2
+        self.engine.sync((f"Liverpool {i}", i, {"name": f"Liverpool TV {i}"}) for i in range(count))
+        self.engine.add("other field", "other field", {"category": "Liverpool"})
+
+        hits = self.engine.search("liverpool")
+        self.assertEqual(len(hits), search_engine.MAX_RESULTS)
+        self.assertEqual([score for _, _, score in hits], sorted((score for _, _, score in hits), reverse=True))
+        self.assertEqual(hits[0][0], "Liverpool 0")
+        self.assertNotIn("other field", [key for key, _, _ in hits])
+        self.assertEqual(len(self.engine.search("liverpool", limit=None)), count + 1)
+        self.assertEqual(self.keys("liverpool", limit=3), ["Liverpool 0", "Liverpool 1", "Liverpool 2"])
+
+if __name__ == "__main__":
+    unittest.main()
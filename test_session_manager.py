@@ -0,0 +1,184 @@
+# test_session_manager.py
+#
+# Drives the session budget planner and restart policy with fake sessions and
+# players and an injected clock (no streams or players needed):
+#
+#   python -m unittest test_session_manager     (or: python -m pytest test_session_manager.py)
+
+import unittest
+from unittest import mock
+
+import session_manager
+from session_manager import (
+    SessionManager, PlaybackSession, PLAYING, ENDED, RESTARTING,
+    PRIORITY_LOW, PRIORITY_NORMAL, PRIORITY_HIGH, QUALITY_LEVELS,
+)
+
+BEST, MEDIUM, LOW = range(len(QUALITY_LEVELS))
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class FakePlayer:
+    """Stands in for StreamPlayer: keeps its callbacks, and its stream always 'ended by itself'."""
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.started = self.stopped = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    def stream_ended(self):
+        return True
+
+    def join(self, timeout=None):
+        pass
+
+class PlannerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.manager = SessionManager(bandwidth_budget=20000, cpu_budget=100, backend="cli", clock=self.clock)
+
+    def add(self, priority, quality=BEST, changed_ago=None):
+        """A playing session added straight to the manager (no player)."""
+        session_id = len(self.manager._sessions) + 1
+        session = PlaybackSession(session_id, session_id, f"s{session_id}", priority,
+                                  adjustable=True, controller=None, dedicated=False)
+        session.state = PLAYING
+        session.quality = quality
+        if changed_ago is not None:
+            session.quality_changed_at = self.clock.now - changed_ago
+        self.manager._sessions[session_id] = session
+        return session
+
+    def levels(self, *sessions):
+        return [session.quality for session in sessions]
+
+    def test_lowest_priority_then_newest_sessions_are_downgraded_first(self):
+        high = self.add(PRIORITY_HIGH)
+        older = self.add(PRIORITY_NORMAL)
+        newer = self.add(PRIORITY_NORMAL)
+        low = self.add(PRIORITY_LOW)
+
+        # 4 x 6000 kbps: the low-priority session alone gives up enough
+        self.manager.rebalance()
+        self.assertEqual(self.levels(high, older, newer, low), [BEST, BEST, BEST, LOW])
+
+        # Then the newer of the two normal-priority ones
+        self.manager.bandwidth_budget = 15000
+        self.manager.rebalance()
+        self.assertEqual(self.levels(high, older, newer, low), [BEST, BEST, LOW, LOW])
+        self.assertEqual(newer.quality_changed_at, self.clock.now)
+        self.assertFalse(self.manager.over_budget())
+
+    def test_cpu_budget_is_planned_like_bandwidth(self):
+        self.manager.bandwidth_budget = 100000
+        self.manager.cpu_budget = 1.5
+        first = self.add(PRIORITY_NORMAL)
+        second = self.add(PRIORITY_NORMAL)
+
+        self.manager.rebalance()
+        # 1.0 + 0.35 fits where 1.0 + 0.6 doesn't
+        self.assertEqual(self.levels(first, second), [BEST, LOW])
+
+        # A measured, settled CPU figure replaces the per-level estimate
+        second.cpu_percent = 0.2 * session_manager.FULL_QUALITY_CPU_PERCENT
+        self.clock.now += session_manager.MEASUREMENT_SETTLE + 1
+        self.assertAlmostEqual(self.manager.usage()[2], 1.2)
+
+    def test_upgrades_wait_for_the_cooldown(self):
+        session = self.add(PRIORITY_NORMAL, quality=MEDIUM, changed_ago=0)
+
+        self.clock.now += session_manager.QUALITY_CHANGE_COOLDOWN - 1
+        self.assertEqual(self.manager.rebalance(), 0)
+        self.clock.now += 1
+        self.assertEqual(self.manager.rebalance(), 1)
+        self.assertEqual(session.quality, BEST)
+
+    def test_upgrades_need_headroom_under_the_budget(self):
+        session = self.add(PRIORITY_NORMAL, quality=MEDIUM)
+
+        # 6000 kbps would fit a 7000 budget, but not its UPGRADE_HEADROOM share
+        self.manager.bandwidth_budget = 7000
+        self.assertLess(self.manager.bandwidth_budget * session_manager.UPGRADE_HEADROOM, 6000)
+        self.assertEqual(self.manager.rebalance(), 0)
+
+        self.manager.bandwidth_budget = 6000 / session_manager.UPGRADE_HEADROOM
+        self.assertEqual(self.manager.rebalance(), 1)
+        self.assertEqual(session.quality, BEST)
+
+    def test_upgrade_is_paid_for_by_lower_priorities_and_goes_highest_first(self):
+        self.manager.bandwidth_budget = 12000
+        low = self.add(PRIORITY_LOW, quality=BEST)
+        normal = self.add(PRIORITY_NORMAL, quality=LOW)
+        high = self.add(PRIORITY_HIGH, quality=MEDIUM)
+
+        # Only the high-priority session is upgraded, and the low one steps down to make room
+        self.assertEqual(self.manager.rebalance(), 2)
+        self.assertEqual(self.levels(low, normal, high), [LOW, LOW, BEST])
+        self.assertLessEqual(self.manager.usage()[1], 12000 * session_manager.UPGRADE_HEADROOM)
+
+        # Nothing lower than the normal one has quality left to give up for its upgrade
+        self.clock.now += session_manager.QUALITY_CHANGE_COOLDOWN
+        self.assertEqual(self.manager.rebalance(), 0)
+        self.assertEqual(self.levels(low, normal, high), [LOW, LOW, BEST])
+
+    def test_sessions_that_cant_change_quality_are_left_alone(self):
+        fixed = self.add(PRIORITY_LOW)
+        fixed.adjustable = False
+        adjustable = self.add(PRIORITY_HIGH)
+        self.manager.bandwidth_budget = 8000
+
+        self.manager.rebalance()
+        self.assertEqual(self.levels(fixed, adjustable), [BEST, LOW])
+
+class RestartTest(unittest.TestCase):
+    def setUp(self):
+        for name, value in (("StreamPlayer", FakePlayer), ("find_player", lambda: "vlc")):
+            patcher = mock.patch.object(session_manager, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.resolver = mock.Mock()
+        self.changes = []
+        self.manager = SessionManager(speculative_resolver=self.resolver, backend="cli",
+                                      on_change=lambda session: self.changes.append(session.state))
+
+    def test_restarts_are_capped(self):
+        session = self.manager.start(7, "Channel 7")
+        players = [session.player]
+        for _ in range(session_manager.MAX_SESSION_RESTARTS):
+            players[-1].kwargs["start_callback"]()
+            players[-1].kwargs["stop_callback"]()
+            self.assertEqual(session.state, RESTARTING)
+            players.append(session.player)
+
+        # The last player ending is final
+        players[-1].kwargs["stop_callback"]()
+        self.assertEqual(session.state, ENDED)
+        self.assertEqual(session.restarts, session_manager.MAX_SESSION_RESTARTS)
+        self.assertEqual(len(set(map(id, players))), session_manager.MAX_SESSION_RESTARTS + 1)
+        self.assertTrue(all(player.started for player in players))
+        self.assertEqual(self.manager.count(), 0)
+        self.assertEqual(self.resolver.invalidate.call_count, session_manager.MAX_SESSION_RESTARTS)
+        self.assertEqual(self.changes[-1], ENDED)
+
+    def test_a_replaced_players_stop_is_ignored(self):
+        session = self.manager.start(7, "Channel 7")
+        first = session.player
+        first.kwargs["stop_callback"]()
+        self.assertIsNot(session.player, first)
+
+        # The retired player reporting again doesn't count as another restart
+        first.kwargs["stop_callback"]()
+        self.assertEqual(session.restarts, 1)
+        self.assertEqual(session.state, RESTARTING)
+
+if __name__ == "__main__":
+    unittest.main()
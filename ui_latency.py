@@ -0,0 +1,57 @@
+# ui_latency.py
+
+import time
+
+from PyQt6.QtCore import QObject, QTimer, Qt
+
+# Expected heartbeat interval: one frame at 60 Hz.
+FRAME_INTERVAL_MS = 16
+
+class FrameLatencyMonitor(QObject):
+    """
+    Measures how late the Qt event loop runs a fixed-interval heartbeat. While
+    something holds the GIL (or blocks the GUI thread) ticks arrive late, so
+    the lateness is a direct measure of UI stutter.
+    """
+    def __init__(self, interval_ms=FRAME_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+        self._last = None
+        self._delays = []
+
+    def start(self):
+        self._delays = []
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def is_active(self):
+        return self._timer.isActive()
+
+    def _tick(self):
+        now = time.perf_counter()
+        self._delays.append(max(0.0, (now - self._last) * 1000 - self.interval_ms))
+        self._last = now
+
+    def stop(self):
+        """Stops measuring and returns {"samples", "mean_ms", "p95_ms", "max_ms"} of tick lateness."""
+        self._timer.stop()
+        return self.stats()
+
+    def stats(self):
+        delays = sorted(self._delays)
+        if not delays:
+            return {"samples": 0, "mean_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": len(delays),
+            "mean_ms": sum(delays) / len(delays),
+            "p95_ms": delays[min(len(delays) - 1, int(len(delays) * 0.95))],
+            "max_ms": delays[-1],
+        }
+
+def format_latency(stats):
+    return (f"{stats['samples']} frames, mean {stats['mean_ms']:.1f} ms late, "
+            f"p95 {stats['p95_ms']:.1f} ms, worst {stats['max_ms']:.1f} ms")